@@ -0,0 +1,65 @@
+# --- START OF FILE benchmarks/bench_copy.py ---
+"""
+Compara el motor de copia de PlayerToolkit con shutil.copy2.
+
+    python benchmarks/bench_copy.py [--large-mb 512] [--small-files 2000] [--dir RUTA]
+
+Cargas: un archivo grande y muchos archivos pequeños (carpeta completa).
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from toolkit_lib.copyengine import copy_file, copy_tree
+
+def _make_large(path: Path, size_mb):
+    block = os.urandom(1024 * 1024)
+    with open(path, 'wb') as f:
+        for _ in range(size_mb): f.write(block)
+
+def _make_small(path: Path, count, size=16 * 1024):
+    path.mkdir(parents=True, exist_ok=True)
+    for i in range(count):
+        sub = path / f"d{i % 20:02d}"; sub.mkdir(exist_ok=True)
+        (sub / f"f{i:05d}.bin").write_bytes(os.urandom(size))
+
+def _copytree_copy2(src, dst): shutil.copytree(src, dst, copy_function=shutil.copy2)
+
+def _time(func, src, dst, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        if dst.exists(): shutil.rmtree(dst) if dst.is_dir() else dst.unlink()
+        start = time.perf_counter(); func(src, dst); best = min(best, time.perf_counter() - start)
+    return best
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--large-mb", type=int, default=256); parser.add_argument("--small-files", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3); parser.add_argument("--dir", help="Carpeta de trabajo (por defecto, temporal)")
+    args = parser.parse_args(argv)
+
+    work = Path(args.dir or tempfile.mkdtemp(prefix="ptk_bench_copy_")); work.mkdir(parents=True, exist_ok=True)
+    try:
+        large, small = work / "large.bin", work / "small"
+        _make_large(large, args.large_mb); _make_small(small, args.small_files)
+        small_bytes = sum(f.stat().st_size for f in small.rglob('*') if f.is_file())
+        cases = [
+            ("archivo grande", large, work / "large_out.bin", args.large_mb * 1024 * 1024, shutil.copy2, copy_file),
+            ("muchos pequeños", small, work / "small_out", small_bytes, _copytree_copy2, copy_tree),
+        ]
+        print(f"{'carga':<18}{'shutil.copy2':>16}{'copyengine':>16}{'mejora':>10}")
+        for name, src, dst, size, baseline, engine in cases:
+            t_base, t_engine = _time(baseline, src, dst, args.repeat), _time(engine, src, dst, args.repeat)
+            mb = size / 1024**2
+            print(f"{name:<18}{mb / t_base:>11.1f} MB/s{mb / t_engine:>11.1f} MB/s{t_base / t_engine:>9.2f}x")
+    finally:
+        if not args.dir: shutil.rmtree(work, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# --- START OF FILE benchmarks/bench_core.py ---
+"""
+Mide las rutas críticas de PlayerToolkit sobre datos sintéticos (sin Windows ni interfaz):
+configuración, escaneo de 'Programas', inventario del registro (simulado), planificación,
+grupos, estado de instalación y un lote completo con instaladores simulados.
+
+    python benchmarks/bench_core.py [--apps 100,1000,5000] [--repeat 3] [--json resultados.json]
+    python benchmarks/bench_core.py --compare base.json [--tolerance 0.25]
+
+Con --compare termina con código 1 si algún caso es más lento que la base por encima de la tolerancia.
+"""
+
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import statistics
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from toolkit_lib.config import build_app_configurations, TASK_TYPE_LOCAL_INSTALL, TASK_TYPE_COPY_INTERACTIVE, TASK_TYPE_MANUAL_ASSISTED
+from toolkit_lib.system import SimulatedSystem, FakeInstaller, set_system
+from toolkit_lib.utils import scan_installed_software, scan_app_files
+from toolkit_lib.groups import GroupRepository
+from toolkit_lib.reconcile import find_installed
+from toolkit_lib.installer_meta import upgrade_status
+from toolkit_lib.tasks import TaskProcessor
+
+BATCH_LIMIT = 500
+BENCH_SETTINGS = {"staging_enabled": False, "metrics_enabled": False, "reconcile_enabled": False}
+
+def make_tree(root: Path, count, seed=0):
+    """'Programas' con 'count' apps (dependencias acíclicas, grupos) y su config_personalizada.json."""
+    rng = random.Random(seed); programas, conf = root / "Programas", root / "conf"
+    (programas / "Grupos").mkdir(parents=True, exist_ok=True); conf.mkdir(parents=True, exist_ok=True)
+    names, configs = [f"App{i:05d}" for i in range(count)], {}
+    for i, name in enumerate(names):
+        kind = rng.random()
+        tipo = TASK_TYPE_COPY_INTERACTIVE if kind < 0.05 else TASK_TYPE_MANUAL_ASSISTED if kind < 0.1 else TASK_TYPE_LOCAL_INSTALL
+        deps = sorted(set(rng.sample(names[:i], min(i, rng.randint(0, 3))))) if i else []
+        configs[name] = {"tipo": tipo, "categoria": f"Categoría {i % 25}", "dependencies": deps, "uninstall_key": f"{name} Suite", "args_instalacion": ["/S"]}
+        if rng.random() < 0.03: continue  # carpeta ausente
+        app_dir = programas / name; app_dir.mkdir(exist_ok=True)
+        for v in range(rng.randint(1, 3)): (app_dir / f"setup_{name.lower()}_{v}.exe").write_bytes(b"MZ")
+    with open(conf / "config_personalizada.json", 'w', encoding='utf-8') as f: json.dump(configs, f)
+    for g in range(max(1, count // 50)):
+        (programas / "Grupos" / f"Grupo{g:03d}.txt").write_text("\n".join(rng.sample(names, min(count, 10))), encoding='utf-8')
+    return programas, conf
+
+def make_system(count, seed=0):
+    """Registro simulado con la mitad de las apps instaladas y otras tantas entradas ajenas."""
+    rng, system = random.Random(seed), SimulatedSystem(time_scale=0)
+    for i in range(count):
+        if rng.random() < 0.5: system.add_uninstall_entry(f"App{i:05d} Suite", f"1.{rng.randint(0, 9)}", install_date="20240101", wow64=i % 3 == 0)
+        system.add_uninstall_entry(f"Otro programa {i:05d}", "2.0")
+    return system
+
+def _measure(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter(); func(); times.append(time.perf_counter() - start)
+    return {"mejor_s": round(min(times), 6), "mediana_s": round(statistics.median(times), 6)}
+
+def _processor(configs, selected, programas, system, workers=1):
+    extra = {a: {"exe_filename": f"setup_{a.lower()}_0.exe"} for a in selected}
+    return TaskProcessor(None, configs, selected, extra, programas, {}, settings=BENCH_SETTINGS, workers=workers, system=system)
+
+def run_cases(count, repeat, work: Path):
+    programas, conf = make_tree(work / f"n{count}", count); system = make_system(count); set_system(system)
+    configs, _ = build_app_configurations(programas, conf)
+    inventory = scan_installed_software(system)
+    repo = GroupRepository(programas / "Grupos", configs)
+    batch = [a for a, c in configs.items() if c["tipo"] == TASK_TYPE_LOCAL_INSTALL and (programas / a).is_dir()][:BATCH_LIMIT]
+    batch = [a for a in batch if all(d in batch for d in configs[a]["dependencies"])]
+    for app in batch: system.add_installer(f"setup_{app.lower()}_0.exe", FakeInstaller())
+
+    def groups_cold():
+        repo._plans.clear()
+        for name in repo.load(): repo.plan(name)
+    def installed_status():
+        for cfg in configs.values():
+            installed = find_installed(inventory, cfg.get("uninstall_key"))
+            if installed: upgrade_status("1.5", installed[1])
+    cases = {
+        "build_app_configurations": lambda: build_app_configurations(programas, conf),
+        "scan_app_files": lambda: scan_app_files(programas, configs),
+        "scan_installed_software": lambda: scan_installed_software(system),
+        "resolve_dependencies": lambda: _processor(configs, list(configs), programas, system)._resolve_dependencies_sequentially(),
+        "group_plans": groups_cold,
+        "installed_status": installed_status,
+        "batch_simulado": lambda: _processor(configs, batch, programas, system).run(),
+        "batch_simulado_4w": lambda: _processor(configs, batch, programas, system, 4).run(),
+    }
+    print(f"{count:>6} apps  (lote simulado: {len(batch)} tareas)"); results = {}
+    for name, func in cases.items():
+        results[f"{name}@{count}"] = r = _measure(func, repeat)
+        print(f"{count:>6} apps  {name:<32}{r['mejor_s'] * 1000:>10.1f} ms (mediana {r['mediana_s'] * 1000:.1f} ms)")
+    return results
+
+def compare(current, baseline, tolerance):
+    """Casos más lentos que la base por encima de 'tolerance' (0.25 = 25 %)."""
+    regressions = []
+    print(f"\n{'caso':<48}{'base':>12}{'actual':>12}{'cambio':>10}")
+    for key in sorted(set(current) & set(baseline)):
+        base, now = baseline[key]["mejor_s"], current[key]["mejor_s"]
+        change = (now - base) / base if base else 0.0
+        flag = " REGRESIÓN" if change > tolerance else ""
+        print(f"{key:<48}{base * 1000:>9.1f} ms{now * 1000:>9.1f} ms{change:>+9.0%}{flag}")
+        if flag: regressions.append(key)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apps", default="100,1000,5000", help="Tamaños a medir, separados por comas")
+    parser.add_argument("--repeat", type=int, default=3); parser.add_argument("--json", help="Guarda los resultados en este archivo")
+    parser.add_argument("--compare", help="Resultados base (JSON) con los que comparar"); parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--dir", help="Carpeta de trabajo (por defecto, temporal)")
+    args = parser.parse_args(argv)
+    logging.disable(logging.WARNING)
+
+    work = Path(args.dir or tempfile.mkdtemp(prefix="ptk_bench_core_")); work.mkdir(parents=True, exist_ok=True)
+    try:
+        results = {}
+        for count in (int(n) for n in args.apps.split(",")): results.update(run_cases(count, args.repeat, work))
+    finally:
+        if not args.dir: shutil.rmtree(work, ignore_errors=True)
+    report = {"fecha": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(), "plataforma": platform.platform(), "repeticiones": args.repeat, "resultados": results}
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f: json.dump(report, f, indent=2, ensure_ascii=False)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f: baseline = json.load(f)["resultados"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions: print(f"\n{len(regressions)} regresión(es) por encima del {args.tolerance:.0%}."); return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,18 @@
 # --- START OF FILE player_toolkit_v6.1.8.py ---
 
+import sys
+
+# Modo por lotes sin interfaz (--group/--apps/--uninstall): se atiende antes de importar Tk.
+if __name__ == "__main__":
+    from toolkit_lib.cli import wants_cli, main as cli_main
+    if wants_cli(sys.argv[1:]): sys.exit(cli_main(sys.argv[1:]))
+
 import tkinter as tk
 from tkinter import ttk, messagebox
 import threading
 import time
 import logging
 from logging.handlers import RotatingFileHandler
-import sys
 import os
 import ctypes
 from pathlib import Path
@@ -19,7 +25,11 @@ from datetime import datetime
 from toolkit_lib.config import *
 from toolkit_lib.ui.main_app import PlayerToolkitApp
 from toolkit_lib.ui.dialogs import NewAppConfigDialog
-from toolkit_lib.utils import is_admin, scan_installed_software, load_cached_scan, save_cached_scan, get_programas_dir_hash
+from toolkit_lib.utils import is_admin, scan_installed_software, scan_app_files, load_cached_scan, save_cached_scan, get_programas_dir_hash
+from toolkit_lib.tracing import STARTUP_TRACER
+from toolkit_lib.metrics import record_span
+from toolkit_lib.installer_detect import InstallerDetector
+from toolkit_lib.profiling import StallWatchdog, SamplingProfiler, STALLS_FILE_NAME, PROFILE_ARG
 
 def get_base_path():
     """
@@ -61,7 +71,8 @@ def build_app_configurations_with_discovery(root):
     """
     from toolkit_lib.config import build_app_configurations as builder, guess_initial_config
 
-    base_configs, new_apps_discovered = builder(PROGRAMAS_DIR, CONF_DIR)
+    with STARTUP_TRACER.span("build_app_configurations", "arranque"):
+        base_configs, new_apps_discovered = builder(PROGRAMAS_DIR, CONF_DIR)
 
     if new_apps_discovered:
         if messagebox.askyesno("Nuevas Aplicaciones Encontradas", f"Se encontraron {len(new_apps_discovered)} carpetas de aplicaciones no configuradas.\n" "¿Deseas configurarlas ahora?"):
@@ -75,14 +86,17 @@ def build_app_configurations_with_discovery(root):
                     except json.JSONDecodeError:
                         pass # Si está corrupto, lo sobreescribimos
 
+            detector = InstallerDetector(CONF_DIR / "instaladores_detectados.json")
             for app_name in new_apps_discovered:
                 app_path = PROGRAMAS_DIR / app_name
-                guessed_config = guess_initial_config(app_path)
+                detection = detector.detect_app(app_path)
+                guessed_config = guess_initial_config(app_path, detection)
 
-                dialog = NewAppConfigDialog(root, f"Configurar: {app_name}", app_name, initial_config=guessed_config)
+                dialog = NewAppConfigDialog(root, f"Configurar: {app_name}", app_name, initial_config=guessed_config, detection=detection)
                 if dialog.result:
                     base_configs[app_name] = dialog.result
                     current_custom_config[app_name] = dialog.result
+            detector.save()
 
             try:
                 with open(custom_config_file, 'w', encoding='utf-8') as f:
@@ -99,64 +113,50 @@ def initial_scan(root, loading_window, progress_bar, status_label, app_configs):
     """Realiza el escaneo inicial de archivos e instalaciones del sistema."""
     status_label.config(text="Escaneando software instalado...")
     root.update_idletasks()
-    installed_software_raw = scan_installed_software()
+    with STARTUP_TRACER.span("scan_installed_software", "arranque"):
+        installed_software_raw = scan_installed_software()
     
-    scan_results = {}
-    app_keys = list(app_configs.keys())
-    total_apps = len(app_keys)
-    if total_apps == 0:
-        save_cached_scan(installed_software_raw, scan_results, get_programas_dir_hash(PROGRAMAS_DIR))
-        root.after(100, lambda: launch_main_application(root, loading_window, scan_results, app_configs, installed_software_raw))
-        return
-
-    for i, app_key in enumerate(app_keys):
-        progress = (i + 1) * 100 / total_apps
-        status = f"Escaneando archivos: {app_key}..."
+    total_apps = len(app_configs)
+    def report(i, total, app_key):
+        if i: time.sleep(0.01)
+        progress, status = (i + 1) * 100 / total, f"Escaneando archivos: {app_key}..."
         root.after(0, lambda p=progress, s=status: (progress_bar.config(value=p), status_label.config(text=s)))
 
-        config = app_configs[app_key]
-        task_type = config.get('tipo')
-        app_dir = PROGRAMAS_DIR / app_key
-
-        if task_type in [TASK_TYPE_LOCAL_INSTALL, TASK_TYPE_MANUAL_ASSISTED]:
-            if not app_dir.is_dir():
-                scan_results[app_key] = [STATUS_FOLDER_NOT_FOUND]
-            else:
-                found = [f.name for ext in INSTALLER_EXTENSIONS for f in app_dir.glob(f"*{ext}")]
-                scan_results[app_key] = found if found else []
-        elif task_type == TASK_TYPE_COPY_INTERACTIVE:
-            if not app_dir.is_dir():
-                scan_results[app_key] = [STATUS_FOLDER_NOT_FOUND]
-            else:
-                found = [f.name for f in app_dir.iterdir() if f.is_file()]
-                scan_results[app_key] = found if found else [STATUS_NO_FILES_FOUND]
-        else:
-            scan_results[app_key] = []
-        time.sleep(0.01)
+    with STARTUP_TRACER.span("escaneo_archivos", "arranque", apps=total_apps):
+        scan_results = scan_app_files(PROGRAMAS_DIR, app_configs, report)
 
-    save_cached_scan(installed_software_raw, scan_results, get_programas_dir_hash(PROGRAMAS_DIR))
+    with STARTUP_TRACER.span("save_cached_scan", "arranque"):
+        save_cached_scan(installed_software_raw, scan_results, get_programas_dir_hash(PROGRAMAS_DIR), "arranque")
     root.after(100, lambda: launch_main_application(root, loading_window, scan_results, app_configs, installed_software_raw))
 
 def launch_main_application(root, loading_window, scan_results, app_configs, installed_software):
     """Inicia la ventana principal de la aplicación."""
     if loading_window:
         loading_window.destroy()
-    PlayerToolkitApp(root, scan_results, app_configs, installed_software)
+    with STARTUP_TRACER.span("PlayerToolkitApp", "arranque"):
+        PlayerToolkitApp(root, scan_results, app_configs, installed_software)
     root.deiconify()
     root.eval('tk::PlaceWindow . center')
+    try:
+        STARTUP_TRACER.export_chrome(LOGS_DIR / "arranque_trace.json")
+        logging.info("Arranque: " + ", ".join(f"{n} {a['total_s']:.2f}s" for n, a in STARTUP_TRACER.summary("arranque").items()))
+    except IOError as e: logging.warning(f"No se pudo guardar la traza de arranque: {e}")
 
 def main():
     """Punto de entrada principal de la aplicación."""
     # En PyInstaller, el logging se configura solo si no es el lanzador
     is_pyinstaller_launcher = "_PYINSTALLER_LAUNCHER_" in os.environ
     if not is_pyinstaller_launcher:
-        setup_logging()
+        with STARTUP_TRACER.span("setup_logging", "arranque"): setup_logging()
         # El log de inicio se moverá a dentro de PlayerToolkitApp para acceso a la versión
     
     PROGRAMAS_DIR.mkdir(exist_ok=True)
     CONF_DIR.mkdir(exist_ok=True)
     LOGS_DIR.mkdir(exist_ok=True)
-
+    settings = load_settings(CONF_DIR)
+    if settings.get("metrics_enabled", True):
+        for event in STARTUP_TRACER.spans(): record_span(event)  # los pasos previos a leer los ajustes
+        STARTUP_TRACER.listeners.append(record_span)
     if not is_admin():
         try:
             ctypes.windll.shell32.ShellExecuteW(None, "runas", sys.executable, " ".join(sys.argv), None, 1)
@@ -164,46 +164,56 @@ def main():
             messagebox.showerror("Error de Privilegios", f"No se pudo re-lanzar la aplicación como administrador.\n\nError: {e}")
         sys.exit(0)
 
+    # El perfilador arranca en el proceso que se queda (tras relanzarse como administrador) y se guarda aunque el arranque falle.
+    profiler = None
+    if PROFILE_ARG in sys.argv or settings.get("sampling_profiler"):
+        profiler = SamplingProfiler(LOGS_DIR / f"perfil_{datetime.now():%Y-%m-%d_%H-%M-%S}.folded").start()
     try:
-        from tkinterdnd2 import TkinterDnD # type: ignore
-        root = TkinterDnD.Tk()
-    except ImportError:
-        logging.error("tkinterdnd2 no encontrado. La función de arrastrar y soltar estará deshabilitada.")
-        root = tk.Tk()
-
-    root.withdraw()
-    sv_ttk.set_theme("dark")
-
-    cached_data = load_cached_scan()
-    current_hash = get_programas_dir_hash(PROGRAMAS_DIR)
+        try:
+            from tkinterdnd2 import TkinterDnD # type: ignore
+            root = TkinterDnD.Tk()
+        except ImportError:
+            logging.error("tkinterdnd2 no encontrado. La función de arrastrar y soltar estará deshabilitada.")
+            root = tk.Tk()
+
+        root.withdraw()
+        sv_ttk.set_theme("dark")
+        # Vigilante de bloqueos del hilo de Tk (0 lo desactiva: no se crea ni el latido ni el hilo).
+        if settings.get("ui_stall_threshold_ms"): StallWatchdog(root, LOGS_DIR / STALLS_FILE_NAME, settings["ui_stall_threshold_ms"] / 1000).start()
+
+        with STARTUP_TRACER.span("cargar_cache", "arranque"):
+            cached_data = load_cached_scan()
+            current_hash = get_programas_dir_hash(PROGRAMAS_DIR)
     
-    final_app_configs = build_app_configurations_with_discovery(root)
-
-    if cached_data and cached_data.get("hash") == current_hash:
-        logging.info("Cargando datos desde caché.")
-        launch_main_application(root, None, cached_data["scan_results"], final_app_configs, cached_data["installed_software"])
-    else:
-        logging.info("Caché no encontrado o inválido. Realizando escaneo completo.")
-        loading_window = tk.Toplevel(root)
-        loading_window.title("Cargando PlayerToolkit...")
-        loading_window.geometry("400x120")
-        loading_window.resizable(False, False)
-        loading_window.transient(root)
-        loading_window.protocol("WM_DELETE_WINDOW", lambda: None) # Evitar cerrar
-        loading_window.grab_set()
-        root.eval(f'tk::PlaceWindow {str(loading_window)} center')
-
-        loading_frame = ttk.Frame(loading_window, padding="15")
-        loading_frame.pack(expand=True, fill=tk.BOTH)
-        status_label = ttk.Label(loading_frame, text="Cargando configuración...", font=("Segoe UI", 10))
-        status_label.pack(pady=(0, 5), fill="x")
-        progress_bar = ttk.Progressbar(loading_window, mode="determinate")
-        progress_bar.pack(pady=5, fill="x", ipady=4)
+        final_app_configs = build_app_configurations_with_discovery(root)
+
+        if cached_data and cached_data.get("hash") == current_hash:
+            logging.info("Cargando datos desde caché.")
+            launch_main_application(root, None, cached_data["scan_results"], final_app_configs, cached_data["installed_software"])
+        else:
+            logging.info("Caché no encontrado o inválido. Realizando escaneo completo.")
+            loading_window = tk.Toplevel(root)
+            loading_window.title("Cargando PlayerToolkit...")
+            loading_window.geometry("400x120")
+            loading_window.resizable(False, False)
+            loading_window.transient(root)
+            loading_window.protocol("WM_DELETE_WINDOW", lambda: None) # Evitar cerrar
+            loading_window.grab_set()
+            root.eval(f'tk::PlaceWindow {str(loading_window)} center')
+
+            loading_frame = ttk.Frame(loading_window, padding="15")
+            loading_frame.pack(expand=True, fill=tk.BOTH)
+            status_label = ttk.Label(loading_frame, text="Cargando configuración...", font=("Segoe UI", 10))
+            status_label.pack(pady=(0, 5), fill="x")
+            progress_bar = ttk.Progressbar(loading_window, mode="determinate")
+            progress_bar.pack(pady=5, fill="x", ipady=4)
         
-        scan_thread = threading.Thread(target=initial_scan, args=(root, loading_window, progress_bar, status_label, final_app_configs), daemon=True)
-        scan_thread.start()
+            scan_thread = threading.Thread(target=initial_scan, args=(root, loading_window, progress_bar, status_label, final_app_configs), daemon=True)
+            scan_thread.start()
 
-    root.mainloop()
+        root.mainloop()
+    finally:
+        if profiler: profiler.stop()
     logging.info("--- PlayerToolkit cerrado ---")
 
 if __name__ == "__main__":
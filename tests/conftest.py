@@ -0,0 +1,77 @@
+import sys
+import logging
+import hashlib
+import threading
+from collections import defaultdict, deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from toolkit_lib.system import SimulatedSystem, set_system
+
+class LocalServer:
+    """
+    Servidor HTTP en localhost para las pruebas de red: sirve 'files' ({ruta: bytes}) con ETag,
+    If-None-Match (304), Range e If-Range. 'queue(ruta, estado, cabeceras)' fuerza respuestas
+    (p. ej. un 503 con Retry-After) antes de servir el archivo; 'log' guarda (ruta, cabeceras).
+    """
+    def __init__(self):
+        self.files, self.forced, self.log = {}, defaultdict(deque), []
+        owner = self
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self): owner._handle(self)
+            def log_message(self, *args): pass
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def url(self, path): return f"http://127.0.0.1:{self.httpd.server_port}/{path.lstrip('/')}"
+
+    def etag(self, path): return '"' + hashlib.sha256(self.files[path]).hexdigest() + '"'
+
+    def queue(self, path, status, headers=None): self.forced[path].append((status, headers or {}))
+
+    def _send(self, req, status, headers=None, body=b""):
+        req.send_response(status)
+        for k, v in (headers or {}).items(): req.send_header(k, v)
+        req.send_header("Content-Length", str(len(body))); req.end_headers(); req.wfile.write(body)
+
+    def _handle(self, req):
+        path = req.path.split("?", 1)[0].lstrip("/"); self.log.append((path, dict(req.headers)))
+        if self.forced[path]: status, headers = self.forced[path].popleft(); self._send(req, status, headers); return
+        if path not in self.files: self._send(req, 404); return
+        data, etag = self.files[path], self.etag(path)
+        if req.headers.get("If-None-Match") == etag: self._send(req, 304, {"ETag": etag}); return
+        spec, if_range = req.headers.get("Range"), req.headers.get("If-Range")
+        if spec and (if_range is None or if_range == etag):
+            start, _, end = spec.removeprefix("bytes=").partition("-")
+            if not start: start, end = max(0, len(data) - int(end)), len(data) - 1
+            else: start, end = int(start), int(end) if end else len(data) - 1
+            end = min(end, len(data) - 1)
+            if start >= len(data): self._send(req, 416, {"Content-Range": f"bytes */{len(data)}"}); return
+            self._send(req, 206, {"ETag": etag, "Content-Range": f"bytes {start}-{end}/{len(data)}", "Accept-Ranges": "bytes"}, data[start:end + 1]); return
+        self._send(req, 200, {"ETag": etag, "Accept-Ranges": "bytes"}, data)
+
+    def close(self): self.httpd.shutdown(); self.httpd.server_close()
+
+@pytest.fixture
+def http_server():
+    server = LocalServer()
+    yield server
+    server.close()
+
+@pytest.fixture
+def system():
+    """Sistema simulado sin esperas reales, instalado como sistema del proceso durante la prueba."""
+    sim = SimulatedSystem(time_scale=0)
+    previous = set_system(sim)
+    yield sim
+    set_system(previous)
+
+@pytest.fixture(autouse=True)
+def _quiet_logging():
+    logging.disable(logging.WARNING)
+    yield
+    logging.disable(logging.NOTSET)
@@ -0,0 +1,52 @@
+import json
+import logging
+
+import pytest
+
+from toolkit_lib import cli, utils
+from toolkit_lib.config import SETTINGS_FILE_NAME
+from toolkit_lib.inventory_history import InventoryHistory
+from toolkit_lib.system import FakeInstaller
+
+@pytest.fixture
+def base(tmp_path, system, monkeypatch):
+    """Instalación de PlayerToolkit en tmp_path con el sistema simulado y una app por instalador."""
+    (tmp_path / "conf").mkdir()
+    (tmp_path / "conf" / SETTINGS_FILE_NAME).write_text(json.dumps({"staging_enabled": False, "metrics_enabled": False, "reconcile_enabled": False, "retry_policy": {"espera_inicial_s": 0}}))
+    installers = {"Ok": FakeInstaller(installs={"name": "Ok", "version": "1.0"}), "Rota": FakeInstaller(exit_code=1603), "Reinicio": FakeInstaller(exit_code=3010)}
+    for app, installer in installers.items():
+        (tmp_path / "Programas" / app).mkdir(parents=True); (tmp_path / "Programas" / app / f"{app.lower()}.exe").write_bytes(b"MZ")
+        system.add_installer(f"{app.lower()}.exe", installer)
+    monkeypatch.setattr(cli, "get_base_path", lambda: tmp_path)
+    monkeypatch.setattr(utils, "_inventory_history", InventoryHistory(tmp_path / "inventarios.jsonl"))
+    handlers = list(logging.getLogger().handlers)
+    yield tmp_path
+    for handler in logging.getLogger().handlers[len(handlers):]: logging.getLogger().removeHandler(handler); handler.close()
+
+@pytest.mark.parametrize("apps, code", [("Ok", cli.EXIT_OK), ("Ok,Rota", cli.EXIT_FAILED), ("Ok,Reinicio", cli.EXIT_REBOOT), ("Rota,Reinicio", cli.EXIT_FAILED)])
+def test_exit_codes(base, apps, code):
+    assert cli.main(["--apps", apps, "--quiet", "--json-report", str(base / "informe.json")]) == code
+    report = json.loads((base / "informe.json").read_text(encoding="utf-8"))
+    assert set(report["tareas"]) == set(apps.split(",")) and report["reinicio_pendiente"] == ("Reinicio" in apps)
+
+def test_dependency_cycle_fails_the_batch(base):
+    (base / "conf" / "config_personalizada.json").write_text(json.dumps({"Ok": {"dependencies": ["Rota"]}, "Rota": {"dependencies": ["Ok"]}}))
+    assert cli.main(["--apps", "Ok", "--quiet", "--json-report", str(base / "informe.json")]) == cli.EXIT_FAILED
+    report = json.loads((base / "informe.json").read_text(encoding="utf-8"))
+    assert report["correcto"] is False and report["tareas"] == {} and "circular" in report["error_planificacion"]
+
+def test_report_lists_inventory_changes(base):
+    assert cli.main(["--apps", "Ok", "--quiet", "--json-report", str(base / "informe.json")]) == cli.EXIT_OK
+    assert "Ok" in json.loads((base / "informe.json").read_text(encoding="utf-8"))["cambios_inventario"]["añadidos"]
+
+@pytest.mark.parametrize("argv", [["--apps", "NoExiste"], ["--group", "NoExiste"], ["--uninstall", "No instalado"], ["--apps", "Ok", "--workers", "0"]])
+def test_usage_errors(base, argv):
+    assert cli.main(argv + ["--quiet"]) == cli.EXIT_USAGE
+
+def test_usage_error_when_installer_is_missing(base):
+    (base / "Programas" / "Vacia").mkdir()
+    assert cli.main(["--apps", "Vacia", "--quiet"]) == cli.EXIT_USAGE
+
+def test_not_admin(base, system):
+    system.admin = False
+    assert cli.main(["--apps", "Ok", "--quiet"]) == cli.EXIT_NOT_ADMIN
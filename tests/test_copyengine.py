@@ -0,0 +1,18 @@
+import os
+
+from toolkit_lib.copyengine import copy_file, copy_tree, POLL_THRESHOLD
+
+def test_copy_file_reports_full_progress_and_keeps_metadata(tmp_path):
+    src = tmp_path / "grande.bin"; src.write_bytes(os.urandom(POLL_THRESHOLD + 12345)); os.utime(src, (1_600_000_000, 1_600_000_000))
+    seen = []
+    dest = copy_file(src, tmp_path / "destino", lambda done, total, speed: seen.append((done, total)))
+    assert dest.read_bytes() == src.read_bytes() and dest.stat().st_mtime == src.stat().st_mtime
+    assert seen[-1] == (src.stat().st_size, src.stat().st_size) and all(a <= b for (a, _), (b, _) in zip(seen, seen[1:]))
+
+def test_copy_tree_copies_every_file(tmp_path):
+    src = tmp_path / "origen"
+    for i in range(30): (src / f"d{i % 3}").mkdir(parents=True, exist_ok=True); (src / f"d{i % 3}" / f"f{i}.bin").write_bytes(os.urandom(1000 + i))
+    seen = []
+    assert copy_tree(src, tmp_path / "copia", lambda done, total, speed: seen.append((done, total))) == 30
+    assert all((tmp_path / "copia" / f.relative_to(src)).read_bytes() == f.read_bytes() for f in src.rglob("*.bin"))
+    assert seen[-1][0] == seen[-1][1] == sum(f.stat().st_size for f in src.rglob("*.bin"))
@@ -0,0 +1,72 @@
+import os
+import hashlib
+
+import pytest
+
+from toolkit_lib.distribution import InstallerServer, fetch_from_peer
+from toolkit_lib.fingerprints import FingerprintCache
+
+def etag_of(data): return f'"{hashlib.sha256(data).hexdigest()}"'
+
+@pytest.fixture
+def peer(tmp_path):
+    programas = tmp_path / "Programas"; (programas / "VLC").mkdir(parents=True)
+    server = InstallerServer(programas, host="127.0.0.1", port=0, fingerprints=FingerprintCache())
+    server.start()
+    yield programas, server.url
+    server.stop()
+
+def test_full_download(peer, tmp_path):
+    programas, url = peer
+    data = os.urandom(3 << 20); (programas / "VLC" / "vlc.exe").write_bytes(data)
+    dest, seen = tmp_path / "vlc.exe", []
+    assert fetch_from_peer(url, "VLC/vlc.exe", dest, seen.append)
+    assert dest.read_bytes() == data and seen[-1] == 100
+    assert not (tmp_path / "vlc.exe.part").exists() and not (tmp_path / "vlc.exe.part.etag").exists()
+
+def test_resume_sends_range_and_if_range(http_server, tmp_path):
+    data = os.urandom(1 << 20); http_server.files["VLC/vlc.exe"] = data
+    dest = tmp_path / "vlc.exe"
+    (tmp_path / "vlc.exe.part").write_bytes(data[:300_000]); (tmp_path / "vlc.exe.part.etag").write_text(etag_of(data))
+    assert fetch_from_peer(http_server.url(""), "VLC/vlc.exe", dest)
+    assert dest.read_bytes() == data
+    _, headers = http_server.log[-1]
+    assert headers["Range"] == "bytes=300000-" and headers["If-Range"] == etag_of(data)
+
+def test_resume_against_lan_server(peer, tmp_path):
+    programas, url = peer
+    data = os.urandom(1 << 20); (programas / "VLC" / "vlc.exe").write_bytes(data)
+    (tmp_path / "vlc.exe.part").write_bytes(data[:12345]); (tmp_path / "vlc.exe.part.etag").write_text(etag_of(data))
+    assert fetch_from_peer(url, "VLC/vlc.exe", tmp_path / "vlc.exe")
+    assert (tmp_path / "vlc.exe").read_bytes() == data
+
+def test_stale_partial_is_discarded(peer, tmp_path):
+    programas, url = peer
+    old, new = os.urandom(500_000), os.urandom(800_000); (programas / "VLC" / "vlc.exe").write_bytes(new)
+    (tmp_path / "vlc.exe.part").write_bytes(old[:200_000]); (tmp_path / "vlc.exe.part.etag").write_text(etag_of(old))
+    assert fetch_from_peer(url, "VLC/vlc.exe", tmp_path / "vlc.exe")
+    assert (tmp_path / "vlc.exe").read_bytes() == new
+
+def test_partial_without_etag_is_not_resumed(http_server, tmp_path):
+    data = os.urandom(100_000); http_server.files["a.exe"] = data
+    (tmp_path / "a.exe.part").write_bytes(b"basura de otra version")
+    assert fetch_from_peer(http_server.url(""), "a.exe", tmp_path / "a.exe")
+    assert (tmp_path / "a.exe").read_bytes() == data and "Range" not in http_server.log[-1][1]
+
+def test_corrupt_result_fails_hash_check(http_server, tmp_path):
+    data = os.urandom(100_000); http_server.files["a.exe"] = data
+    (tmp_path / "a.exe.part").write_bytes(b"\0" * 50_000); (tmp_path / "a.exe.part.etag").write_text(etag_of(data))
+    assert not fetch_from_peer(http_server.url(""), "a.exe", tmp_path / "a.exe")
+    assert not (tmp_path / "a.exe").exists() and not (tmp_path / "a.exe.part").exists()
+
+def test_busy_peer_is_retried_after_retry_after(http_server, tmp_path):
+    data = os.urandom(10_000); http_server.files["a.exe"] = data
+    http_server.queue("a.exe", 503, {"Retry-After": "0"}); http_server.queue("a.exe", 503, {"Retry-After": "0"})
+    assert fetch_from_peer(http_server.url(""), "a.exe", tmp_path / "a.exe")
+    assert (tmp_path / "a.exe").read_bytes() == data and len(http_server.log) == 3
+
+def test_busy_peer_gives_up_after_retries(http_server, tmp_path):
+    import requests
+    http_server.files["a.exe"] = b"x"
+    for _ in range(3): http_server.queue("a.exe", 503, {"Retry-After": "0"})
+    with pytest.raises(requests.HTTPError): fetch_from_peer(http_server.url(""), "a.exe", tmp_path / "a.exe", retries=2)
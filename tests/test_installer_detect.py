@@ -0,0 +1,21 @@
+import os
+import json
+
+from toolkit_lib import installer_detect
+from toolkit_lib.installer_detect import InstallerDetector, KEY_WINDOW
+
+def test_cache_hits_renamed_copy_and_misses_changed_content(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(installer_detect, "detect_framework", lambda p: calls.append(p.name) or "nsis")
+    data = b"MZ" + os.urandom(3 * KEY_WINDOW)
+    (tmp_path / "setup.exe").write_bytes(data); (tmp_path / "copia.exe").write_bytes(data)
+    detector = InstallerDetector(tmp_path / "det.json")
+    assert detector.detect(tmp_path / "setup.exe")["args"] == ["/S"]
+    assert detector.detect(tmp_path / "copia.exe")["framework"] == "nsis" and calls == ["setup.exe"]
+    (tmp_path / "copia.exe").write_bytes(data[:-1] + b"\0"); detector.detect(tmp_path / "copia.exe")
+    assert calls == ["setup.exe", "copia.exe"]
+    detector.save(); assert InstallerDetector(tmp_path / "det.json").detect(tmp_path / "setup.exe") and len(calls) == 2
+
+def test_old_full_hash_keys_are_dropped(tmp_path):
+    (tmp_path / "det.json").write_text(json.dumps({"a" * 64: "inno"}))
+    assert InstallerDetector(tmp_path / "det.json")._entries == {}
@@ -0,0 +1,108 @@
+import struct
+
+import pytest
+
+from toolkit_lib import installer_meta
+from toolkit_lib.installer_meta import InstallerMetadataCache, upgrade_status, read_metadata, _msi_stream_name, STATUS_MISSING, STATUS_UPGRADEABLE, STATUS_UP_TO_DATE, CFB_SIGNATURE, VS_FIXEDFILEINFO_SIGNATURE
+
+def test_cached_only_never_parses_and_warm_reads_once(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(installer_meta, "read_metadata", lambda p: calls.append(p.name) or {"version": "2.0." + p.stem[-1], "product": None})
+    for i in range(3): (tmp_path / f"setup{i}.exe").write_bytes(b"MZ")
+    cache = InstallerMetadataCache(tmp_path / "meta.json"); paths = sorted(tmp_path.glob("*.exe"))
+    assert cache.version(paths[0], cached_only=True) is None and calls == []
+    assert cache.newest(tmp_path, [p.name for p in paths], cached_only=True) and calls == []
+    assert cache.warm(paths) == 3 and cache.warm(paths) == 0 and len(calls) == 3
+    assert cache.newest(tmp_path, [p.name for p in paths], cached_only=True) == "setup2.exe"
+    assert InstallerMetadataCache(tmp_path / "meta.json").version(paths[1], cached_only=True) == "2.0.1"
+    paths[1].write_bytes(b"MZ cambiado"); assert cache.warm(paths) == 1
+
+def test_upgrade_status():
+    assert upgrade_status("2.0", None) == STATUS_MISSING
+    assert upgrade_status("2.0", "1.9.9") == STATUS_UPGRADEABLE
+    assert upgrade_status(None, "1.0") == upgrade_status("1.0", "1.0") == STATUS_UP_TO_DATE
+
+# --- Lectores reales: PE construido a mano y MSI (archivo compuesto OLE) mínimo ---
+
+def version_words(text):
+    a, b, c, d = (int(p) for p in text.split("."))
+    return (a << 16) | b, (c << 16) | d
+
+def build_pe(file_version, product_version, pe32_plus=False):
+    """Ejecutable PE con una sección .rsrc que solo contiene RT_VERSION/1/0x409 -> VS_VERSIONINFO."""
+    rva, raw = 0x1000, 0x200
+    fixed = struct.pack("<13I", VS_FIXEDFILEINFO_SIGNATURE, 0x10000, *version_words(file_version), *version_words(product_version), 0x3F, 0, 0x40004, 1, 0, 0, 0)
+    key = "VS_VERSION_INFO\0".encode("utf-16-le")
+    info = struct.pack("<HHH", 0, len(fixed), 0) + key; info += b"\0" * (-len(info) % 4) + fixed
+    info = struct.pack("<H", len(info)) + info[2:]
+    directory = lambda entry_id, target: struct.pack("<IIHHHH", 0, 0, 0, 0, 0, 1) + struct.pack("<II", entry_id, target)
+    rsrc = directory(16, 0x80000000 | 0x18) + directory(1, 0x80000000 | 0x30) + directory(0x409, 0x48)
+    rsrc += struct.pack("<IIII", rva + 0x58, len(info), 0, 0) + info
+    rsrc += b"\0" * (-len(rsrc) % 0x200)
+    dirs_offset, magic = (112, 0x20B) if pe32_plus else (96, 0x10B)
+    optional = bytearray(dirs_offset + 16 * 8); struct.pack_into("<H", optional, 0, magic); struct.pack_into("<II", optional, dirs_offset + 2 * 8, rva, len(rsrc))
+    coff = struct.pack("<HHIIIHH", 0x8664 if pe32_plus else 0x14C, 1, 0, 0, 0, len(optional), 0x0102)
+    section = b".rsrc\0\0\0" + struct.pack("<IIIIIIHHI", len(rsrc), rva, len(rsrc), raw, 0, 0, 0, 0, 0x40000040)
+    dos = bytearray(64); dos[:2] = b"MZ"; struct.pack_into("<I", dos, 0x3C, 64)
+    head = bytes(dos) + b"PE\0\0" + coff + bytes(optional) + section
+    return head + b"\0" * (raw - len(head)) + rsrc
+
+def build_cfb(streams):
+    """Archivo compuesto OLE v3 (sectores de 512 bytes): los streams < 4096 bytes van al mini stream."""
+    sectors, fat = [], []
+    def alloc(data):
+        data += b"\0" * (-len(data) % 512); start = len(sectors) + 1  # el sector 0 es la FAT
+        for i in range(0, len(data), 512): sectors.append(data[i:i + 512]); fat.append(start + i // 512 + 1)
+        fat[-1] = 0xFFFFFFFE
+        return start
+    mini, minifat, entries = bytearray(), [], []
+    for name, data in streams.items():
+        if len(data) >= 4096: entries.append((name, alloc(data), len(data))); continue
+        start = len(mini) // 64; count = max(1, -(-len(data) // 64))
+        mini += data + b"\0" * (count * 64 - len(data)); minifat += [start + i + 1 for i in range(count)]; minifat[-1] = 0xFFFFFFFE
+        entries.append((name, start, len(data)))
+    mini_start = alloc(bytes(mini))
+    minifat_start = alloc(struct.pack(f"<{len(minifat)}I", *minifat))
+    def entry(name, kind, start, size):
+        encoded = (name + "\0").encode("utf-16-le")
+        e = bytearray(128); e[:len(encoded)] = encoded
+        struct.pack_into("<HBB", e, 64, len(encoded), kind, 1); struct.pack_into("<III", e, 68, 0xFFFFFFFF, 0xFFFFFFFF, 0xFFFFFFFF)
+        struct.pack_into("<IQ", e, 116, start, size); return bytes(e)
+    directory = entry("Root Entry", 5, mini_start, len(mini)) + b"".join(entry(n, 2, s, size) for n, s, size in entries)
+    dir_start = alloc(directory)
+    fat_sector = [0xFFFFFFFD] + fat; fat_sector += [0xFFFFFFFF] * (128 - len(fat_sector))
+    header = bytearray(512); header[:8] = CFB_SIGNATURE
+    struct.pack_into("<HHHHH", header, 0x18, 0x3E, 3, 0xFFFE, 9, 6)
+    struct.pack_into("<II4xIIIII", header, 0x2C, 1, dir_start, 4096, minifat_start, 1, 0xFFFFFFFE, 0)
+    struct.pack_into("<109I", header, 0x4C, 0, *([0xFFFFFFFF] * 108))
+    return bytes(header) + struct.pack("<128I", *fat_sector) + b"".join(sectors)
+
+def build_msi(properties, codepage=1252):
+    strings = [s for pair in properties.items() for s in pair]
+    pool = struct.pack("<I", codepage) + b"".join(struct.pack("<HH", len(s.encode(f"cp{codepage}")), 1) for s in strings)
+    data = b"".join(s.encode(f"cp{codepage}") for s in strings)
+    keys, values = range(1, len(strings) + 1, 2), range(2, len(strings) + 1, 2)
+    table = struct.pack(f"<{len(strings)}H", *keys, *values)
+    return build_cfb({_msi_stream_name("_StringPool"): pool, _msi_stream_name("_StringData"): data, _msi_stream_name("Property"): table})
+
+@pytest.mark.parametrize("pe32_plus", [False, True])
+def test_pe_version_resource_is_read(tmp_path, pe32_plus):
+    exe = tmp_path / "setup.exe"; exe.write_bytes(build_pe("1.2.3.4", "3.0.21.0", pe32_plus))
+    assert read_metadata(exe) == {"version": "3.0.21.0", "product": None}
+    exe.write_bytes(build_pe("1.2.3.4", "0.0.0.0", pe32_plus))
+    assert read_metadata(exe)["version"] == "1.2.3.4"
+
+def test_pe_without_version_or_not_pe(tmp_path):
+    (tmp_path / "texto.exe").write_bytes(b"hola" * 100)
+    assert read_metadata(tmp_path / "texto.exe") is None
+
+def test_msi_property_table_is_read(tmp_path):
+    msi = tmp_path / "producto.msi"
+    # ARPCOMMENTS supera el corte de 4096 bytes: _StringData va por la FAT y el resto por el mini stream.
+    msi.write_bytes(build_msi({"ProductName": "Reproductor Ñandú", "Manufacturer": "Ejemplo", "ProductVersion": "3.0.21", "ARPCOMMENTS": "x" * 5000}))
+    assert read_metadata(msi) == {"version": "3.0.21", "product": "Reproductor Ñandú"}
+    assert InstallerMetadataCache().version(msi) == "3.0.21"
+
+def test_not_a_compound_file(tmp_path):
+    (tmp_path / "roto.msi").write_bytes(b"\0" * 1024)
+    assert read_metadata(tmp_path / "roto.msi") is None
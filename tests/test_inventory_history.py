@@ -0,0 +1,53 @@
+import multiprocessing
+
+import pytest
+
+from toolkit_lib import inventory_history
+from toolkit_lib.inventory_history import InventoryHistory, CHECKPOINT_EVERY
+
+def inventory(i): return {f"App {j}": {"version": f"{i}.{j}"} for j in range(i % 7 + 1)}
+
+def test_writers_with_stale_view_append_on_the_real_tail(tmp_path):
+    gui, cli = InventoryHistory(tmp_path / "h.jsonl"), InventoryHistory(tmp_path / "h.jsonl")
+    gui.record({"VLC": {"version": "1"}}, "arranque")
+    delta = cli.record({"VLC": {"version": "1"}, "7-Zip": {"version": "23"}}, "lote CLI")
+    assert list(delta["añadidos"]) == ["7-Zip"] and not delta["cambiados"]
+    assert gui.record({"VLC": {"version": "2"}}, "reescaneo")["eliminados"] == ["7-Zip"]
+    fresh = InventoryHistory(tmp_path / "h.jsonl")
+    assert [e["n"] for e in fresh.entries] == [1, 2, 3] and fresh.latest() == {"VLC": {"version": "2"}}
+    assert cli.state(2) == {"VLC": {"version": "1"}, "7-Zip": {"version": "23"}} and cli.latest() == fresh.latest()
+
+def _writer(path, proc, count):
+    history = InventoryHistory(path)
+    for k in range(count): history.record({f"proceso {proc}": {"version": str(k)}}, f"p{proc}")
+
+def test_concurrent_processes_keep_numbers_and_deltas_consistent(tmp_path):
+    path, count = tmp_path / "h.jsonl", 40
+    procs = [multiprocessing.get_context("spawn").Process(target=_writer, args=(path, p, count)) for p in range(2)]
+    for p in procs: p.start()
+    for p in procs: p.join(60); assert p.exitcode == 0
+    history = InventoryHistory(path)
+    assert [e["n"] for e in history.entries] == list(range(1, 2 * count + 1))
+    for e in history.entries:
+        state = history.state(e["n"])
+        assert list(state) == [f"proceso {e['etiqueta'][1]}"], (e["n"], state)
+
+def test_load_replays_only_from_the_last_checkpoint(tmp_path, monkeypatch):
+    history = InventoryHistory(tmp_path / "h.jsonl")
+    for i in range(2 * CHECKPOINT_EVERY + 10): history.record(inventory(i))
+    applied, apply_delta = [], inventory_history.apply_delta
+    monkeypatch.setattr(inventory_history, "apply_delta", lambda inv, delta: applied.append(1) or apply_delta(inv, delta))
+    reloaded = InventoryHistory(tmp_path / "h.jsonl")
+    assert reloaded.latest() == history.latest() and len(applied) < CHECKPOINT_EVERY
+
+def test_retention_compacts_and_keeps_numbers(tmp_path):
+    history, other = InventoryHistory(tmp_path / "h.jsonl", max_records=20), InventoryHistory(tmp_path / "h.jsonl", max_records=20)
+    total = 20 + CHECKPOINT_EVERY + 5
+    for i in range(total): history.record(inventory(i))
+    assert len(history.entries) < 20 + CHECKPOINT_EVERY and history.entries[-1]["n"] == total and history.entries[0]["completo"]
+    first = history.entries[0]["n"]
+    with pytest.raises(KeyError): history.state(first - 1)
+    assert history.state(first) == inventory(first - 1) and history.state(total - 3) == inventory(total - 4)
+    other.record(inventory(total))
+    assert other.entries[-1]["n"] == total + 1 and other.state(first + 1) == inventory(first)
+    assert InventoryHistory(tmp_path / "h.jsonl").latest() == inventory(total)
@@ -0,0 +1,40 @@
+import io
+
+import pytest
+
+from toolkit_lib.config import TASK_TYPE_LOCAL_INSTALL
+from toolkit_lib.journal import BatchJournal, RUN_ONCE_KEY, RUN_ONCE_VALUE, STATE_DEFERRED, STATE_DONE
+from toolkit_lib.reporting import ConsoleReporter
+from toolkit_lib.system import FakeInstaller
+from toolkit_lib.tasks import TaskProcessor
+
+SETTINGS = {"staging_enabled": False, "metrics_enabled": False, "reconcile_enabled": False, "defer_after_reboot": True}
+CONFIGS = {"Runtime": {"tipo": TASK_TYPE_LOCAL_INSTALL, "exe_filename": "runtime.exe"},
+           "App": {"tipo": TASK_TYPE_LOCAL_INSTALL, "exe_filename": "app.exe", "dependencies": ["Runtime"]}}
+
+@pytest.fixture
+def programas(tmp_path, system):
+    for app, cfg in CONFIGS.items(): (tmp_path / "Programas" / app).mkdir(parents=True); (tmp_path / "Programas" / app / cfg["exe_filename"]).write_bytes(b"MZ")
+    system.add_installer("runtime.exe", FakeInstaller(exit_code=3010, reboot=True)); system.add_installer("app.exe", FakeInstaller())
+    return tmp_path / "Programas"
+
+def run(programas, system, selected, journal, restart=True):
+    return TaskProcessor(ConsoleReporter(io.StringIO(), allow_restart=restart), CONFIGS, selected, {}, programas, {}, settings=SETTINGS, journal=journal, system=system).run()
+
+@pytest.mark.parametrize("restart", [True, False])
+def test_deferred_tasks_are_journaled_and_resume_is_registered(tmp_path, programas, system, restart):
+    results = run(programas, system, ["Runtime", "App"], BatchJournal(tmp_path / "lote.json"), restart)
+    assert results["App"].startswith("⏸️")
+    journal = BatchJournal.load(tmp_path / "lote.json")
+    assert journal.unfinished() == ["App"] and journal.state("App") == STATE_DEFERRED and journal.state("Runtime") == STATE_DONE
+    assert system.registry_values(RUN_ONCE_KEY)[RUN_ONCE_VALUE].endswith("--resume")
+    assert any("shutdown" in cmd for cmd in system.launches) == restart
+
+def test_resume_runs_deferred_tasks_without_repeating_dependencies(tmp_path, programas, system):
+    run(programas, system, ["Runtime", "App"], BatchJournal(tmp_path / "lote.json"))
+    runtime = system._resolve(["runtime.exe"])
+    system.delete_key(r"SYSTEM\CurrentControlSet\Control\Session Manager")
+    journal = BatchJournal.load(tmp_path / "lote.json")
+    results = run(programas, system, journal.unfinished(), journal)
+    assert results["App"].startswith("✅") and "Runtime" not in results and runtime.runs == 1
+    assert not (tmp_path / "lote.json").exists()
@@ -0,0 +1,13 @@
+from toolkit_lib import metrics
+from toolkit_lib.tracing import Tracer
+
+def test_startup_spans_are_not_reported_as_scans():
+    metrics.SCAN_DURATION.values.clear(); metrics.STARTUP_DURATION.values.clear()
+    tracer = Tracer(); tracer.listeners.append(metrics.record_span)
+    for name in ("setup_logging", "cargar_cache", "PlayerToolkitApp", "scan_installed_software", "escaneo_archivos"):
+        with tracer.span(name, "arranque"): pass
+    with tracer.span("scan_drivers", "escaneo"): pass
+    scans = {dict(k)["escaneo"] for k in metrics.SCAN_DURATION.values}
+    steps = {dict(k)["paso"] for k in metrics.STARTUP_DURATION.values}
+    assert scans == {"scan_installed_software", "escaneo_archivos", "scan_drivers"}
+    assert steps == {"setup_logging", "cargar_cache", "PlayerToolkitApp"}
@@ -0,0 +1,15 @@
+from toolkit_lib.config import TASK_TYPE_LOCAL_INSTALL
+from toolkit_lib.replay import ReplayProcessor, SESSION_VERSION
+
+def session(phases):
+    plan = {"App": {"tipo": TASK_TYPE_LOCAL_INSTALL, "deps": [], "msi": False, "uninstall_key": None, "registry_key": None, "bytes": 0,
+                    "fases": phases, "dur_s": sum(p["dur_s"] for p in phases if p["fase"] != "tarea"), "ok": True, "estado": "completada"}}
+    return {"version": SESSION_VERSION, "workers": 1, "orden": ["App"], "plan": plan, "duracion_s": plan["App"]["dur_s"]}
+
+def test_scripts_are_replayed_as_timed_phases():
+    recorded = [{"fase": "pre_script", "dur_s": 2.0}, {"fase": "tarea", "dur_s": 1.0}, {"fase": "ejecucion", "dur_s": 1.0, "codigo": 0, "intento": 1}, {"fase": "post_script", "dur_s": 3.0}]
+    processor = ReplayProcessor(session(recorded), time_scale=0.01)
+    assert processor.run()["App"].startswith("✅")
+    phases = {p["name"]: p["dur"] / 1e6 / 0.01 for p in processor.tracer.spans("fase")}
+    assert phases["pre_script"] >= 2.0 and phases["post_script"] >= 3.0
+    assert processor.makespan() >= 6.0
@@ -0,0 +1,47 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from toolkit_lib import staging
+from toolkit_lib.config import TASK_TYPE_CLEAN_TEMP
+from toolkit_lib.staging import InstallerStager, copy_with_read_ahead, same_device
+from toolkit_lib.tasks import TaskProcessor
+
+def test_clean_temp_keeps_staging_root(tmp_path, monkeypatch, system):
+    temp = tmp_path / "Temp"; staging = temp / "PlayerToolkit" / "staging"
+    (staging / "lote_1" / "VLC").mkdir(parents=True); (staging / "lote_1" / "VLC" / "vlc.exe").write_bytes(b"MZ")
+    (temp / "basura.tmp").write_bytes(b"x"); (temp / "otra").mkdir(); (temp / "otra" / "a.log").write_bytes(b"x")
+    monkeypatch.setenv("TEMP", str(temp)); monkeypatch.setenv("TMP", str(temp))
+    configs = {"Limpiar": {"tipo": TASK_TYPE_CLEAN_TEMP}}
+    settings = {"staging_dir": str(staging), "metrics_enabled": False, "reconcile_enabled": False}
+    results = TaskProcessor(None, configs, ["Limpiar"], {}, tmp_path / "Programas", {}, settings=settings, system=system).run()
+    assert results["Limpiar"].startswith("✅")
+    assert (staging / "lote_1" / "VLC" / "vlc.exe").exists()
+    assert not (temp / "basura.tmp").exists() and not (temp / "otra").exists()
+
+def test_same_device_walks_up_to_existing_folder(tmp_path):
+    assert same_device(tmp_path, tmp_path / "aun" / "no" / "existe")
+
+def test_stager_copies_the_whole_app_folder_except_partial_downloads(tmp_path):
+    app_dir = tmp_path / "Programas" / "VLC"; app_dir.mkdir(parents=True)
+    (app_dir / "setup.exe").write_bytes(b"MZ" * 1000); (app_dir / "producto.msi").write_bytes(b"x"); (app_dir / "vcredist.exe").write_bytes(b"MZ")
+    (app_dir / "datos").mkdir(); (app_dir / "datos" / "a.cab").write_bytes(b"cab"); (app_dir / "datos" / "b.cab.part").write_bytes(b"c")
+    (app_dir / "nuevo.exe.part").write_bytes(b"M"); (app_dir / "nuevo.exe.part.etag").write_text('"x"')
+    stager = InstallerStager(tmp_path / "staging"); stager.add("VLC", app_dir, "setup.exe"); stager.start()
+    local = stager.get("VLC")
+    assert local.read_bytes() == b"MZ" * 1000
+    assert sorted(str(p.relative_to(local.parent)).replace("\\", "/") for p in local.parent.rglob("*") if p.is_file()) == ["datos/a.cab", "producto.msi", "setup.exe", "vcredist.exe"]
+    stager.cleanup(); assert not local.exists()
+
+@pytest.mark.parametrize("target", ["directorio", "disco_lleno"])
+def test_failed_write_releases_the_reader(tmp_path, monkeypatch, target):
+    monkeypatch.setattr(staging, "BUFFER_SIZE", 1024)
+    src = tmp_path / "grande.exe"; src.write_bytes(b"x" * 200 * 1024)
+    if target == "directorio": dest = tmp_path / "destino"; dest.mkdir()  # abrir un directorio para escribir falla
+    else:
+        dest = Path("/dev/full")  # cada escritura falla con ENOSPC
+        if not dest.exists(): pytest.skip("sin /dev/full")
+    before = set(threading.enumerate())
+    with pytest.raises(OSError): copy_with_read_ahead(src, dest)
+    assert set(threading.enumerate()) <= before  # el lector terminó y cerró el origen
@@ -0,0 +1,150 @@
+import threading
+
+import pytest
+
+from toolkit_lib import tasks
+from toolkit_lib.config import TASK_TYPE_LOCAL_INSTALL, TASK_TYPE_UNINSTALL
+from toolkit_lib.reboot import RegistryRebootBackend, RebootTracker
+from toolkit_lib.retry import RetryPolicy, OUTCOME_SUCCESS, OUTCOME_REBOOT, OUTCOME_RETRY, OUTCOME_FATAL
+from toolkit_lib.scheduling import priority_order
+from toolkit_lib.system import FakeInstaller
+from toolkit_lib.tracing import Tracer
+
+SETTINGS = {"staging_enabled": False, "metrics_enabled": False, "reconcile_enabled": False, "retry_policy": {"espera_inicial_s": 0}}
+
+def installs(tmp_path, system, apps):
+    """Configuración de instalación local de cada app ({nombre: FakeInstaller}) con su instalador en Programas."""
+    configs = {}
+    for name, installer in apps.items():
+        exe = f"{name.lower()}.exe"; (tmp_path / "Programas" / name).mkdir(parents=True); (tmp_path / "Programas" / name / exe).write_bytes(b"MZ")
+        system.add_installer(exe, installer); configs[name] = {"tipo": TASK_TYPE_LOCAL_INSTALL, "exe_filename": exe}
+    return configs
+
+def run(tmp_path, system, configs, selected=None, settings=SETTINGS, **kwargs):
+    processor = tasks.TaskProcessor(None, configs, selected or list(configs), {}, tmp_path / "Programas", {}, settings=settings, system=system, **kwargs)
+    return processor, processor.run()
+
+# --- Reintentos (códigos de salida y espera exponencial) ---
+
+def test_retry_policy_classification_and_backoff():
+    policy = RetryPolicy()
+    assert [policy.classify(c) for c in (0, 3010, 1641, 1618, 32, 1603)] == [OUTCOME_SUCCESS, OUTCOME_REBOOT, OUTCOME_REBOOT, OUTCOME_RETRY, OUTCOME_RETRY, OUTCOME_FATAL]
+    assert [RetryPolicy(base_delay=10, max_delay=60).delay(a) for a in range(1, 6)] == [10, 20, 40, 60, 60]
+    custom = RetryPolicy.from_config({"retry_policy": {"exit_codes": {"1603": "reintentar"}, "max_reintentos": 4}}, {"exit_codes": {"1": "exito"}, "max_reintentos": 1})
+    assert custom.classify(1603) == OUTCOME_RETRY and custom.classify(1) == OUTCOME_SUCCESS and custom.max_attempts == 2
+    with pytest.raises(ValueError): RetryPolicy({5: "quizas"})
+
+def test_retryable_code_is_retried_until_success(tmp_path, system):
+    installer = FakeInstaller(exit_code=[1618, 1618, 0])
+    processor, results = run(tmp_path, system, installs(tmp_path, system, {"App": installer}))
+    assert results["App"].startswith("✅") and installer.runs == 3 and processor._retries["App"] == [1618, 1618]
+
+def test_retries_stop_at_max_attempts_and_fatal_codes_are_not_retried(tmp_path, system):
+    busy, broken = FakeInstaller(exit_code=1618), FakeInstaller(exit_code=1603)
+    configs = installs(tmp_path, system, {"Ocupada": busy, "Rota": broken}); configs["Ocupada"]["max_reintentos"] = 1
+    _, results = run(tmp_path, system, configs)
+    assert results["Ocupada"].startswith("❌") and busy.runs == 2
+    assert results["Rota"].startswith("❌") and broken.runs == 1
+
+def test_backoff_waits_grow_exponentially(tmp_path, system, monkeypatch):
+    waits, sleep = [], tasks.time.sleep
+    monkeypatch.setattr(tasks.time, "sleep", lambda s: waits.append(s) if s >= 1 else sleep(s))
+    settings = {**SETTINGS, "retry_policy": {"espera_inicial_s": 1, "espera_maxima_s": 3, "max_reintentos": 3}}
+    run(tmp_path, system, installs(tmp_path, system, {"App": FakeInstaller(exit_code=[32, 32, 32, 0])}), settings=settings)
+    assert waits == [1, 2, 3]
+
+# --- Orden por dependencias y carril MSI ---
+
+def test_priority_order_respects_dependencies_and_critical_path():
+    graph = {"Runtime": set(), "App": {"Runtime"}, "Corta": set(), "Larga": set()}
+    order = priority_order(graph, {"Runtime": 5, "App": 20, "Corta": 1, "Larga": 10})
+    assert order.index("Runtime") < order.index("App") and order[0] == "Runtime" and order[-1] == "Corta"
+    assert priority_order({"A": {"B"}, "B": {"A"}}, {}) is None
+
+def test_unselected_dependencies_are_added_only_when_missing_and_installable(tmp_path, system):
+    configs = installs(tmp_path, system, {"Plataforma": FakeInstaller(), "Extra": FakeInstaller()})
+    del configs["Extra"]["exe_filename"]
+    configs["Java"] = {"tipo": TASK_TYPE_LOCAL_INSTALL, "uninstall_key": "Java 8"}
+    configs["Falta"] = {"tipo": TASK_TYPE_LOCAL_INSTALL, "uninstall_key": "Falta"}
+    configs["Plataforma"]["dependencies"] = ["Java", "Extra", "Falta"]
+    _, results = run(tmp_path, system, configs, ["Plataforma"], inventory={"Java 8 Update 401": {"version": "8.0.4010"}})
+    assert sorted(results) == ["Extra", "Plataforma"] and all(r.startswith("✅") for r in results.values())
+    assert [cmd[0].rsplit("/", 1)[-1] for cmd in system.launches] == ["extra.exe", "plataforma.exe"]
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_dependencies_run_before_dependents(tmp_path, system, workers):
+    configs = installs(tmp_path, system, {name: FakeInstaller() for name in ("Base", "Medio", "Final", "Suelta")})
+    configs["Medio"]["dependencies"], configs["Final"]["dependencies"] = ["Base"], ["Medio"]
+    _, results = run(tmp_path, system, configs, workers=workers)
+    launched = [cmd[0].rsplit("/", 1)[-1].rsplit("\\", 1)[-1] for cmd in system.launches]
+    assert all(r.startswith("✅") for r in results.values())
+    assert launched.index("base.exe") < launched.index("medio.exe") < launched.index("final.exe")
+
+def test_msi_tasks_share_a_single_lane(tmp_path, system, monkeypatch):
+    system.time_scale = 1
+    apps = {f"Msi{i}": FakeInstaller(duration=0.05) for i in range(3)} | {f"Exe{i}": FakeInstaller(duration=0.05) for i in range(2)}
+    configs = installs(tmp_path, system, apps)
+    for i in range(3):
+        (tmp_path / "Programas" / f"Msi{i}" / f"msi{i}.msi").write_bytes(b"x"); configs[f"Msi{i}"]["exe_filename"] = f"msi{i}.msi"
+        system.add_installer(f"msi{i}.msi", apps[f"Msi{i}"])
+    lock, running, peak = threading.Lock(), {"msi": 0, "todas": 0}, {"msi": 0, "todas": 0}
+    def tracked(cmd, wait=True, timeout=None):
+        kinds = ["todas"] + (["msi"] if cmd[0] == "msiexec" else [])
+        with lock:
+            for k in kinds: running[k] += 1; peak[k] = max(peak[k], running[k])
+        try: return real(cmd, wait, timeout)
+        finally:
+            with lock:
+                for k in kinds: running[k] -= 1
+    real = system.run; monkeypatch.setattr(system, "run", tracked)
+    tracer = Tracer()
+    _, results = run(tmp_path, system, configs, workers=4, tracer=tracer)
+    assert all(r.startswith("✅") for r in results.values())
+    assert peak["msi"] == 1 and peak["todas"] > 1
+    assert not [s for s in tracer.spans("fase") if s["name"] == "espera_msi"]
+
+# --- Desinstalación con verificación dirigida ---
+
+def uninstall_configs(system, names, uninstaller=None):
+    configs = {}
+    for name in names:
+        key = system.add_uninstall_entry(name, "1.0", uninstaller=uninstaller)
+        values = system.registry_values(key)
+        configs[name] = {"tipo": TASK_TYPE_UNINSTALL, "uninstall_string": values["UninstallString"], "registry_key": key}
+    return configs
+
+def test_uninstall_verifies_only_its_own_key(tmp_path, system, monkeypatch):
+    configs = uninstall_configs(system, ["VLC", "7-Zip", "Notepad++"])
+    listed = []; subkeys = system.registry_subkeys
+    monkeypatch.setattr(system, "registry_subkeys", lambda path: listed.append(path) or subkeys(path))
+    _, results = run(tmp_path, system, configs, workers=3)
+    assert all(r.startswith("✅") for r in results.values()) and listed == []
+    assert not any(key.endswith(name) for key in system._keys for name in ("vlc", "7-zip", "notepad++"))
+
+def test_uninstall_fails_when_entry_remains(tmp_path, system, monkeypatch):
+    monkeypatch.setattr(tasks, "UNINSTALL_VERIFY_TIMEOUT", 0)
+    configs = uninstall_configs(system, ["Terca"], uninstaller=FakeInstaller())
+    _, results = run(tmp_path, system, configs)
+    assert results["Terca"].startswith("❌") and "sigue en el registro" in results["Terca"]
+
+# --- Marcadores de reinicio pendiente en el registro ---
+
+def test_registry_reboot_backend_markers(system):
+    backend = RegistryRebootBackend(system)
+    assert backend.markers() == set()
+    system.registry_set(RegistryRebootBackend.KEYS[0][0], "x", 1)
+    system.registry_set(r"SYSTEM\CurrentControlSet\Control\Session Manager", "PendingFileRenameOperations", ["\\??\\C:\\a.tmp", "", "\\??\\C:\\b.tmp", ""])
+    assert backend.markers() == {"Servicio de componentes (CBS)", "Archivos pendientes de renombrar (2)"}
+
+def test_reboot_tracker_attributes_new_markers(system):
+    tracker = RebootTracker(RegistryRebootBackend(system))
+    system.registry_set(RegistryRebootBackend.KEYS[1][0], "x", 1); tracker.start()
+    assert not tracker.check("Previa")
+    system.registry_set(RegistryRebootBackend.KEYS[0][0], "x", 1)
+    assert tracker.check("Nueva") and not tracker.check("Otra")
+    assert tracker.apps == {"Nueva": ["Servicio de componentes (CBS)"]} and tracker.required
+
+def test_installer_leaving_pending_renames_requires_reboot(tmp_path, system):
+    processor, results = run(tmp_path, system, installs(tmp_path, system, {"Driver": FakeInstaller(reboot=True), "Normal": FakeInstaller()}))
+    assert results["Driver"].startswith("🔄") and results["Normal"].startswith("✅")
+    assert list(processor.reboot.apps) == ["Driver"] and processor.reboot.apps["Driver"][0].startswith("Archivos pendientes de renombrar")
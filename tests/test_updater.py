@@ -0,0 +1,68 @@
+import io
+import json
+import zipfile
+
+import pytest
+
+from toolkit_lib.updater import ReleaseClient, DeltaUpdater, UpdateError, STAGING_MARKER, build_manifest, safe_member_path
+
+def make_zip(files):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in files.items(): zf.writestr(name, data)
+    return buf.getvalue()
+
+def manifest_for(tmp_path, data):
+    archive = tmp_path / "release.zip"; archive.write_bytes(data)
+    return build_manifest(archive, "6.2.0")
+
+@pytest.fixture
+def release(tmp_path):
+    files = {"toolkit_lib/tasks.py": b"nuevo" * 1000, "toolkit_lib/utils.py": b"igual" * 1000, "assets/logo.png": b"\x89PNG" + bytes(5000)}
+    install = tmp_path / "instalado"
+    for name, data in files.items(): (install / name).parent.mkdir(parents=True, exist_ok=True); (install / name).write_bytes(data)
+    (install / "toolkit_lib/tasks.py").write_bytes(b"viejo")
+    return files, install
+
+def test_release_check_uses_etag_and_304(http_server, tmp_path):
+    http_server.files["releases/latest"] = json.dumps({"tag_name": "v6.2.0"}).encode()
+    client = ReleaseClient(tmp_path / "cache.json")
+    assert client.latest_release(http_server.url("releases/latest"))["tag_name"] == "v6.2.0"
+    assert client.latest_release(http_server.url("releases/latest"))["tag_name"] == "v6.2.0"
+    (_, first), (_, second) = http_server.log
+    assert "If-None-Match" not in first and second["If-None-Match"] == http_server.etag("releases/latest")
+
+def test_delta_update_downloads_only_changed_members(http_server, tmp_path, release):
+    files, install = release
+    data = make_zip(files); http_server.files["release.zip"] = data
+    staging = tmp_path / "update_staging"
+    staged = DeltaUpdater(install, staging).prepare(http_server.url("release.zip"), manifest_for(tmp_path, data))
+    assert staged == ["toolkit_lib/tasks.py"]
+    assert (staging / "toolkit_lib/tasks.py").read_bytes() == files["toolkit_lib/tasks.py"]
+    assert not (staging / "toolkit_lib/utils.py").exists() and (staging / STAGING_MARKER).exists()
+    assert all("Range" in headers for _, headers in http_server.log)
+
+def test_hash_mismatch_discards_staging(http_server, tmp_path, release):
+    files, install = release
+    data = make_zip(files); http_server.files["release.zip"] = data
+    manifest = manifest_for(tmp_path, data); manifest["files"]["toolkit_lib/tasks.py"]["sha256"] = "0" * 64
+    staging = tmp_path / "update_staging"
+    with pytest.raises(UpdateError): DeltaUpdater(install, staging).prepare(http_server.url("release.zip"), manifest)
+    assert not staging.exists()
+
+@pytest.mark.parametrize("name", ["../../fuera.bat", "/etc/fuera.bat", "C:/Windows/fuera.bat", "C:fuera.bat", "a/../../fuera.bat", "..\\fuera.bat"])
+def test_traversal_entry_is_rejected_in_full_download(http_server, tmp_path, release, name):
+    files, install = release
+    http_server.files["release.zip"] = make_zip({**files, name: b"@echo pwned"})
+    staging = tmp_path / "zona" / "update_staging"
+    with pytest.raises(UpdateError, match="no permitida"): DeltaUpdater(install, staging).prepare(http_server.url("release.zip"))
+    assert not staging.exists() and not list((tmp_path / "zona").glob("*.bat")) and not (tmp_path / "fuera.bat").exists()
+
+def test_traversal_in_manifest_is_rejected(http_server, tmp_path, release):
+    files, install = release
+    data = make_zip(files); http_server.files["release.zip"] = data
+    manifest = manifest_for(tmp_path, data); manifest["files"]["../fuera.bat"] = {"sha256": "0" * 64, "size": 1}
+    with pytest.raises(UpdateError, match="no permitida"): DeltaUpdater(install, tmp_path / "update_staging").prepare(http_server.url("release.zip"), manifest)
+
+def test_safe_member_path_keeps_nested_names(tmp_path):
+    assert safe_member_path(tmp_path, "toolkit_lib/ui/main_app.py") == (tmp_path / "toolkit_lib/ui/main_app.py").resolve()
@@ -0,0 +1,157 @@
+# --- START OF FILE toolkit_lib/cli.py ---
+"""
+Modo por lotes sin interfaz gráfica (no importa Tk), para scripts y tareas programadas:
+
+    PlayerToolkit.exe --group Basico
+    PlayerToolkit.exe --apps Java,VLC --json-report informe.json
+    PlayerToolkit.exe --uninstall "VLC media player" "7-Zip 23.01" --reboot
+
+Códigos de salida: 0 correcto, 1 alguna tarea falló, 2 uso incorrecto,
+5 sin privilegios de administrador, 3010 correcto con reinicio pendiente.
+"""
+
+import sys
+import json
+import socket
+import logging
+import argparse
+from datetime import datetime
+from pathlib import Path
+from logging.handlers import RotatingFileHandler
+
+from .config import build_app_configurations, load_settings, INSTALLER_EXTENSIONS, TASK_TYPE_LOCAL_INSTALL, TASK_TYPE_MANUAL_ASSISTED, TASK_TYPE_UNINSTALL
+from .tasks import TaskProcessor
+from .reporting import ConsoleReporter, result_state, OK_STATES
+from .groups import GroupRepository, dependency_closure
+from .variables import load_custom_variables
+from .fingerprints import FingerprintCache
+from .history import DurationHistory, HISTORY_FILE_NAME
+from .reconcile import ReconciliationStore, STATE_FILE_NAME
+from .installer_meta import InstallerMetadataCache
+from .replay import new_recorder
+from .journal import BatchJournal, JOURNAL_FILE_NAME
+from .inventory_history import diff_inventories
+from .utils import is_admin, scan_installed_software, get_inventory_history
+
+EXIT_OK, EXIT_FAILED, EXIT_USAGE, EXIT_NOT_ADMIN, EXIT_REBOOT = 0, 1, 2, 5, 3010
+CLI_OPTIONS = ("--group", "--apps", "--uninstall", "-h", "--help")
+
+def wants_cli(argv):
+    """True si la línea de comandos pide el modo por lotes (se decide antes de cargar la interfaz)."""
+    return any(a.split("=", 1)[0] in CLI_OPTIONS for a in argv)
+
+def get_base_path():
+    if getattr(sys, 'frozen', False): return Path(sys.executable).parent
+    return Path(__file__).resolve().parent.parent
+
+def _build_parser():
+    parser = argparse.ArgumentParser(prog="PlayerToolkit", description="Ejecuta un lote de PlayerToolkit sin interfaz gráfica.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--group", metavar="GRUPO", help="Grupo de 'Programas/Grupos' (se añaden sus dependencias).")
+    target.add_argument("--apps", metavar="APP[,APP...]", action="append", help="Aplicaciones separadas por comas (admite repetir la opción).")
+    target.add_argument("--uninstall", metavar="NOMBRE", nargs="+", help="Programas a desinstalar, por su nombre en 'Programas y características'.")
+    parser.add_argument("--json-report", metavar="RUTA", help="Escribe un informe JSON del lote ('-' para la salida estándar).")
+    parser.add_argument("--workers", type=int, metavar="N", help="Tareas en paralelo (por defecto, el valor de los ajustes).")
+    parser.add_argument("--reboot", action="store_true", help="Reinicia el equipo al terminar si alguna tarea lo requiere.")
+    parser.add_argument("--quiet", action="store_true", help="No muestra el log por consola.")
+    parser.add_argument("--record", action="store_true", help="Graba la sesión en 'logs/sesiones' para reproducirla después (python -m toolkit_lib.replay).")
+    return parser
+
+def _setup_logging(logs_dir: Path, quiet):
+    logs_dir.mkdir(exist_ok=True)
+    root_logger = logging.getLogger(); root_logger.setLevel(logging.INFO)
+    file_handler = RotatingFileHandler(logs_dir / "PlayerToolkit.log", maxBytes=5*1024*1024, backupCount=2, encoding='utf-8')
+    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - [CLI] %(message)s')); root_logger.addHandler(file_handler)
+    if not quiet and sys.stderr is not None:
+        console = logging.StreamHandler(sys.stderr); console.setFormatter(logging.Formatter('%(levelname)s: %(message)s')); root_logger.addHandler(console)
+
+def _select_apps(args, app_configs, programas_dir):
+    """Lista de apps del lote (con dependencias) o mensaje de error."""
+    if args.group:
+        repo = GroupRepository(programas_dir / "Grupos", app_configs)
+        if args.group not in repo.load(): return None, f"El grupo '{args.group}' no existe."
+        return repo.closure(args.group), None
+    apps = [a.strip() for value in args.apps for a in value.split(",") if a.strip()]
+    unknown = [a for a in apps if a not in app_configs]
+    if unknown: return None, f"Aplicaciones desconocidas: {', '.join(unknown)}"
+    return dependency_closure(apps, app_configs), None
+
+def _resolve_installers(selected, app_configs, programas_dir, conf_dir):
+    """Elige el instalador de cada app igual que la pestaña de aplicaciones (el más reciente si hay varios)."""
+    meta, extra_opts, errors = InstallerMetadataCache(conf_dir / "installer_meta.json"), {}, []
+    for key in selected:
+        cfg = app_configs[key]
+        if cfg.get("tipo") not in (TASK_TYPE_LOCAL_INSTALL, TASK_TYPE_MANUAL_ASSISTED): continue
+        app_dir = programas_dir / key
+        found = sorted(f.name for ext in INSTALLER_EXTENSIONS for f in app_dir.glob(f"*{ext}")) if app_dir.is_dir() else []
+        if len(found) == 1: extra_opts[key] = {'exe_filename': found[0]}
+        elif found: extra_opts[key] = {'exe_filename': meta.newest(app_dir, found)}
+        elif cfg.get("url"): extra_opts[key] = {'exe_filename': Path(cfg["url"]).name}
+        else: errors.append(f"No se encontró instalador para '{key}'.")
+    meta.save()
+    return extra_opts, errors
+
+def build_report(processor, started, finished, inventory_changes=None):
+    durations = {e["name"]: round(e["dur"] / 1e6, 3) for e in processor.tracer.spans("tarea")}
+    tasks = {app: {"estado": result_state(text), "mensaje": text, "duracion_s": durations.get(app)} for app, text in sorted(processor.results.items())}
+    return {
+        "equipo": socket.gethostname(), "inicio": started.isoformat(timespec="seconds"), "fin": finished.isoformat(timespec="seconds"),
+        "duracion_s": round((finished - started).total_seconds(), 3), "tareas": tasks,
+        "reinicio_pendiente": processor.reboot.required, "reinicio_motivos": {app: list(dict.fromkeys(r)) for app, r in processor.reboot.apps.items()},
+        # Un lote que no llegó a planificarse (o no ejecutó nada) no es correcto aunque ninguna tarea fallara.
+        "error_planificacion": processor.planning_error,
+        "correcto": processor.planning_error is None and bool(tasks) and all(t["estado"] in OK_STATES for t in tasks.values()),
+        "cambios_inventario": inventory_changes,
+    }
+
+def _write_report(report, destination):
+    data = json.dumps(report, indent=2, ensure_ascii=False)
+    if destination == "-":
+        if sys.stdout is not None: print(data)
+        return
+    path = Path(destination); path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f: f.write(data)
+
+def main(argv=None):
+    args = _build_parser().parse_args(argv)
+    base = get_base_path(); programas_dir, conf_dir = base / "Programas", base / "conf"
+    _setup_logging(base / "logs", args.quiet)
+    reporter = ConsoleReporter(allow_restart=args.reboot)
+    if not is_admin(): reporter.error("Error de Privilegios", "El modo por lotes debe ejecutarse como administrador."); return EXIT_NOT_ADMIN
+    if args.workers is not None and args.workers < 1: reporter.error("Uso", "--workers debe ser al menos 1."); return EXIT_USAGE
+
+    settings = load_settings(conf_dir)
+    inventory = scan_installed_software(); get_inventory_history().record(inventory, "antes de lote CLI")
+    if args.uninstall:
+        missing = [n for n in args.uninstall if n not in inventory]
+        if missing: reporter.error("Uso", f"No instalados: {', '.join(missing)}"); return EXIT_USAGE
+        configs = {n: {"tipo": TASK_TYPE_UNINSTALL, "uninstall_string": inventory[n]["uninstall_string"], "registry_key": inventory[n].get("registry_key")} for n in args.uninstall}
+        selected, extra_opts, workers = list(args.uninstall), {}, args.workers or settings.get("uninstall_workers", 4)
+    else:
+        configs, _ = build_app_configurations(programas_dir, conf_dir)
+        selected, error = _select_apps(args, configs, programas_dir)
+        if error: reporter.error("Uso", error); return EXIT_USAGE
+        extra_opts, errors = _resolve_installers(selected, configs, programas_dir, conf_dir)
+        if errors: reporter.error("Instaladores", "\n".join(errors)); return EXIT_USAGE
+        workers = args.workers
+
+    logging.info(f"--- Lote por línea de comandos: {', '.join(selected)} ---")
+    fingerprints, reconciliation = FingerprintCache(conf_dir / "fingerprints.json"), ReconciliationStore(conf_dir / STATE_FILE_NAME)
+    processor = TaskProcessor(reporter, configs, selected, extra_opts, programas_dir, load_custom_variables(conf_dir), settings=settings, fingerprints=fingerprints,
+                              history=DurationHistory(conf_dir / HISTORY_FILE_NAME), inventory=inventory, reconciliation=reconciliation, workers=workers, journal=BatchJournal(conf_dir / JOURNAL_FILE_NAME),
+                              recorder=new_recorder(base / "logs") if args.record or settings.get("record_sessions") else None)
+    started = datetime.now(); processor.run(); finished = datetime.now()
+    fingerprints.save()
+    # Inventario tras el lote: al historial y, como diferencia con el de antes, al informe.
+    after = scan_installed_software(); get_inventory_history().record(after, "lote CLI")
+    if not args.uninstall: reconciliation.update_installed(configs, after)
+
+    report = build_report(processor, started, finished, diff_inventories(inventory, after))
+    if args.json_report:
+        try: _write_report(report, args.json_report)
+        except OSError as e: reporter.error("Informe", f"No se pudo escribir el informe JSON: {e}")
+    if not report["correcto"]: return EXIT_FAILED
+    return EXIT_REBOOT if report["reinicio_pendiente"] else EXIT_OK
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,6 @@
 
 import json
 import logging
-from tkinter import messagebox
 from pathlib import Path
 
 # Tipos de Tareas
@@ -35,6 +34,17 @@ DEFAULT_APP_CONFIG = {
     "task_name": None, "task_command": None, "task_trigger": "ONLOGON", "task_user": "SYSTEM"
 }
 
+# Ajustes globales de la herramienta (conf/ajustes.json)
+SETTINGS_FILE_NAME = "ajustes.json"
+DEFAULT_SETTINGS = {
+    "lan_peer_url": None, "lan_server_port": 8765, "lan_server_max_connections": 4,
+    "staging_enabled": True, "staging_dir": None, "staging_workers": 2,
+    "metrics_enabled": True, "metrics_port": None,
+    "max_parallel_tasks": 1, "reconcile_enabled": True, "defer_after_reboot": False, "resume_run_once": True, "uninstall_workers": 4,
+    "record_sessions": False, "ui_stall_threshold_ms": 500, "sampling_profiler": False,
+    "retry_policy": {"max_reintentos": 2, "espera_inicial_s": 10, "espera_maxima_s": 120, "exit_codes": {}},
+}
+
 APP_CONFIGURATIONS = {
     "AnyDesk": {"args_instalacion": ["/S"], "icon": "🖥️", "tipo": TASK_TYPE_MANUAL_ASSISTED, "uninstall_key": "AnyDesk", "categoria": "Acceso Remoto", "url": "https://download.anydesk.com/AnyDesk.exe"},
     "PlataformaUniversal": {"args_instalacion": ["/VERYSILENT", "/SUPPRESSMSGBOXES"], "icon": "🎬", "uninstall_key": "Plataforma Universal", "categoria": "Multimedia", "dependencies": ["Java"], "post_task_script": "copy_lsplayer_shortcut"},
@@ -61,8 +71,9 @@ APP_CONFIGURATIONS = {
     "ViPlex": {"icon": "🖥️", "categoria": "Control de Hardware"},
 }
 
-def guess_initial_config(app_path: Path) -> dict:
+def guess_initial_config(app_path: Path, detection=None) -> dict:
     config = DEFAULT_APP_CONFIG.copy(); config['uninstall_key'] = app_path.name
+    if detection: config.update({'tipo': TASK_TYPE_LOCAL_INSTALL, 'args_instalacion': list(detection['args'])}); return config
     try:
         if not app_path.is_dir(): return config
         files = list(app_path.iterdir())
@@ -87,7 +98,7 @@ def build_app_configurations(programas_dir: Path, conf_dir: Path):
         ignored_dirs = ["grupos", "__pycache__", "drivers"]
         discovered_apps_names = {d.name for d in programas_dir.iterdir() if d.is_dir() and d.name.lower() not in ignored_dirs}
     except FileNotFoundError:
-        messagebox.showerror("Error Crítico", f"El directorio '{programas_dir}' no fue encontrado."); return {}, []
+        logging.error(f"El directorio '{programas_dir}' no fue encontrado."); return {}, []
 
     all_app_names = sorted(list(discovered_apps_names.union(APP_CONFIGURATIONS.keys())))
     
@@ -107,4 +118,18 @@ def build_app_configurations(programas_dir: Path, conf_dir: Path):
         except (IOError, json.JSONDecodeError) as e:
             logging.error(f"No se pudo cargar la configuración personalizada: {e}")
             
-    return final_config, newly_discovered_apps
\ No newline at end of file
+    return final_config, newly_discovered_apps
+
+def load_settings(conf_dir: Path) -> dict:
+    settings = DEFAULT_SETTINGS.copy()
+    settings_file = conf_dir / SETTINGS_FILE_NAME
+    if settings_file.exists():
+        try:
+            with open(settings_file, 'r', encoding='utf-8') as f: settings.update(json.load(f))
+        except (IOError, json.JSONDecodeError) as e:
+            logging.error(f"No se pudieron cargar los ajustes: {e}")
+    return settings
+
+def save_settings(conf_dir: Path, settings: dict):
+    conf_dir.mkdir(parents=True, exist_ok=True)
+    with open(conf_dir / SETTINGS_FILE_NAME, 'w', encoding='utf-8') as f: json.dump(settings, f, indent=4, ensure_ascii=False)
@@ -0,0 +1,92 @@
+# --- START OF FILE toolkit_lib/copyengine.py ---
+
+import os
+import time
+import shutil
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Por debajo de este tamaño no compensa seguir el progreso con un hilo.
+POLL_THRESHOLD = 8 * 1024 * 1024
+PROGRESS_INTERVAL = 0.2
+
+class CopyProgress:
+    """Acumula bytes copiados (de uno o varios hilos) y notifica progreso y velocidad como mucho cada PROGRESS_INTERVAL segundos."""
+    def __init__(self, total_bytes, callback=None):
+        self.total, self.callback, self.done = total_bytes, callback, 0
+        self.started, self._last, self._lock = time.perf_counter(), 0.0, threading.Lock()
+
+    @property
+    def throughput(self):
+        elapsed = time.perf_counter() - self.started
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def add(self, n, force=False):
+        with self._lock:
+            self.done += n; now = time.perf_counter()
+            if not self.callback or (not force and now - self._last < PROGRESS_INTERVAL): return
+            self._last = now; done, total = self.done, self.total
+        self.callback(done, total, self.throughput)
+
+def _copy_one(src, dest, size, progress):
+    """
+    Copia con shutil.copy2, que ya usa la vía rápida de cada sistema (CopyFile2 en Windows,
+    sendfile/copy_file_range en Linux). Para los archivos grandes un hilo sigue el tamaño del
+    destino y lo va sumando al progreso.
+    """
+    if size < POLL_THRESHOLD: shutil.copy2(src, dest); progress.add(size); return
+    stop, reported = threading.Event(), [0]
+    def poll():
+        while not stop.wait(PROGRESS_INTERVAL):
+            try: current = min(os.stat(dest).st_size, size)
+            except OSError: continue
+            if current > reported[0]: progress.add(current - reported[0]); reported[0] = current
+    watcher = threading.Thread(target=poll, name="progreso_copia", daemon=True); watcher.start()
+    try: shutil.copy2(src, dest)
+    finally: stop.set(); watcher.join()
+    progress.add(size - reported[0])
+
+def copy_file(src: Path, dest: Path, progress_callback=None, progress: CopyProgress = None):
+    """
+    Copia un archivo conservando metadatos (shutil.copy2) informando del progreso:
+    'progress_callback(copiados, total, bytes_por_segundo)'.
+    Si 'dest' es una carpeta, el archivo se copia dentro con el mismo nombre.
+    """
+    src, dest = Path(src), Path(dest)
+    if dest.is_dir(): dest = dest / src.name
+    size = src.stat().st_size
+    own_progress = progress is None
+    if own_progress: progress = CopyProgress(size, progress_callback)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    _copy_one(src, dest, size, progress)
+    if own_progress: progress.add(0, force=True)
+    return dest
+
+def _scan_tree(root):
+    files, stack = [], [root]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False): stack.append(entry.path)
+                elif entry.is_file(): files.append((entry.path, entry.stat().st_size))
+    return files
+
+def copy_tree(src_dir: Path, dest_dir: Path, progress_callback=None, workers=4):
+    """Copia una carpeta completa repartiendo los archivos entre varios hilos. Devuelve el número de archivos copiados."""
+    src_dir, dest_dir = Path(src_dir), Path(dest_dir)
+    prefix = len(str(src_dir)) + 1
+    files = [(src, os.path.join(dest_dir, src[prefix:]), size) for src, size in _scan_tree(str(src_dir))]
+    for d in {os.path.dirname(dst) for _, dst, _ in files} | {str(dest_dir)}: os.makedirs(d, exist_ok=True)
+    progress = CopyProgress(sum(size for _, _, size in files), progress_callback)
+    # Los archivos grandes primero para que no queden solos al final.
+    files.sort(key=lambda f: f[2], reverse=True)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="copy") as pool:
+        for future in [pool.submit(_copy_one, src, dst, size, progress) for src, dst, size in files]: future.result()
+    shutil.copystat(src_dir, dest_dir); progress.add(0, force=True)
+    return len(files)
+
+def copy_path(src: Path, dest: Path, progress_callback=None, workers=4):
+    """Copia un archivo o una carpeta según lo que sea 'src'."""
+    if Path(src).is_dir(): return copy_tree(src, dest, progress_callback, workers)
+    copy_file(src, dest, progress_callback); return 1
@@ -0,0 +1,158 @@
+# --- START OF FILE toolkit_lib/distribution.py ---
+
+import os
+import time
+import hashlib
+import logging
+import threading
+import urllib.parse
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import requests # type: ignore
+
+from .fingerprints import FingerprintCache
+
+CHUNK_SIZE = 1 << 20
+
+class _InstallerRequestHandler(BaseHTTPRequestHandler):
+    server_version = "PlayerToolkitLAN/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args): logging.debug(f"[LAN] {self.address_string()} {fmt % args}")
+
+    def _resolve(self):
+        rel = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path).lstrip("/")
+        root = self.server.root_dir
+        target = (root / rel).resolve()
+        if root != target and root not in target.parents: return None
+        return target if target.is_file() else None
+
+    def _send_empty(self, code, headers=None):
+        self.send_response(code)
+        for k, v in (headers or {}).items(): self.send_header(k, v)
+        self.send_header("Content-Length", "0"); self.end_headers()
+
+    def do_HEAD(self): self._serve(head_only=True)
+    def do_GET(self): self._serve(head_only=False)
+
+    def _serve(self, head_only):
+        if not self.server.slots.acquire(blocking=False):
+            self._send_empty(503, {"Retry-After": "5"}); return
+        try:
+            path = self._resolve()
+            if path is None: self._send_empty(404); return
+            size = path.stat().st_size
+            etag = f'"{self.server.fingerprints.digest(path)}"'
+            if self.headers.get("If-None-Match") == etag: self._send_empty(304, {"ETag": etag}); return
+            start, end, code = 0, size - 1, 200
+            range_header = self.headers.get("Range")
+            if range_header and (not self.headers.get("If-Range") or self.headers.get("If-Range") == etag):
+                parsed = _parse_range(range_header, size)
+                if parsed is None: self._send_empty(416, {"Content-Range": f"bytes */{size}"}); return
+                start, end = parsed; code = 206
+            length = max(0, end - start + 1)
+            self.send_response(code)
+            self.send_header("Content-Type", "application/octet-stream"); self.send_header("Accept-Ranges", "bytes")
+            self.send_header("ETag", etag); self.send_header("Content-Length", str(length))
+            if code == 206: self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            self.end_headers()
+            if head_only or not length: return
+            with open(path, 'rb') as f:
+                self.wfile.flush()
+                try: self.connection.sendfile(f, start, length) # Ruta rápida sin copias en espacio de usuario
+                except (AttributeError, OSError):
+                    f.seek(start); remaining = length
+                    while remaining > 0:
+                        chunk = f.read(min(CHUNK_SIZE, remaining))
+                        if not chunk: break
+                        self.wfile.write(chunk); remaining -= len(chunk)
+        except (ConnectionError, BrokenPipeError): pass
+        finally:
+            self.server.slots.release(); self.server.fingerprints.save()
+
+def _parse_range(header, size):
+    if not header.startswith("bytes=") or "," in header: return None
+    first, _, last = header[6:].strip().partition("-")
+    try:
+        if first == "":
+            if not last: return None
+            start, end = max(0, size - int(last)), size - 1
+        else:
+            start = int(first); end = min(int(last), size - 1) if last else size - 1
+    except ValueError: return None
+    if start >= size or start > end: return None
+    return start, end
+
+class InstallerServer:
+    """Servidor HTTP opcional que comparte la carpeta 'Programas' con otros equipos de la red local."""
+    def __init__(self, programas_dir: Path, host="0.0.0.0", port=8765, max_connections=4, fingerprints: FingerprintCache = None):
+        self.programas_dir, self.host, self.port, self.max_connections = Path(programas_dir).resolve(), host, port, max_connections
+        self.fingerprints = fingerprints or FingerprintCache()
+        self.httpd, self.thread = None, None
+
+    @property
+    def running(self): return self.httpd is not None
+
+    @property
+    def url(self): return f"http://{self.host}:{self.port}" if self.running else None
+
+    def start(self):
+        if self.running: return
+        self.httpd = ThreadingHTTPServer((self.host, self.port), _InstallerRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.root_dir, self.httpd.fingerprints = self.programas_dir, self.fingerprints
+        self.httpd.slots = threading.BoundedSemaphore(self.max_connections)
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True); self.thread.start()
+        logging.info(f"Servidor LAN de instaladores escuchando en {self.host}:{self.port} ({self.max_connections} conexiones máx.)")
+
+    def stop(self):
+        if not self.running: return
+        self.httpd.shutdown(); self.httpd.server_close(); self.httpd, self.thread = None, None
+        logging.info("Servidor LAN de instaladores detenido.")
+
+def _etag_digest(etag):
+    """SHA-256 que anuncia el ETag del servidor LAN (None si el ETag no es una huella)."""
+    value = (etag or "").removeprefix("W/").strip('"').lower()
+    return value if len(value) == 64 and all(c in "0123456789abcdef" for c in value) else None
+
+def fetch_from_peer(peer_url, rel_path, dest_path: Path, progress_callback=None, timeout=30, session=None, retries=3, max_wait=30, expected_sha256=None):
+    """
+    Descarga 'rel_path' (relativa a 'Programas') desde un equipo par. Si existe un '.part'
+    de un intento anterior se reanuda con Range e If-Range (su ETag se guarda en '.part.etag'):
+    si el archivo cambió en el par llega entero y el parcial se descarta. El resultado se
+    verifica con el SHA-256 del ETag (o 'expected_sha256') antes de ponerlo en su sitio.
+    Un 503 (par ocupado) se reintenta tras su Retry-After. Devuelve True si el archivo quedó completo.
+    """
+    url = f"{peer_url.rstrip('/')}/{urllib.parse.quote(str(rel_path).replace(os.sep, '/'))}"
+    part, tag_file = Path(f"{dest_path}.part"), Path(f"{dest_path}.part.etag")
+    etag = tag_file.read_text(encoding='utf-8').strip() if part.exists() and tag_file.exists() else ""
+    offset = part.stat().st_size if etag else 0
+    headers = {"Range": f"bytes={offset}-", "If-Range": etag} if offset else {}
+    for attempt in range(retries + 1):
+        r = (session or requests).get(url, headers=headers, stream=True, timeout=timeout)
+        if r.status_code != 503 or attempt == retries: break
+        r.close(); wait = r.headers.get("Retry-After", "5")
+        wait = min(max_wait, int(wait) if wait.isdigit() else 5)
+        logging.info(f"El equipo par está ocupado (503). Reintento {attempt + 1}/{retries} en {wait}s."); time.sleep(wait)
+    with r:
+        if r.status_code == 416: part.unlink(missing_ok=True); tag_file.unlink(missing_ok=True); return False
+        r.raise_for_status()
+        if r.status_code != 206: offset = 0  # 200: el archivo cambió en el par (o no admite Range) y llega entero
+        etag, h = r.headers.get("ETag", ""), hashlib.sha256()
+        if etag: tag_file.write_text(etag, encoding='utf-8')
+        else: tag_file.unlink(missing_ok=True)
+        if offset:
+            with open(part, 'rb') as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""): h.update(chunk)
+        total = offset + int(r.headers.get('content-length', 0)); done = offset
+        with open(part, 'ab' if offset else 'wb') as f:
+            for chunk in r.iter_content(CHUNK_SIZE):
+                f.write(chunk); h.update(chunk); done += len(chunk)
+                if total and progress_callback: progress_callback(int(done * 100 / total))
+    if total and done != total: return False
+    expected = expected_sha256 or _etag_digest(etag)
+    if expected and h.hexdigest() != expected:
+        logging.warning(f"La descarga de '{rel_path}' no coincide con su huella. Se descarta."); part.unlink(missing_ok=True); tag_file.unlink(missing_ok=True); return False
+    part.replace(dest_path); tag_file.unlink(missing_ok=True)
+    return True
@@ -0,0 +1,61 @@
+# --- START OF FILE toolkit_lib/fingerprints.py ---
+
+import hashlib
+import logging
+import threading
+from pathlib import Path
+
+from .utils import load_json_dict, write_json_atomic
+
+CHUNK_SIZE = 1 << 20
+
+class FingerprintCache:
+    """
+    Manifiesto de huellas (SHA-256) de archivos, persistido en JSON. Un archivo solo se
+    vuelve a leer entero si cambia su tamaño o su mtime, así que es barato consultarlo
+    antes de cada descarga, copia o instalación.
+    """
+    def __init__(self, cache_file: Path = None):
+        self.cache_file, self._lock, self._dirty = Path(cache_file) if cache_file else None, threading.Lock(), False
+        self._entries = self._load()
+
+    def _load(self): return load_json_dict(self.cache_file)
+
+    def save(self):
+        if not self.cache_file: return
+        with self._lock:
+            if not self._dirty: return
+            data = dict(self._entries); self._dirty = False
+        try: write_json_atomic(self.cache_file, data)
+        except IOError as e: logging.warning(f"No se pudo guardar el manifiesto de huellas: {e}")
+
+    def lookup(self, path: Path):
+        """Devuelve la huella cacheada si sigue siendo válida, sin leer el archivo."""
+        path = Path(path)
+        try: st = path.stat()
+        except OSError: return None
+        with self._lock: entry = self._entries.get(str(path.resolve()))
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns: return entry["sha256"]
+        return None
+
+    def digest(self, path: Path):
+        """SHA-256 de 'path' (cacheado por tamaño y mtime). None si el archivo no existe."""
+        path = Path(path)
+        cached = self.lookup(path)
+        if cached: return cached
+        try:
+            st = path.stat(); h = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""): h.update(chunk)
+        except OSError: return None
+        with self._lock:
+            self._entries[str(path.resolve())] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": h.hexdigest()}; self._dirty = True
+        return h.hexdigest()
+
+    def record(self, path: Path, sha256):
+        """Registra una huella ya calculada (p. ej. mientras se descargaba o copiaba el archivo)."""
+        path = Path(path)
+        try: st = path.stat()
+        except OSError: return
+        with self._lock:
+            self._entries[str(path.resolve())] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha256}; self._dirty = True
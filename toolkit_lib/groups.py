@@ -0,0 +1,124 @@
+# --- START OF FILE toolkit_lib/groups.py ---
+
+import os
+import logging
+import threading
+from pathlib import Path
+
+class DependencyCycleError(ValueError):
+    """Se lanza cuando el grafo de dependencias contiene un ciclo."""
+
+def dependency_closure(apps, app_configs):
+    """Devuelve 'apps' más todas sus dependencias transitivas conocidas (en orden estable)."""
+    result, seen, stack = [], set(), list(reversed(list(apps)))
+    while stack:
+        app = stack.pop()
+        if app in seen: continue
+        seen.add(app); result.append(app)
+        for dep in reversed(app_configs.get(app, {}).get("dependencies") or []):
+            if dep not in seen and dep in app_configs: stack.append(dep)
+    return result
+
+def topological_levels(apps, app_configs):
+    """
+    Agrupa 'apps' en niveles: cada nivel solo depende de niveles anteriores, por lo que
+    las tareas de un mismo nivel son independientes entre sí. Las dependencias que no
+    están en 'apps' se ignoran.
+    """
+    apps = list(dict.fromkeys(apps)); members = set(apps)
+    deps = {a: [d for d in (app_configs.get(a, {}).get("dependencies") or []) if d in members] for a in apps}
+    pending = {a: len(set(d)) for a, d in deps.items()}
+    dependents = {a: [] for a in apps}
+    for a, ds in deps.items():
+        for d in set(ds): dependents[d].append(a)
+    levels, current = [], [a for a in apps if pending[a] == 0]
+    done = 0
+    while current:
+        levels.append(current); done += len(current); nxt = []
+        for a in current:
+            for child in dependents[a]:
+                pending[child] -= 1
+                if pending[child] == 0: nxt.append(child)
+        current = sorted(nxt, key=apps.index)
+    if done != len(apps):
+        raise DependencyCycleError(", ".join(a for a in apps if pending[a] > 0))
+    return levels
+
+class GroupRepository:
+    """
+    Acceso único a 'Programas/Grupos/*.txt' con caché en memoria. Solo se vuelve a leer
+    un archivo si cambia su mtime; las clausuras de dependencias y los planes por niveles
+    se calculan una vez por versión del grupo y del grafo de dependencias.
+    """
+    def __init__(self, grupos_dir: Path, app_configs=None):
+        self.grupos_dir, self.app_configs = Path(grupos_dir), app_configs if app_configs is not None else {}
+        self._files, self._plans, self._lock = {}, {}, threading.Lock()
+
+    def _refresh(self):
+        self.grupos_dir.mkdir(parents=True, exist_ok=True)
+        current = {}
+        with os.scandir(self.grupos_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.lower().endswith(".txt"):
+                    current[entry.name[:-4]] = (entry.path, entry.stat().st_mtime_ns)
+        for name in list(self._files):
+            if name not in current: del self._files[name]; self._plans.pop(name, None)
+        for name, (path, mtime) in current.items():
+            cached = self._files.get(name)
+            if cached and cached[0] == mtime: continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f: apps = [l.strip() for l in f if l.strip()]
+            except IOError as e:
+                logging.error(f"No se pudo leer el grupo '{name}': {e}"); continue
+            self._files[name] = (mtime, apps); self._plans.pop(name, None)
+
+    def load(self):
+        """Devuelve {nombre_grupo: [apps]} tal y como están escritos en disco."""
+        with self._lock:
+            self._refresh()
+            return {name: list(apps) for name, (_, apps) in self._files.items()}
+
+    def get(self, name):
+        return self.load().get(name, [])
+
+    def save(self, name, apps):
+        path = self.grupos_dir / f"{name}.txt"
+        with self._lock:
+            self.grupos_dir.mkdir(parents=True, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f: f.write("\n".join(apps))
+            self._files[name] = (path.stat().st_mtime_ns, list(apps)); self._plans.pop(name, None)
+
+    def delete(self, name):
+        with self._lock:
+            (self.grupos_dir / f"{name}.txt").unlink(missing_ok=True)
+            self._files.pop(name, None); self._plans.pop(name, None)
+
+    def _graph_signature(self):
+        return hash(tuple((k, tuple(c.get("dependencies") or ())) for k, c in self.app_configs.items()))
+
+    def _plan(self, name):
+        with self._lock:
+            self._refresh()
+            if name not in self._files: return [], [], None
+            mtime, apps = self._files[name]; signature = self._graph_signature()
+            cached = self._plans.get(name)
+            if not (cached and cached[0] == (mtime, signature)):
+                closure, levels, error = dependency_closure(apps, self.app_configs), [], None
+                try: levels = topological_levels(closure, self.app_configs)
+                except DependencyCycleError as e:
+                    logging.error(f"Dependencia circular en el grupo '{name}': {e}"); error = str(e)
+                cached = self._plans[name] = ((mtime, signature), closure, levels, error)
+            return list(cached[1]), [list(l) for l in cached[2]], cached[3]
+
+    def plan(self, name):
+        """
+        Devuelve (clausura, niveles) del grupo: las apps del grupo más sus dependencias
+        transitivas, y esas mismas apps agrupadas en niveles topológicos. Lanza
+        DependencyCycleError (con las apps implicadas) si las dependencias forman un ciclo.
+        """
+        closure, levels, error = self._plan(name)
+        if error: raise DependencyCycleError(error)
+        return closure, levels
+
+    def closure(self, name):
+        return self._plan(name)[0]
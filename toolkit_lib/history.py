@@ -0,0 +1,61 @@
+# --- START OF FILE toolkit_lib/history.py ---
+
+import json
+import logging
+import threading
+from pathlib import Path
+from statistics import median
+
+from .utils import load_json_dict, write_json_atomic
+
+HISTORY_FILE_NAME = "historial_tiempos.json"
+EWMA_ALPHA = 0.3
+# Estimaciones iniciales (segundos) cuando una app todavía no tiene historial.
+DEFAULT_ESTIMATES = {"instalar_local": 90.0, "instalar_manual_asistido": 180.0, "copiar_archivo_interactivo": 30.0,
+                     "desinstalar": 45.0, "instalar_driver": 60.0, "limpiar_temp": 20.0, "configurar_energia_actual": 5.0}
+FALLBACK_ESTIMATE = 60.0
+
+class DurationHistory:
+    """
+    Historial persistente de duraciones observadas por app y fase ('tarea', 'descarga',
+    'ejecucion', ...) como media móvil exponencial. Se usa para ordenar los lotes y
+    estimar el tiempo restante.
+    """
+    def __init__(self, path: Path = None):
+        self.path, self._lock, self._dirty = Path(path) if path else None, threading.Lock(), False
+        self.data = self._load()
+
+    def _load(self): return load_json_dict(self.path)
+
+    def save(self):
+        if not self.path: return
+        with self._lock:
+            if not self._dirty: return
+            data = json.loads(json.dumps(self.data)); self._dirty = False
+        try: write_json_atomic(self.path, data, indent=2)
+        except IOError as e: logging.warning(f"No se pudo guardar el historial de tiempos: {e}")
+
+    def record(self, app, phase, seconds):
+        with self._lock:
+            entry = self.data.setdefault(app, {}).setdefault(phase, {"ewma": seconds, "n": 0})
+            entry["ewma"] = seconds if entry["n"] == 0 else EWMA_ALPHA * seconds + (1 - EWMA_ALPHA) * entry["ewma"]
+            entry["n"] += 1; self._dirty = True
+
+    def get(self, app, phase="tarea"):
+        entry = self.data.get(app, {}).get(phase)
+        return entry["ewma"] if entry else None
+
+    def estimate(self, app, task_type=None):
+        """Duración esperada de la tarea completa (historial, o una estimación por tipo)."""
+        known = self.get(app)
+        if known is not None: return known
+        if task_type in DEFAULT_ESTIMATES: return DEFAULT_ESTIMATES[task_type]
+        observed = [p["tarea"]["ewma"] for p in self.data.values() if "tarea" in p]
+        return median(observed) if observed else FALLBACK_ESTIMATE
+
+    def span_listener(self, event):
+        """Oyente de Tracer: registra la duración de las tareas correctas y de sus fases."""
+        app = event["name"] if event["cat"] == "tarea" else event["args"].get("app")
+        if not app: return
+        if event["cat"] == "tarea" and event["args"].get("ok"): self.record(app, "tarea", event["dur"] / 1e6)
+        elif event["cat"] == "fase" and event["name"] != "tarea": self.record(app, event["name"], event["dur"] / 1e6)
@@ -0,0 +1,113 @@
+# --- START OF FILE toolkit_lib/installer_detect.py ---
+
+import struct
+import hashlib
+import logging
+import threading
+from pathlib import Path
+
+from .utils import load_json_dict, write_json_atomic
+
+HEAD_LIMIT = 8 * 1024 * 1024
+OVERLAY_PROBE = 256 * 1024
+# Bytes del principio y del final que identifican un instalador en la caché (sin leerlo entero).
+KEY_WINDOW = 64 * 1024
+KEY_PREFIX = "v2:"
+CFB_SIGNATURE = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+# Argumentos desatendidos por tecnología de instalador.
+FRAMEWORKS = {
+    "inno": ("Inno Setup", ["/VERYSILENT", "/SUPPRESSMSGBOXES", "/NORESTART", "/SP-"]),
+    "nsis": ("NSIS", ["/S"]),
+    "installshield": ("InstallShield", ["/s", "/v/qn"]),
+    "wix_burn": ("WiX Burn (bundle)", ["/quiet", "/norestart"]),
+    "msi": ("Windows Installer (MSI)", ["/qn", "/norestart"]),
+    "squirrel": ("Squirrel", ["--silent"]),
+}
+# Firmas buscadas en la imagen PE y al comienzo del overlay, por orden de prioridad.
+SIGNATURES = (
+    ("nsis", (b"\xef\xbe\xad\xdeNullsoftInst",)),
+    ("inno", (b"Inno Setup Setup Data", b"JR.Inno.Setup", b"rDlPtS", "Inno Setup".encode("utf-16-le"))),
+    ("installshield", (b"InstallShield", "InstallShield".encode("utf-16-le"), b"ISSetupStream")),
+    ("squirrel", (b"SquirrelSetup", b"Squirrel.Windows", "Squirrel".encode("utf-16-le"))),
+)
+
+def _pe_layout(head):
+    """(nombres de sección, fin de la imagen en disco) de la cabecera PE, o None si no es un PE."""
+    if len(head) < 64 or head[:2] != b"MZ": return None
+    pe = struct.unpack_from("<I", head, 0x3C)[0]
+    if head[pe:pe + 4] != b"PE\0\0": return None
+    num_sections, opt_size = struct.unpack_from("<H", head, pe + 6)[0], struct.unpack_from("<H", head, pe + 20)[0]
+    table, names, end = pe + 24 + opt_size, [], 0
+    for i in range(num_sections):
+        off = table + 40 * i
+        names.append(head[off:off + 8].rstrip(b"\0").decode("latin-1"))
+        raw_size, raw_ptr = struct.unpack_from("<II", head, off + 16); end = max(end, raw_ptr + raw_size)
+    return names, end
+
+def detect_framework(path: Path):
+    """Identifica la tecnología del instalador por sus cabeceras/firmas. Devuelve la clave de FRAMEWORKS o None."""
+    path = Path(path)
+    with open(path, 'rb') as f:
+        head = f.read(HEAD_LIMIT)
+        if head[:8] == CFB_SIGNATURE: return "msi"
+        layout = _pe_layout(head)
+        if layout is None: return None
+        sections, image_end = layout
+        if ".wixburn" in sections: return "wix_burn"
+        f.seek(image_end); overlay = f.read(OVERLAY_PROBE)
+    for framework, needles in SIGNATURES:
+        if any(n in overlay or n in head for n in needles): return framework
+    return None
+
+def content_key(path: Path):
+    """Clave barata del contenido: tamaño y SHA-256 de los primeros y últimos KEY_WINDOW bytes."""
+    with open(path, 'rb') as f:
+        size = f.seek(0, 2); f.seek(0); h = hashlib.sha256(f.read(KEY_WINDOW))
+        if size > KEY_WINDOW: f.seek(max(KEY_WINDOW, size - KEY_WINDOW)); h.update(f.read(KEY_WINDOW))
+    return f"{KEY_PREFIX}{size}:{h.hexdigest()}"
+
+class InstallerDetector:
+    """
+    Caché de detecciones indexada por una clave del contenido (un mismo instalador copiado o
+    renombrado no se vuelve a analizar). La clave solo lee el principio y el final del archivo.
+    """
+    def __init__(self, cache_file: Path = None):
+        self.cache_file, self._lock, self._dirty = Path(cache_file) if cache_file else None, threading.Lock(), False
+        self._entries = self._load()
+
+    def _load(self): return {k: v for k, v in load_json_dict(self.cache_file).items() if k.startswith(KEY_PREFIX)}
+
+    def save(self):
+        if not self.cache_file: return
+        with self._lock:
+            if not self._dirty: return
+            data = dict(self._entries); self._dirty = False
+        try: write_json_atomic(self.cache_file, data)
+        except IOError as e: logging.warning(f"No se pudo guardar la caché de detección de instaladores: {e}")
+
+    def detect(self, path: Path):
+        """{'framework', 'label', 'args'} del instalador, o None si no se reconoce."""
+        path = Path(path)
+        if path.suffix.lower() == ".msi": framework = "msi"
+        else:
+            try: key = content_key(path)
+            except OSError: return None
+            with self._lock: cached = self._entries.get(key, False)
+            if cached is False:
+                try: cached = detect_framework(path)
+                except (OSError, struct.error) as e: logging.debug(f"No se pudo analizar '{path}': {e}"); return None
+                with self._lock: self._entries[key] = cached; self._dirty = True
+            framework = cached
+        if framework is None: return None
+        label, args = FRAMEWORKS[framework]
+        return {"framework": framework, "label": label, "args": list(args)}
+
+    def detect_app(self, app_dir: Path):
+        """Primera detección positiva entre los .exe/.msi de la carpeta de una app."""
+        try: candidates = sorted(p for p in Path(app_dir).iterdir() if p.suffix.lower() in (".exe", ".msi"))
+        except OSError: return None
+        for candidate in candidates:
+            result = self.detect(candidate)
+            if result: return dict(result, file=candidate.name)
+        return None
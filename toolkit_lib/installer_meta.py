@@ -0,0 +1,220 @@
+# --- START OF FILE toolkit_lib/installer_meta.py ---
+
+import re
+import struct
+import logging
+import threading
+from pathlib import Path
+
+from .utils import load_json_dict, write_json_atomic
+
+RT_VERSION = 16
+VS_FIXEDFILEINFO_SIGNATURE = 0xFEEF04BD
+CFB_SIGNATURE = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+CFB_END_OF_CHAIN, CFB_FREE = 0xFFFFFFFE, 0xFFFFFFFF
+MSI_NAME_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz._"
+
+STATUS_UP_TO_DATE, STATUS_UPGRADEABLE, STATUS_MISSING = "actualizado", "actualizable", "ausente"
+
+class MetadataError(Exception):
+    pass
+
+def parse_version(text):
+    """'3.0.21.0' -> (3, 0, 21). Los ceros finales se ignoran para que '1.2' == '1.2.0.0'."""
+    if not text: return None
+    parts = [int(p) for p in re.findall(r"\d+", str(text))[:4]]
+    while parts and parts[-1] == 0: parts.pop()
+    return tuple(parts) if parts else None
+
+# --- PE (.exe): VS_FIXEDFILEINFO del recurso RT_VERSION ---
+
+def _pe_version(f):
+    f.seek(0); dos = f.read(64)
+    if len(dos) < 64 or dos[:2] != b"MZ": raise MetadataError("No es un ejecutable PE.")
+    pe_offset = struct.unpack_from("<I", dos, 0x3C)[0]; f.seek(pe_offset); header = f.read(24)
+    if header[:4] != b"PE\0\0": raise MetadataError("Cabecera PE no válida.")
+    num_sections, opt_size = struct.unpack_from("<H", header, 6)[0], struct.unpack_from("<H", header, 20)[0]
+    optional = f.read(opt_size); magic = struct.unpack_from("<H", optional, 0)[0]
+    dirs_offset = 96 if magic == 0x10B else 112
+    if len(optional) < dirs_offset + 24: return None
+    rsrc_rva = struct.unpack_from("<I", optional, dirs_offset + 2 * 8)[0]
+    if not rsrc_rva: return None
+    sections = [struct.unpack_from("<IIII", f.read(40), 8) for _ in range(num_sections)]  # (vsize, rva, rawsize, rawptr)
+    def rva_to_offset(rva):
+        for vsize, va, raw_size, raw_ptr in sections:
+            if va <= rva < va + max(vsize, raw_size): return raw_ptr + rva - va
+        raise MetadataError("RVA fuera de las secciones.")
+    base = rva_to_offset(rsrc_rva)
+    def entries(offset):
+        f.seek(base + offset); named, ids = struct.unpack_from("<HH", f.read(16), 12)
+        data = f.read(8 * (named + ids))
+        return [struct.unpack_from("<II", data, 8 * i) for i in range(named + ids)]
+    def first_leaf(offset, depth):
+        for name, target in entries(offset):
+            if depth == 0 and name != RT_VERSION: continue
+            if target & 0x80000000: return first_leaf(target & 0x7FFFFFFF, depth + 1)
+            return target
+        return None
+    leaf = first_leaf(0, 0)
+    if leaf is None: return None
+    f.seek(base + leaf); data_rva, data_size = struct.unpack("<II", f.read(8))
+    f.seek(rva_to_offset(data_rva)); block = f.read(min(data_size, 64 * 1024))
+    pos = block.find(struct.pack("<I", VS_FIXEDFILEINFO_SIGNATURE))
+    if pos < 0: return None
+    file_ms, file_ls, prod_ms, prod_ls = struct.unpack_from("<IIII", block, pos + 8)
+    ms, ls = (prod_ms, prod_ls) if prod_ms or prod_ls else (file_ms, file_ls)
+    return f"{ms >> 16}.{ms & 0xFFFF}.{ls >> 16}.{ls & 0xFFFF}"
+
+# --- MSI: tabla Property dentro del archivo compuesto OLE (CFB) ---
+
+class _CompoundFile:
+    """Lector mínimo de archivos compuestos OLE: solo lo necesario para leer streams por nombre."""
+    def __init__(self, f):
+        self.f = f; f.seek(0); h = f.read(512)
+        if h[:8] != CFB_SIGNATURE: raise MetadataError("No es un archivo compuesto OLE.")
+        self.sector_size, self.mini_size = 1 << struct.unpack_from("<H", h, 0x1E)[0], 1 << struct.unpack_from("<H", h, 0x20)[0]
+        num_fat, first_dir, self.cutoff, first_minifat, num_minifat, first_difat, num_difat = struct.unpack_from("<II4xIIIII", h, 0x2C)
+        fat_sectors = [s for s in struct.unpack_from("<109I", h, 0x4C) if s not in (CFB_FREE, CFB_END_OF_CHAIN)]
+        per_sector = self.sector_size // 4; sid = first_difat
+        while num_difat and sid not in (CFB_FREE, CFB_END_OF_CHAIN):
+            ids = struct.unpack(f"<{per_sector}I", self._sector(sid))
+            fat_sectors += [s for s in ids[:-1] if s not in (CFB_FREE, CFB_END_OF_CHAIN)]; sid = ids[-1]; num_difat -= 1
+        self.fat = [e for s in fat_sectors[:num_fat] for e in struct.unpack(f"<{per_sector}I", self._sector(s))]
+        minifat = self._chain(first_minifat) if num_minifat else b""
+        self.minifat = list(struct.unpack(f"<{len(minifat) // 4}I", minifat))
+        raw = self._chain(first_dir); self.entries = {}
+        for i in range(len(raw) // 128):
+            e = raw[i * 128:(i + 1) * 128]; name_len, kind = struct.unpack_from("<HB", e, 64)
+            if kind == 0: continue
+            name = e[:max(0, name_len - 2)].decode("utf-16-le", "replace")
+            start, size = struct.unpack_from("<IQ", e, 116)
+            if self.sector_size == 512: size &= 0xFFFFFFFF
+            if i == 0: self._root = (kind, start, size)
+            else: self.entries[name] = (kind, start, size)
+        self._mini_stream = None
+
+    def _sector(self, sid):
+        self.f.seek((sid + 1) * self.sector_size); return self.f.read(self.sector_size)
+
+    def _chain(self, sid, size=None):
+        out, seen = bytearray(), set()
+        while sid not in (CFB_END_OF_CHAIN, CFB_FREE) and sid not in seen and (size is None or len(out) < size):
+            seen.add(sid); out += self._sector(sid); sid = self.fat[sid] if sid < len(self.fat) else CFB_END_OF_CHAIN
+        return bytes(out if size is None else out[:size])
+
+    def read_stream(self, name):
+        if name not in self.entries: return None
+        _, start, size = self.entries[name]
+        if size >= self.cutoff: return self._chain(start, size)
+        if self._mini_stream is None: self._mini_stream = self._chain(self._root[1], self._root[2])
+        out, sid = bytearray(), start
+        while sid not in (CFB_END_OF_CHAIN, CFB_FREE) and len(out) < size and sid < len(self.minifat):
+            out += self._mini_stream[sid * self.mini_size:(sid + 1) * self.mini_size]; sid = self.minifat[sid]
+        return bytes(out[:size])
+
+def _msi_stream_name(name, table=True):
+    """Codifica un nombre de stream al formato comprimido de Windows Installer."""
+    out, i = ["\u4840"] if table else [], 0
+    while i < len(name):
+        a = MSI_NAME_ALPHABET.find(name[i])
+        b = MSI_NAME_ALPHABET.find(name[i + 1]) if i + 1 < len(name) else -1
+        if a >= 0 and b >= 0: out.append(chr(0x3800 + a + (b << 6))); i += 2
+        elif a >= 0: out.append(chr(0x4800 + a)); i += 1
+        else: out.append(name[i]); i += 1
+    return "".join(out)
+
+def _msi_properties(f):
+    cf = _CompoundFile(f)
+    pool, data, table = (cf.read_stream(_msi_stream_name(n)) for n in ("_StringPool", "_StringData", "Property"))
+    if pool is None or data is None or table is None: raise MetadataError("El MSI no tiene tabla Property.")
+    codepage = struct.unpack_from("<I", pool, 0)[0]; ref_size = 3 if codepage & 0x80000000 else 2
+    encoding = f"cp{codepage & 0xFFFF}" if codepage & 0xFFFF else "cp1252"
+    words = struct.unpack(f"<{len(pool) // 2}H", pool[:len(pool) // 2 * 2]); strings, pos, i = [None], 0, 2
+    while i + 1 < len(words):
+        length, refs = words[i], words[i + 1]
+        if length == 0 and refs and i + 3 < len(words): length = (words[i + 3] << 16) + words[i + 2]; i += 2
+        try: strings.append(data[pos:pos + length].decode(encoding, "replace"))
+        except LookupError: strings.append(data[pos:pos + length].decode("cp1252", "replace"))
+        pos += length; i += 2
+    rows = len(table) // (2 * ref_size)
+    def ref(index):
+        off = index * ref_size
+        return int.from_bytes(table[off:off + ref_size], "little")
+    props = {}
+    for r in range(rows):
+        key, value = ref(r), ref(rows + r)
+        if 0 < key < len(strings) and 0 < value < len(strings): props[strings[key]] = strings[value]
+    return props
+
+def read_metadata(path: Path):
+    """{'version', 'product'} de un instalador .exe o .msi (None si no se puede leer)."""
+    path = Path(path)
+    try:
+        with open(path, 'rb') as f:
+            if path.suffix.lower() == ".msi":
+                props = _msi_properties(f)
+                return {"version": props.get("ProductVersion"), "product": props.get("ProductName")}
+            if path.suffix.lower() == ".exe": return {"version": _pe_version(f), "product": None}
+    except (OSError, MetadataError, struct.error, KeyError, IndexError) as e: logging.debug(f"Sin metadatos para '{path}': {e}")
+    return None
+
+class InstallerMetadataCache:
+    """Metadatos de instaladores persistidos en JSON; solo se vuelven a leer si cambia el tamaño o el mtime."""
+    def __init__(self, cache_file: Path = None):
+        self.cache_file, self._lock, self._dirty = Path(cache_file) if cache_file else None, threading.Lock(), False
+        self._entries = self._load()
+
+    def _load(self): return load_json_dict(self.cache_file)
+
+    def save(self):
+        if not self.cache_file: return
+        with self._lock:
+            if not self._dirty: return
+            data = dict(self._entries); self._dirty = False
+        try: write_json_atomic(self.cache_file, data)
+        except IOError as e: logging.warning(f"No se pudo guardar la caché de metadatos: {e}")
+
+    def _is_fresh(self, path):
+        try: st = path.stat()
+        except OSError: return True  # no existe: no hay nada que leer
+        with self._lock: entry = self._entries.get(str(path.resolve()))
+        return bool(entry) and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns
+
+    def get(self, path: Path, cached_only=False):
+        """Metadatos de 'path'. Con 'cached_only' no se abre el instalador: None si aún no se ha leído (hilo de la interfaz)."""
+        path = Path(path)
+        try: st = path.stat()
+        except OSError: return None
+        key = str(path.resolve())
+        with self._lock: entry = self._entries.get(key)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns: return entry["meta"]
+        if cached_only: return None
+        meta = read_metadata(path)
+        with self._lock: self._entries[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "meta": meta}; self._dirty = True
+        return meta
+
+    def version(self, path: Path, cached_only=False):
+        return (self.get(path, cached_only) or {}).get("version")
+
+    def warm(self, paths):
+        """Lee (en segundo plano) los metadatos que falten o hayan cambiado. Devuelve cuántos se leyeron."""
+        stale = [p for p in paths if not self._is_fresh(Path(p))]
+        for p in stale: self.get(p)
+        if stale: self.save()
+        return len(stale)
+
+    def newest(self, app_dir: Path, filenames, cached_only=False):
+        """Elige el instalador de mayor versión (a igualdad o sin versión, el más reciente en disco)."""
+        def key(name):
+            p = Path(app_dir) / name
+            try: mtime = p.stat().st_mtime
+            except OSError: mtime = 0
+            return (parse_version(self.version(p, cached_only)) or (), mtime)
+        return max(filenames, key=key) if filenames else None
+
+def upgrade_status(installer_version, installed_version):
+    """Estado de una app frente al inventario: 'ausente', 'actualizable' o 'actualizado'."""
+    if installed_version is None: return STATUS_MISSING
+    available, current = parse_version(installer_version), parse_version(installed_version)
+    if available and current and available > current: return STATUS_UPGRADEABLE
+    return STATUS_UP_TO_DATE
@@ -0,0 +1,194 @@
+# --- START OF FILE toolkit_lib/inventory_history.py ---
+
+import os
+import json
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+try: import msvcrt
+except ImportError: msvcrt = None
+try: import fcntl
+except ImportError: fcntl = None
+
+INVENTORY_HISTORY_FILE_NAME = "inventario_historial.jsonl"
+# Cada cuántos registros se guarda el inventario completo (acota lo que hay que releer para reconstruir).
+CHECKPOINT_EVERY = 50
+# Retención: registros que se conservan. La compactación se hace cada CHECKPOINT_EVERY registros de más.
+MAX_RECORDS = 500
+
+def diff_inventories(before, after):
+    """Cambios entre dos inventarios: {'añadidos': {nombre: datos}, 'eliminados': [nombres], 'cambiados': {nombre: {campo: valor nuevo}}}."""
+    added = {n: d for n, d in after.items() if n not in before}
+    removed = sorted(n for n in before if n not in after)
+    changed = {}
+    for name in before.keys() & after.keys():
+        old, new = before[name] or {}, after[name] or {}
+        fields = {k: new.get(k) for k in old.keys() | new.keys() if old.get(k) != new.get(k)}
+        if fields: changed[name] = fields
+    return {"añadidos": added, "eliminados": removed, "cambiados": changed}
+
+def apply_delta(inventory, delta):
+    for name in delta.get("eliminados", ()): inventory.pop(name, None)
+    inventory.update({n: dict(d) for n, d in delta.get("añadidos", {}).items()})
+    for name, fields in delta.get("cambiados", {}).items():
+        entry = inventory.setdefault(name, {})
+        for key, value in fields.items():
+            if value is None: entry.pop(key, None)
+            else: entry[key] = value
+    return inventory
+
+@contextmanager
+def _file_lock(path: Path):
+    """Bloqueo exclusivo entre procesos (interfaz y modo por lotes) sobre el archivo auxiliar 'path'. Lanza OSError."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a+b') as f:
+        if msvcrt:
+            f.seek(0)
+            for attempt in range(6):  # LK_LOCK ya reintenta durante ~10 s en cada llamada
+                try: msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1); break
+                except OSError:
+                    if attempt == 5: raise
+        elif fcntl: fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try: yield
+        finally:
+            if msvcrt: f.seek(0); msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            elif fcntl: fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+def _restore(inventory, record):
+    if "completo" in record: return {k: dict(v or {}) for k, v in record["completo"].items()}
+    return apply_delta(inventory, record)
+
+class InventoryHistory:
+    """
+    Historial del inventario de software en un JSON Lines de solo añadir: cada escaneo se guarda
+    como diferencia con el anterior (añadidos, eliminados y campos cambiados, p. ej. la versión) y
+    cada CHECKPOINT_EVERY registros como inventario completo. Reconstruir cualquier momento solo
+    relee desde el último completo anterior; el inventario más reciente se mantiene en memoria.
+
+    La interfaz y el modo por lotes pueden escribir a la vez: cada registro se añade con un bloqueo
+    de archivo y tras leer lo que otros procesos hayan añadido desde la última vez, para calcular
+    la diferencia y el número sobre el último inventario real. Se conservan 'max_records' registros.
+    """
+    def __init__(self, path: Path, max_records=MAX_RECORDS):
+        self.path, self.max_records, self._lock = Path(path), max_records, threading.Lock()
+        self.entries, self._current = [], {}  # entries: [{"n", "t", "etiqueta", "resumen", "offset", "completo"}]
+        self._end, self._identity = 0, None  # bytes ya indexados y (st_dev, st_ino) del archivo indexado
+        with self._lock: self._refresh()
+
+    @property
+    def _lock_path(self): return self.path.with_name(self.path.name + ".lock")
+
+    def _refresh(self):
+        """Indexa lo añadido desde la última lectura (solo el índice; el inventario se reconstruye desde el último completo)."""
+        try: st = os.stat(self.path)
+        except FileNotFoundError: self.entries, self._current, self._end, self._identity = [], {}, 0, None; return
+        except OSError as e: logging.warning(f"No se pudo leer el historial de inventario: {e}"); return
+        if (st.st_dev, st.st_ino) != self._identity or st.st_size < self._end:  # compactado o sustituido por otro proceso
+            self.entries, self._current, self._end, self._identity = [], {}, 0, (st.st_dev, st.st_ino)
+        if st.st_size == self._end: return
+        first, added = not self.entries, []
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(self._end); offset = self._end
+                for raw in f:
+                    if not raw.endswith(b"\n"): break  # línea a medias: se relee cuando esté completa
+                    try: record = json.loads(raw)
+                    except json.JSONDecodeError: logging.warning(f"Historial de inventario: línea dañada en el byte {offset}, se ignora."); offset += len(raw); continue
+                    self._index(record, offset); offset += len(raw)
+                    if not first: added.append(record)
+                self._end = offset
+        except OSError as e: logging.warning(f"No se pudo leer el historial de inventario: {e}"); return
+        if first: self._current = self._rebuild(len(self.entries) - 1) if self.entries else {}
+        for record in added: self._current = _restore(self._current, record)
+
+    def _index(self, record, offset):
+        summary = {k: len(record.get(k, ())) for k in ("añadidos", "eliminados", "cambiados")}
+        if "añadidos" not in record: summary["añadidos"] = len(record.get("completo", ()))
+        self.entries.append({"n": record["n"], "t": record["t"], "etiqueta": record.get("etiqueta", ""), "resumen": summary, "offset": offset, "completo": "completo" in record})
+
+    def _rebuild(self, i):
+        """Inventario tras self.entries[i], releyendo desde el último completo anterior."""
+        base = next((j for j in range(i, -1, -1) if self.entries[j]["completo"]), 0)
+        inventory, n = {}, self.entries[i]["n"]
+        with open(self.path, 'rb') as f:
+            f.seek(self.entries[base]["offset"])
+            for raw in f:
+                try: record = json.loads(raw)
+                except json.JSONDecodeError: continue
+                inventory = _restore(inventory, record)
+                if record["n"] == n: break
+        return inventory
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as f: f.seek(-1, 2); return f.read(1) == b"\n"
+
+    def latest(self): return {n: dict(d) for n, d in self._current.items()}
+
+    def record(self, inventory, label=""):
+        """Añade el inventario si cambió respecto al último. Devuelve la diferencia (None si no hubo cambios)."""
+        with self._lock:
+            try:
+                with _file_lock(self._lock_path): return self._append(inventory, label)
+            except OSError as e: logging.warning(f"No se pudo guardar el historial de inventario: {e}"); return diff_inventories(self._current, inventory)
+
+    def _append(self, inventory, label):
+        self._refresh()
+        delta = diff_inventories(self._current, inventory)
+        if self.entries and not any(delta.values()): return None
+        n = self.entries[-1]["n"] + 1 if self.entries else 1
+        record = {"n": n, "t": datetime.now().isoformat(timespec="seconds"), "etiqueta": label}
+        if self.entries: record.update(delta)
+        if not self.entries or sum(not e["completo"] for e in self.entries[-CHECKPOINT_EVERY:]) >= CHECKPOINT_EVERY: record["completo"] = inventory
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode('utf-8')
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'ab') as f:
+            offset = f.tell()
+            if offset and not self._ends_with_newline(): f.write(b"\n"); offset += 1  # línea cortada por un cierre a medias
+            f.write(line)
+        st = os.stat(self.path)
+        self._index(record, offset); self._end, self._identity = offset + len(line), (st.st_dev, st.st_ino)
+        self._current = {k: dict(v or {}) for k, v in inventory.items()}
+        if len(self.entries) >= self.max_records + CHECKPOINT_EVERY: self._compact()
+        return delta
+
+    def _compact(self):
+        """Conserva los últimos 'max_records' registros (con su número); el primero pasa a llevar el inventario completo."""
+        first = len(self.entries) - self.max_records; keep = self.entries[first]
+        try:
+            inventory = self._rebuild(first)
+            with open(self.path, 'rb') as f: f.seek(keep["offset"]); head = json.loads(f.readline()); rest = f.read()
+            head["completo"] = inventory
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, 'wb') as f:
+                f.write((json.dumps(head, ensure_ascii=False, separators=(",", ":")) + "\n").encode('utf-8') + rest); f.flush(); os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except (OSError, json.JSONDecodeError) as e: logging.warning(f"No se pudo compactar el historial de inventario: {e}"); return
+        logging.info(f"Historial de inventario compactado: se conservan los registros desde el {keep['n']}.")
+        self.entries, self._end, self._identity = [], 0, None; self._refresh()
+
+    def _entry_at(self, when):
+        """Último registro anterior o igual a 'when' (datetime o texto ISO)."""
+        when = when.isoformat(timespec="seconds") if isinstance(when, datetime) else str(when)
+        i = bisect.bisect_right([e["t"] for e in self.entries], when)
+        return self.entries[i - 1] if i else None
+
+    def state(self, n):
+        """Inventario tal como quedó tras el registro número 'n'."""
+        with self._lock:
+            self._refresh()
+            target = next((i for i, e in enumerate(self.entries) if e["n"] == n), None)
+            if target is None: raise KeyError(n)
+            return self.latest() if target == len(self.entries) - 1 else self._rebuild(target)
+
+    def state_at(self, when):
+        """Inventario vigente en el momento 'when' ({} si es anterior al primer registro)."""
+        entry = self._entry_at(when)
+        return self.state(entry["n"]) if entry else {}
+
+    def changes_since(self, n):
+        """Diferencia entre el inventario tras el registro 'n' y el actual."""
+        return diff_inventories(self.state(n), self._current)
@@ -0,0 +1,106 @@
+# --- START OF FILE toolkit_lib/jobs.py ---
+
+import heapq
+import logging
+import threading
+import itertools
+import time
+
+PRIORITY_QUICK, PRIORITY_NORMAL = 0, 10
+JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_FAILED, JOB_CANCELLED = "en_cola", "en_ejecucion", "terminado", "error", "cancelado"
+
+# Recursos compartidos que un trabajo puede reservar en exclusiva.
+RESOURCE_PROGRESS = "ventana_progreso"   # la ventana modal de progreso del TaskProcessor
+RESOURCE_INSTALLER = "instalador"        # msiexec/instaladores (error 1618 si se solapan)
+RESOURCE_DRIVERS = "drivers"
+
+class Job:
+    def __init__(self, job_id, label, target, priority, resources, key):
+        self.id, self.label, self.target, self.priority = job_id, label, target, priority
+        self.resources, self.key, self.state, self.error = frozenset(resources), key, JOB_QUEUED, None
+        self.submitted, self.started, self.finished = time.time(), None, None
+
+    def elapsed(self):
+        if self.started is None: return 0.0
+        return (self.finished or time.time()) - self.started
+
+class JobService:
+    """
+    Cola única de trabajos de larga duración (lotes, tareas rápidas, drivers, desinstalaciones).
+    Se ejecutan por prioridad y orden de llegada, y un trabajo solo arranca cuando los recursos
+    que reserva están libres (control de admisión).
+    """
+    def __init__(self, max_concurrent=1, on_change=None, history_size=50):
+        self.max_concurrent, self.on_change, self.history_size = max(1, max_concurrent), on_change, history_size
+        self._queue, self._jobs, self._held, self._running = [], [], set(), 0
+        self._ids, self._cond, self._stopped = itertools.count(1), threading.Condition(), False
+        threading.Thread(target=self._dispatch, daemon=True, name="trabajos").start()
+
+    def submit(self, label, target, priority=PRIORITY_NORMAL, resources=(RESOURCE_PROGRESS,), key=None):
+        """Encola 'target' (invocable). Si ya hay en cola un trabajo con la misma 'key', se devuelve ese."""
+        with self._cond:
+            if key is not None:
+                for job in self._jobs:
+                    if job.key == key and job.state == JOB_QUEUED: return job
+            job = Job(next(self._ids), label, target, priority, resources, key)
+            self._jobs.append(job); heapq.heappush(self._queue, (priority, job.id, job)); self._trim()
+            self._cond.notify_all()
+        logging.info(f"Trabajo #{job.id} en cola: {label}"); self._changed()
+        return job
+
+    def _trim(self):
+        finished = [j for j in self._jobs if j.state in (JOB_DONE, JOB_FAILED, JOB_CANCELLED)]
+        if len(finished) > self.history_size:
+            drop = {j.id for j in finished[:-self.history_size]}; self._jobs = [j for j in self._jobs if j.id not in drop]
+
+    def cancel(self, job_id):
+        with self._cond:
+            job = next((j for j in self._jobs if j.id == job_id and j.state == JOB_QUEUED), None)
+            if job: job.state, job.finished = JOB_CANCELLED, time.time()
+        if job: logging.info(f"Trabajo #{job.id} cancelado: {job.label}"); self._changed()
+        return job is not None
+
+    def jobs(self):
+        with self._cond: return list(self._jobs)
+
+    def pending(self):
+        with self._cond: return sum(1 for j in self._jobs if j.state in (JOB_QUEUED, JOB_RUNNING))
+
+    def shutdown(self):
+        with self._cond: self._stopped = True; self._cond.notify_all()
+
+    def _changed(self):
+        if self.on_change:
+            try: self.on_change()
+            except Exception as e: logging.debug(f"Error notificando cambios de trabajos: {e}")
+
+    def _next_admissible(self):
+        """Primer trabajo por prioridad cuyos recursos están libres (los cancelados se descartan)."""
+        if self._running >= self.max_concurrent: return None
+        skipped, found = [], None
+        while self._queue:
+            entry = heapq.heappop(self._queue); job = entry[2]
+            if job.state != JOB_QUEUED: continue
+            if job.resources & self._held: skipped.append(entry); continue
+            found = job; break
+        for entry in skipped: heapq.heappush(self._queue, entry)
+        return found
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                job = self._next_admissible()
+                while job is None and not self._stopped:
+                    self._cond.wait(); job = self._next_admissible()
+                if self._stopped: return
+                job.state, job.started = JOB_RUNNING, time.time(); self._held |= job.resources; self._running += 1
+            self._changed()
+            threading.Thread(target=self._run, args=(job,), daemon=True, name=f"trabajo-{job.id}").start()
+
+    def _run(self, job):
+        try: job.target(); state = JOB_DONE
+        except Exception as e: job.error = repr(e); state = JOB_FAILED; logging.exception(f"Trabajo #{job.id} ({job.label}) falló")
+        with self._cond:
+            job.state, job.finished = state, time.time(); self._held -= job.resources; self._running -= 1
+            self._cond.notify_all()
+        self._changed()
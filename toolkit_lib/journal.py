@@ -0,0 +1,96 @@
+# --- START OF FILE toolkit_lib/journal.py ---
+
+import sys
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from .system import get_system
+from .utils import load_json_dict, write_json_atomic
+
+JOURNAL_FILE_NAME = "lote_en_curso.json"
+RUN_ONCE_KEY, RUN_ONCE_VALUE = r"SOFTWARE\Microsoft\Windows\CurrentVersion\RunOnce", "PlayerToolkitReanudar"
+RESUME_ARG = "--resume"
+
+STATE_PENDING, STATE_RUNNING, STATE_DONE, STATE_FAILED, STATE_DEFERRED = "pendiente", "en_curso", "completada", "fallida", "pospuesta"
+UNFINISHED_STATES = (STATE_PENDING, STATE_RUNNING, STATE_DEFERRED)
+
+class BatchJournal:
+    """
+    Diario del lote en curso (plan resuelto y estado de cada tarea) escrito de forma atómica
+    antes y después de cada tarea. Si el programa se cierra, se cuelga o el equipo se reinicia
+    a mitad de lote, el diario permite reanudarlo en el siguiente arranque.
+    """
+    def __init__(self, path: Path):
+        self.path, self._lock = Path(path), threading.Lock()
+        self.data = self._load() or {}
+
+    def _load(self):
+        data = load_json_dict(self.path)
+        return data if isinstance(data.get("tasks"), dict) else None
+
+    @classmethod
+    def load(cls, path: Path):
+        """Diario pendiente en 'path', o None si no hay ningún lote sin terminar."""
+        journal = cls(path)
+        return journal if journal.unfinished() else None
+
+    def _write(self):
+        try: write_json_atomic(self.path, self.data, indent=2, durable=True)
+        except OSError as e: logging.warning(f"No se pudo escribir el diario del lote: {e}")
+
+    def begin(self, plan, configs, label=""):
+        """Registra el plan. Las tareas ya presentes (al reanudar) conservan su historial."""
+        with self._lock:
+            if not self.data: self.data = {"created": datetime.now().isoformat(timespec="seconds"), "label": label, "tasks": {}, "configs": {}}
+            self.data["plan"] = list(dict.fromkeys(self.data.get("plan", []) + list(plan)))
+            self.data["configs"].update(configs)
+            for app in plan: self.data["tasks"][app] = {"state": STATE_PENDING}
+            self.data["updated"] = datetime.now().isoformat(timespec="seconds"); self._write()
+
+    def mark(self, app, state, detail=None):
+        with self._lock:
+            entry = self.data.setdefault("tasks", {}).setdefault(app, {})
+            entry.update({"state": state, "at": datetime.now().isoformat(timespec="seconds")})
+            if detail: entry["detail"] = detail
+            else: entry.pop("detail", None)
+            self.data["updated"] = entry["at"]; self._write()
+
+    def state(self, app): return self.data.get("tasks", {}).get(app, {}).get("state")
+
+    def unfinished(self):
+        """Tareas sin terminar en el orden del plan."""
+        tasks = self.data.get("tasks", {})
+        return [a for a in self.data.get("plan", tasks) if tasks.get(a, {}).get("state") in UNFINISHED_STATES]
+
+    def in_flight(self):
+        return [a for a in self.unfinished() if self.state(a) == STATE_RUNNING]
+
+    def configs(self): return dict(self.data.get("configs", {}))
+
+    def finish(self):
+        """Borra el diario si el lote terminó; lo conserva si quedan tareas pospuestas o pendientes."""
+        with self._lock:
+            if any(t.get("state") in UNFINISHED_STATES for t in self.data.get("tasks", {}).values()): return False
+        self.discard(); return True
+
+    def discard(self):
+        with self._lock:
+            self.data = {}
+            try: self.path.unlink(missing_ok=True)
+            except OSError as e: logging.warning(f"No se pudo borrar el diario del lote: {e}")
+
+def resume_command():
+    """Línea de comandos para volver a abrir PlayerToolkit en modo reanudación."""
+    if getattr(sys, 'frozen', False): return f'"{sys.executable}" {RESUME_ARG}'
+    return f'"{sys.executable}" "{Path(sys.argv[0]).resolve()}" {RESUME_ARG}'
+
+def register_run_once(command=None, system=None):
+    """Programa la reanudación en el próximo inicio de sesión (clave RunOnce de HKLM)."""
+    try: (system or get_system()).registry_set(RUN_ONCE_KEY, RUN_ONCE_VALUE, command or resume_command()); return True
+    except OSError as e: logging.warning(f"No se pudo registrar la reanudación automática: {e}"); return False
+
+def clear_run_once(system=None):
+    try: (system or get_system()).registry_delete(RUN_ONCE_KEY, RUN_ONCE_VALUE)
+    except OSError: pass
@@ -0,0 +1,132 @@
+# --- START OF FILE toolkit_lib/metrics.py ---
+
+import os
+import bisect
+import logging
+import threading
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+DEFAULT_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1200, 3600)
+
+def _labels_key(labels): return tuple(sorted(labels.items()))
+
+def _format_labels(key, extra=None):
+    items = list(key) + list((extra or {}).items())
+    if not items: return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+def _escape(value): return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name, self.help, self.values, self._lock = name, help_text, {}, threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _labels_key(labels)
+        with self._lock: self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock: items = list(self.values.items())
+        lines += [f"{self.name}{_format_labels(k)} {v}" for k, v in sorted(items)]
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.buckets = name, help_text, tuple(sorted(buckets))
+        self.values, self._lock = {}, threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _labels_key(labels)
+        with self._lock:
+            entry = self.values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            idx = bisect.bisect_left(self.buckets, value)
+            if idx < len(self.buckets): entry[0][idx] += 1
+            entry[1] += value; entry[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock: items = [(k, (list(v[0]), v[1], v[2])) for k, v in self.values.items()]
+        for key, (counts, total, n) in sorted(items):
+            acc = 0
+            for le, c in zip(self.buckets, counts):
+                acc += c; lines.append(f"{self.name}_bucket{_format_labels(key, {'le': le})} {acc}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, {'le': '+Inf'})} {n}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total:.3f}"); lines.append(f"{self.name}_count{_format_labels(key)} {n}")
+        return lines
+
+class MetricsRegistry:
+    """Registro de métricas en memoria con exportación en formato de texto de Prometheus."""
+    def __init__(self):
+        self.metrics, self._lock = {}, threading.Lock()
+
+    def counter(self, name, help_text=""):
+        with self._lock: return self.metrics.setdefault(name, Counter(name, help_text))
+
+    def histogram(self, name, help_text="", buckets=DEFAULT_BUCKETS):
+        with self._lock: return self.metrics.setdefault(name, Histogram(name, help_text, buckets))
+
+    def render(self):
+        with self._lock: metrics = list(self.metrics.values())
+        return "\n".join(line for m in metrics for line in m.render()) + "\n"
+
+    def write_textfile(self, path: Path):
+        """Escribe el archivo de forma atómica (apto para el 'textfile collector' de node/windows_exporter)."""
+        path = Path(path); path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f: f.write(self.render())
+        os.replace(tmp, path)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, fmt, *args): pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"): self.send_response(404); self.send_header("Content-Length", "0"); self.end_headers(); return
+        body = self.server.registry.render().encode("utf-8")
+        self.send_response(200); self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body))); self.end_headers(); self.wfile.write(body)
+
+class MetricsServer:
+    """Expone '/metrics' solo en localhost."""
+    def __init__(self, registry, port):
+        self.registry, self.port, self.httpd = registry, port, None
+
+    def start(self):
+        if self.httpd: return
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", self.port), _MetricsHandler); self.httpd.daemon_threads = True
+        self.httpd.registry = self.registry; self.port = self.httpd.server_address[1]
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        logging.info(f"Métricas disponibles en http://127.0.0.1:{self.port}/metrics")
+
+    def stop(self):
+        if self.httpd: self.httpd.shutdown(); self.httpd.server_close(); self.httpd = None
+
+# Spans del arranque que son escaneos; el resto del arranque va a STARTUP_DURATION.
+SCAN_SPANS = {"scan_installed_software", "escaneo_archivos", "scan_drivers"}
+
+def record_span(event):
+    """Oyente de Tracer: convierte los spans del motor de tareas y del arranque en métricas."""
+    cat, args, seconds = event["cat"], event["args"], event["dur"] / 1e6
+    if cat == "tarea":
+        TASK_DURATION.observe(seconds, tipo=args.get("tipo") or "", app=event["name"])
+        TASKS_TOTAL.inc(tipo=args.get("tipo") or "", resultado="ok" if args.get("ok") else "error")
+    elif cat == "fase":
+        PHASE_DURATION.observe(seconds, fase=event["name"])
+        if "codigo" in args: EXIT_CODES.inc(codigo=args["codigo"])
+    elif cat == "escaneo" or (cat == "arranque" and event["name"] in SCAN_SPANS):
+        SCAN_DURATION.observe(seconds, escaneo=event["name"])
+    elif cat == "arranque":
+        STARTUP_DURATION.observe(seconds, paso=event["name"])
+
+# Registro global de la aplicación y métricas del motor de tareas.
+REGISTRY = MetricsRegistry()
+TASK_DURATION = REGISTRY.histogram("playertoolkit_task_duration_seconds", "Duración de cada tarea por tipo y aplicación.")
+PHASE_DURATION = REGISTRY.histogram("playertoolkit_phase_duration_seconds", "Duración de cada fase de una tarea.")
+TASKS_TOTAL = REGISTRY.counter("playertoolkit_tasks_total", "Tareas ejecutadas por tipo y resultado.")
+EXIT_CODES = REGISTRY.counter("playertoolkit_exit_codes_total", "Códigos de salida de los procesos lanzados.")
+BYTES_TOTAL = REGISTRY.counter("playertoolkit_bytes_total", "Bytes descargados o copiados por origen.")
+RETRIES_TOTAL = REGISTRY.counter("playertoolkit_retries_total", "Reintentos de tareas.")
+SCAN_DURATION = REGISTRY.histogram("playertoolkit_scan_duration_seconds", "Duración de los escaneos (registro, archivos, drivers).", (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+STARTUP_DURATION = REGISTRY.histogram("playertoolkit_startup_step_seconds", "Duración de los pasos del arranque que no son escaneos.", (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+UI_STALL_DURATION = REGISTRY.histogram("playertoolkit_ui_stall_seconds", "Bloqueos del hilo de la interfaz detectados por el vigilante.", (0.25, 0.5, 1, 2.5, 5, 10, 30, 60))
@@ -0,0 +1,114 @@
+# --- START OF FILE toolkit_lib/profiling.py ---
+"""
+Diagnóstico de bloqueos de la interfaz.
+
+StallWatchdog detecta cuándo el bucle de eventos de Tk deja de atender (no llega su latido)
+y muestrea la pila del hilo principal mientras dura el bloqueo. SamplingProfiler muestrea
+todos los hilos durante toda la sesión (ajuste 'sampling_profiler' o argumento --perfil).
+Ambos escriben pilas agregadas en formato "folded" ('marco;marco;marco N'), que abren
+flamegraph.pl, speedscope.app o Perfetto.
+"""
+
+import sys
+import time
+import logging
+import threading
+from collections import Counter
+from pathlib import Path
+
+from . import metrics
+
+STALLS_FILE_NAME = "bloqueos_ui.folded"
+PROFILE_ARG = "--perfil"
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+def folded_stack(frame, root=None):
+    """Pila de 'frame' de la raíz a la hoja, en formato folded."""
+    names = []
+    while frame is not None: names.append(_frame_label(frame)); frame = frame.f_back
+    if root: names.append(root)
+    return ";".join(reversed(names))
+
+def read_folded(path: Path):
+    samples = Counter()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                if stack and count.isdigit(): samples[stack] += int(count)
+    except FileNotFoundError: pass
+    except OSError as e: logging.warning(f"No se pudo leer '{path}': {e}")
+    return samples
+
+def write_folded(path: Path, samples):
+    path = Path(path); path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        for stack, count in samples.most_common(): f.write(f"{stack} {count}\n")
+
+class StallWatchdog:
+    """
+    Latido en el bucle de Tk cada 'interval' segundos. Si pasan más de 'threshold' sin latido,
+    un hilo aparte muestrea el hilo principal hasta que el bucle vuelve, registra el bloqueo
+    (log y métrica) y acumula sus pilas en 'path' entre sesiones. Desactivado no se crea.
+    """
+    def __init__(self, root, path: Path, threshold=0.5, interval=0.1):
+        self.root, self.path, self.threshold, self.interval = root, Path(path), threshold, interval
+        self.samples, self.stalls, self._job = read_folded(self.path), 0, None
+        self._beat, self._stop, self._main = time.monotonic(), threading.Event(), threading.main_thread().ident
+
+    def start(self):
+        self._heartbeat(); threading.Thread(target=self._watch, name="vigilante_ui", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._job: self.root.after_cancel(self._job)
+
+    def _heartbeat(self):
+        self._beat = time.monotonic()
+        if not self._stop.is_set(): self._job = self.root.after(int(self.interval * 1000), self._heartbeat)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            last = self._beat
+            if time.monotonic() - last < self.threshold: continue
+            stall = Counter()
+            while self._beat == last and not self._stop.is_set():
+                frame = sys._current_frames().get(self._main)
+                if frame is not None: stall[folded_stack(frame, "hilo_principal")] += 1
+                del frame; time.sleep(self.interval / 4)
+            self._report(max(0.0, self._beat - last - self.interval), stall)
+
+    def _report(self, duration, stall):
+        self.stalls += 1; self.samples.update(stall); metrics.UI_STALL_DURATION.observe(duration)
+        leaf = stall.most_common(1)[0][0].rsplit(";", 1)[-1] if stall else "?"
+        logging.warning(f"Interfaz bloqueada {duration:.2f}s (hoja más frecuente: {leaf}). Pilas en '{self.path.name}'.")
+        try: write_folded(self.path, self.samples)
+        except OSError as e: logging.warning(f"No se pudieron guardar las pilas del bloqueo: {e}")
+
+class SamplingProfiler:
+    """Perfilador por muestreo de la aplicación completa: pilas de todos los hilos cada 'interval' segundos."""
+    def __init__(self, path: Path, interval=0.005):
+        self.path, self.interval, self.samples, self._stop, self._thread = Path(path), interval, Counter(), threading.Event(), None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="perfilador", daemon=True); self._thread.start()
+        logging.info(f"Perfilador por muestreo activo ({1 / self.interval:.0f} muestras/s).")
+        return self
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != me: self.samples[folded_stack(frame, names.get(ident, str(ident)))] += 1
+            del frame
+
+    def stop(self):
+        self._stop.set()
+        if self._thread: self._thread.join(timeout=1)
+        try: write_folded(self.path, self.samples); logging.info(f"Perfil guardado en '{self.path}' ({sum(self.samples.values())} muestras).")
+        except OSError as e: logging.warning(f"No se pudo guardar el perfil: {e}")
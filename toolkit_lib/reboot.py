@@ -0,0 +1,73 @@
+# --- START OF FILE toolkit_lib/reboot.py ---
+
+import logging
+import threading
+
+from .system import get_system
+
+# Códigos de salida de Windows Installer (y de la mayoría de instaladores) que indican éxito con reinicio pendiente.
+REBOOT_EXIT_CODES = {3010: "el instalador solicitó reiniciar", 1641: "el instalador inició un reinicio"}
+
+class NullRebootBackend:
+    """Backend sin marcadores del sistema: solo cuentan los códigos de salida."""
+    def markers(self): return set()
+
+class RegistryRebootBackend:
+    """Marcadores de reinicio pendiente en el registro de Windows (real o simulado)."""
+    KEYS = (
+        (r"SOFTWARE\Microsoft\Windows\CurrentVersion\Component Based Servicing\RebootPending", None, "Servicio de componentes (CBS)"),
+        (r"SOFTWARE\Microsoft\Windows\CurrentVersion\WindowsUpdate\Auto Update\RebootRequired", None, "Windows Update"),
+        (r"SYSTEM\CurrentControlSet\Control\Session Manager", "PendingFileRenameOperations", "Archivos pendientes de renombrar"),
+    )
+
+    def __init__(self, system=None):
+        self.system = system or get_system()
+
+    def markers(self):
+        found = set()
+        for path, value, label in self.KEYS:
+            try:
+                values = self.system.registry_values(path)
+                if value is None: found.add(label)
+                elif values.get(value): data = values[value]; found.add(f"{label} ({len(data) // 2 if isinstance(data, list) else 1})")
+            except OSError: pass
+        return found
+
+def default_backend(system=None):
+    return RegistryRebootBackend(system)
+
+class RebootTracker:
+    """
+    Acumula durante un lote las tareas que dejan un reinicio pendiente (por código de salida
+    o porque aparecen marcadores nuevos en el sistema) para pedir un único reinicio al final.
+    """
+    def __init__(self, backend=None):
+        self.backend, self._lock = backend or default_backend(), threading.Lock()
+        self.apps, self._baseline = {}, set()
+
+    def start(self):
+        self._baseline = self._markers()
+
+    def _markers(self):
+        try: return set(self.backend.markers())
+        except Exception as e: logging.warning(f"No se pudo comprobar si hay un reinicio pendiente: {e}"); return set()
+
+    def record(self, app, reason):
+        if not app: return
+        with self._lock: self.apps.setdefault(app, []).append(reason)
+
+    def check(self, app):
+        """Atribuye a 'app' los marcadores de reinicio aparecidos desde la última comprobación."""
+        current = self._markers()
+        with self._lock: new, self._baseline = current - self._baseline, self._baseline | current
+        for marker in sorted(new): self.record(app, marker)
+        return bool(new)
+
+    @property
+    def required(self): return bool(self.apps)
+
+    def summary_lines(self):
+        with self._lock: return [f"- {app}: {', '.join(dict.fromkeys(reasons))}" for app, reasons in sorted(self.apps.items())]
+
+def schedule_restart(seconds=60, message="PlayerToolkit: reinicio para completar la instalación.", system=None):
+    (system or get_system()).run(["shutdown", "/r", "/t", str(int(seconds)), "/c", message], wait=False)
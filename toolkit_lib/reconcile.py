@@ -0,0 +1,71 @@
+# --- START OF FILE toolkit_lib/reconcile.py ---
+
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from .config import TASK_TYPE_LOCAL_INSTALL, TASK_TYPE_MANUAL_ASSISTED
+from .utils import load_json_dict, write_json_atomic
+
+STATE_FILE_NAME = "estado_tareas.json"
+# Claves de la configuración que cambian el resultado de una instalación.
+FINGERPRINT_KEYS = ("tipo", "exe_filename", "args_instalacion", "url", "pre_task_script", "post_task_script", "uninstall_key")
+RECONCILABLE_TYPES = (TASK_TYPE_LOCAL_INSTALL, TASK_TYPE_MANUAL_ASSISTED)
+
+def task_fingerprint(config, installer_hash):
+    payload = json.dumps({k: config.get(k) for k in FINGERPRINT_KEYS}, sort_keys=True, default=str)
+    return hashlib.sha256(f"{payload}|{installer_hash or ''}".encode("utf-8")).hexdigest()
+
+def find_installed(inventory, uninstall_key):
+    """Devuelve (nombre, versión) de la primera entrada del inventario que coincide con 'uninstall_key'."""
+    if not uninstall_key or not inventory: return None
+    needle = uninstall_key.lower()
+    for name in sorted(inventory):
+        if needle in name.lower(): return name, (inventory[name] or {}).get("version", "")
+    return None
+
+class ReconciliationStore:
+    """
+    Estado deseado ya alcanzado: huella de la última ejecución correcta de cada tarea y la
+    instalación detectada después. Una tarea se puede omitir si la huella coincide y la
+    app sigue instalada con la misma versión.
+    """
+    def __init__(self, path: Path = None):
+        self.path, self._lock = Path(path) if path else None, threading.Lock()
+        self.data = self._load()
+
+    def _load(self): return load_json_dict(self.path)
+
+    def save(self):
+        if not self.path: return
+        with self._lock: data = json.loads(json.dumps(self.data))
+        try: write_json_atomic(self.path, data, indent=2)
+        except IOError as e: logging.warning(f"No se pudo guardar el estado de tareas: {e}")
+
+    def is_satisfied(self, app, fingerprint, installed):
+        entry = self.data.get(app)
+        if not entry or entry.get("fingerprint") != fingerprint or not installed: return False
+        recorded = entry.get("installed")
+        return recorded is None or (recorded.get("name") == installed[0] and recorded.get("version") == installed[1])
+
+    def record_success(self, app, fingerprint, installed=None):
+        with self._lock:
+            self.data[app] = {"fingerprint": fingerprint, "timestamp": datetime.now().isoformat(timespec="seconds"),
+                              "installed": {"name": installed[0], "version": installed[1]} if installed else None}
+
+    def forget(self, app):
+        with self._lock: self.data.pop(app, None)
+
+    def update_installed(self, app_configs, inventory):
+        """Tras un reescaneo, completa la versión instalada de las tareas registradas sin ella (o las olvida si ya no están)."""
+        changed = False
+        with self._lock:
+            for app, entry in list(self.data.items()):
+                installed = find_installed(inventory, app_configs.get(app, {}).get("uninstall_key"))
+                if installed is None: self.data.pop(app); changed = True
+                elif entry.get("installed") is None:
+                    entry["installed"] = {"name": installed[0], "version": installed[1]}; changed = True
+        if changed: self.save()
@@ -0,0 +1,191 @@
+# --- START OF FILE toolkit_lib/replay.py ---
+"""
+Grabación y reproducción de sesiones de aprovisionamiento.
+
+Con el ajuste 'record_sessions' cada lote deja en 'logs/sesiones' un archivo compacto
+(JSON comprimido) con el plan, las fases de cada tarea con sus duraciones, los códigos de
+salida por intento, los bytes de cada instalador y los cambios en el registro de desinstalación.
+La reproducción vuelve a ejecutar la sesión con el motor real sobre el sistema simulado,
+a velocidad real o acelerada y con otros ajustes del planificador:
+
+    python -m toolkit_lib.replay logs/sesiones/sesion_2025-01-10_09-30-00.json.gz --workers 1,2,4 --speed 200
+"""
+
+import sys
+import gzip
+import json
+import time
+import socket
+import logging
+import argparse
+from datetime import datetime
+from pathlib import Path, PureWindowsPath
+
+from .config import TASK_TYPE_UNINSTALL
+from .tasks import TaskProcessor
+from .history import DurationHistory
+from .reboot import NullRebootBackend
+from .reconcile import find_installed
+from .reporting import result_state
+from .scheduling import simulate_makespan
+from .system import SimulatedSystem, FakeInstaller
+from .utils import scan_installed_software
+
+SESSIONS_DIR_NAME = "sesiones"
+SESSION_VERSION = 1
+# Fases que el motor genera por sí mismo al reproducir los comandos (no se reproducen como espera).
+# Los scripts PRE/POST no se guardan en la sesión: se reproducen como espera con su duración grabada.
+REGENERATED_PHASES = ("tarea", "ejecucion", "espera_msi", "espera_reintento")
+# Ajustes del lote que afectan a la planificación y se guardan con la sesión.
+SCHEDULER_SETTINGS = ("max_parallel_tasks", "retry_policy", "defer_after_reboot")
+
+def new_recorder(logs_dir: Path):
+    return SessionRecorder(Path(logs_dir) / SESSIONS_DIR_NAME / f"sesion_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json.gz")
+
+class SessionRecorder:
+    """Captura un lote de TaskProcessor: begin() tras planificar y finish() al terminar (lo llama el propio motor)."""
+    def __init__(self, path: Path):
+        self.path, self.session, self._before = Path(path), None, {}
+
+    def begin(self, processor, tasks):
+        plan = {}
+        for app in tasks:
+            config = processor._effective_config(app); filename = config.get("exe_filename")
+            installer = processor.programas_dir / app / filename if filename else None
+            plan[app] = {"tipo": config.get("tipo"), "deps": sorted(d for d in processor.graph.get(app, ()) if d in tasks), "msi": processor._uses_msi(app),
+                         "uninstall_key": config.get("uninstall_key"), "registry_key": config.get("registry_key"),
+                         "bytes": installer.stat().st_size if installer and installer.is_file() else 0}
+        self.session = {"version": SESSION_VERSION, "equipo": socket.gethostname(), "inicio": datetime.now().isoformat(timespec="seconds"),
+                        "workers": processor.workers, "ajustes": {k: processor.settings[k] for k in SCHEDULER_SETTINGS if k in processor.settings},
+                        "orden": list(tasks), "plan": plan}
+        try: self._before = scan_installed_software(processor.system)
+        except OSError as e: logging.warning(f"Sesión: no se pudo leer el inventario inicial: {e}"); self._before = {}
+
+    def _registry_changes(self, processor):
+        try: after = scan_installed_software(processor.system)
+        except OSError: return
+        added = {n: d for n, d in after.items() if n not in self._before or self._before[n].get("version") != d.get("version")}
+        removed = {d.get("registry_key") for n, d in self._before.items() if n not in after}
+        for app, entry in self.session["plan"].items():
+            changes = {}
+            if entry["tipo"] == TASK_TYPE_UNINSTALL and entry["registry_key"] in removed: changes["eliminadas"] = [entry["registry_key"]]
+            installed = find_installed(added, entry["uninstall_key"])
+            if installed: changes["añadidas"] = [{"name": installed[0], "version": installed[1], "registry_key": added[installed[0]].get("registry_key")}]
+            if changes: entry["registro"] = changes
+
+    def finish(self, processor):
+        if self.session is None: return
+        tasks = {e["name"]: e for e in processor.tracer.spans("tarea")}
+        for app, entry in self.session["plan"].items():
+            span = tasks.get(app)
+            if span is None: entry["omitida"] = True; continue
+            start, end = span["ts"], span["ts"] + span["dur"]
+            phases = sorted((p for p in processor.tracer.spans("fase") if p["args"].get("app") == app and start <= p["ts"] <= end), key=lambda p: p["ts"])
+            entry["fases"] = [dict({"fase": p["name"], "dur_s": round(p["dur"] / 1e6, 3)}, **{k: p["args"][k] for k in ("codigo", "intento") if k in p["args"]}) for p in phases]
+            entry.update({"dur_s": round(span["dur"] / 1e6, 3), "ok": bool(span["args"].get("ok")), "estado": result_state(processor.results.get(app, ""))})
+        batch = processor.tracer.spans("lote")
+        self.session["duracion_s"] = round(max((e["dur"] for e in batch if e["name"] == "lote"), default=0) / 1e6, 3)
+        self.session["reinicio"] = sorted(processor.reboot.apps)
+        self._registry_changes(processor)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with gzip.open(self.path, 'wt', encoding='utf-8') as f: json.dump(self.session, f, ensure_ascii=False, separators=(",", ":"))
+            logging.info(f"Sesión grabada en '{self.path}'.")
+        except OSError as e: logging.warning(f"No se pudo guardar la sesión: {e}")
+
+def load_session(path: Path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f: session = json.load(f)
+    if session.get("version") != SESSION_VERSION: raise ValueError(f"Versión de sesión no admitida: {session.get('version')}")
+    return session
+
+def _installer_for(entry):
+    attempts = [p for p in entry.get("fases", []) if p["fase"] == "ejecucion"]
+    installs = None
+    for added in entry.get("registro", {}).get("añadidas", [])[:1]:
+        key = PureWindowsPath(added["registry_key"] or added["name"])
+        installs = {"name": added["name"], "version": added["version"], "key_name": key.name, "wow64": "wow6432node" in str(key).lower()}
+    removes = (entry.get("registro", {}).get("eliminadas") or [None])[0]
+    return FakeInstaller(duration=[p["dur_s"] for p in attempts] or 0.0, exit_code=[p.get("codigo", 0) for p in attempts] or 0, installs=installs, removes=removes)
+
+class ReplayProcessor(TaskProcessor):
+    """TaskProcessor que reproduce una sesión grabada: mismas fases y códigos de salida, con la planificación y los ajustes actuales."""
+    def __init__(self, session, workers=None, settings=None, time_scale=1.0):
+        self.session, self.plan, self.time_scale = session, session["plan"], time_scale
+        system = SimulatedSystem(time_scale=time_scale)
+        for app, entry in self.plan.items():
+            system.add_installer(self._command(app), _installer_for(entry))
+            removed = entry.get("registro", {}).get("eliminadas")
+            if removed: system.registry_set(removed[0], "DisplayName", app)
+        history = DurationHistory()
+        for app, entry in self.plan.items():
+            if entry.get("dur_s") is not None: history.record(app, "tarea", entry["dur_s"])
+        settings = {**session.get("ajustes", {}), **(settings or {}), "staging_enabled": False, "metrics_enabled": False, "reconcile_enabled": False}
+        configs = {app: {"tipo": entry["tipo"], "dependencies": entry["deps"]} for app, entry in self.plan.items()}
+        order = [app for app in session["orden"] if not self.plan[app].get("omitida")]
+        super().__init__(None, configs, order, {}, Path("."), {}, settings=settings, history=history, reboot_backend=NullRebootBackend(), workers=workers or session.get("workers"), system=system)
+
+    def _command(self, app): return f"{app}.msi" if self.plan[app]["msi"] else f"{app}.exe"
+
+    def _uses_msi(self, app_key): return self.plan[app_key]["msi"]
+
+    def _get_task_handler(self, task_type): return self._replay_task
+
+    def _retry_policy(self):
+        policy = super()._retry_policy()
+        policy.base_delay, policy.max_delay = policy.base_delay * self.time_scale, policy.max_delay * self.time_scale
+        return policy
+
+    def _replay_task(self, app_key, config):
+        entry, launched = self.plan[app_key], False
+        for phase in entry.get("fases", []):
+            if phase["fase"] == "ejecucion" and not launched:
+                launched = True
+                if not self._run_command(self._command(app_key)): return False
+            elif phase["fase"] not in REGENERATED_PHASES:
+                with self._phase(phase["fase"]): time.sleep(phase["dur_s"] * self.time_scale)
+        if entry.get("ok") and app_key in self.session.get("reinicio", ()) and app_key not in self.reboot.apps: self.reboot.record(app_key, "sesión grabada")
+        return entry.get("ok", False)
+
+    def makespan(self):
+        """Duración del lote reproducido en segundos de la sesión original."""
+        batch = [e["dur"] for e in self.tracer.spans("lote") if e["name"] == "lote"]
+        return batch[0] / 1e6 / self.time_scale if batch and self.time_scale else None
+
+def estimate_makespan(session, workers):
+    """Estimación analítica (sin ejecutar) de la duración del lote con 'workers' tareas en paralelo."""
+    plan = {app: e for app, e in session["plan"].items() if not e.get("omitida")}
+    return simulate_makespan({a: set(e["deps"]) for a, e in plan.items()}, {a: e.get("dur_s", 0.0) for a, e in plan.items()}, workers)
+
+def replay(session, workers, settings=None, speed=1.0):
+    """Reproduce la sesión y devuelve (duración simulada en segundos, resultados)."""
+    processor = ReplayProcessor(session, workers, settings, time_scale=1.0 / speed)
+    results = processor.run()
+    return processor.makespan(), results
+
+def _parse_setting(text):
+    key, _, value = text.partition("=")
+    try: return key.strip(), json.loads(value)
+    except json.JSONDecodeError: return key.strip(), value
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m toolkit_lib.replay", description="Reproduce una sesión grabada con distintos ajustes del planificador.")
+    parser.add_argument("session", help="Archivo de sesión (.json.gz)")
+    parser.add_argument("--workers", default=None, help="Tareas en paralelo a probar, separadas por comas (por defecto, las de la sesión)")
+    parser.add_argument("--speed", type=float, default=60.0, help="Factor de aceleración (1 = tiempo real)")
+    parser.add_argument("--set", action="append", default=[], metavar="CLAVE=VALOR", help="Ajuste adicional (valor JSON), p. ej. defer_after_reboot=true")
+    args = parser.parse_args(argv)
+    logging.disable(logging.WARNING)
+    session = load_session(Path(args.session))
+    settings = dict(_parse_setting(s) for s in args.set)
+    counts = [int(w) for w in args.workers.split(",")] if args.workers else [session.get("workers", 1)]
+    print(f"Sesión de {session.get('equipo')} ({session.get('inicio')}): {len(session['plan'])} tareas, {session.get('workers')} en paralelo, {session.get('duracion_s', 0):.1f}s reales.")
+    print(f"{'paralelo':>9}{'estimado':>12}{'reproducido':>14}{'vs. real':>10}  resultado")
+    for workers in counts:
+        simulated, results = replay(session, workers, settings, args.speed)
+        states = [result_state(r) for r in results.values()]
+        change = (simulated - session["duracion_s"]) / session["duracion_s"] if session.get("duracion_s") and simulated else 0.0
+        print(f"{workers:>9}{estimate_makespan(session, workers):>11.1f}s{simulated or 0:>13.1f}s{change:>+10.0%}  {states.count('fallida')} fallidas, {states.count('reinicio_pendiente')} con reinicio")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+# --- START OF FILE toolkit_lib/reporting.py ---
+
+import sys
+import logging
+
+# Estado de cada resultado según el marcador con el que empieza su texto.
+RESULT_STATES = (("✅", "completada"), ("🔄", "reinicio_pendiente"), ("⏭️", "sin_cambios"), ("⏸️", "pospuesta"), ("⚠️", "advertencia"), ("❌", "fallida"))
+OK_STATES = ("completada", "reinicio_pendiente", "sin_cambios")
+
+def result_state(text):
+    return next((state for marker, state in RESULT_STATES if text.startswith(marker)), "fallida")
+
+class Reporter:
+    """
+    Interfaz entre el motor de tareas y quien lo presenta. Esta implementación es la neutra
+    (sin interfaz): no muestra nada y responde 'no' a todo lo que requiere a un usuario.
+    """
+    interactive = False
+
+    def call(self, fn):
+        """Ejecuta 'fn' en el contexto de la interfaz (el hilo principal en Tk)."""
+        fn()
+
+    def progress_start(self): pass
+    def progress_update(self, barra=None, status=None, porcentaje=None): pass
+    def progress_end(self): pass
+
+    def error(self, title, message): logging.error(f"{title}: {message}")
+    def warning(self, title, message): logging.warning(f"{title}: {message}")
+
+    def confirm_user_action(self, title, message): return False
+    def ask_destination(self, title, filename): return None
+    def confirm_restart(self, message): return False
+
+    def show_results(self, processor): pass
+
+class ConsoleReporter(Reporter):
+    """Salida por consola para el modo por lotes. Si no hay consola (ejecutable --windowed) solo queda el log."""
+    def __init__(self, stream=None, allow_restart=False):
+        self.stream, self.allow_restart, self._last = stream if stream is not None else sys.stdout, allow_restart, -1
+
+    def _print(self, text):
+        if self.stream is None: return
+        try: print(text, file=self.stream, flush=True)
+        except (OSError, ValueError): pass
+
+    def progress_update(self, barra=None, status=None, porcentaje=None):
+        step = int(barra or 0) // 5
+        if status and step != self._last: self._last = step; self._print(f"[{int(barra or 0):3d}%] {status}")
+
+    def error(self, title, message): super().error(title, message); self._print(f"ERROR: {title}: {message}")
+    def warning(self, title, message): super().warning(title, message); self._print(f"AVISO: {title}: {message}")
+
+    def confirm_restart(self, message):
+        self._print(message); self._print("Reinicio " + ("programado (--reboot)." if self.allow_restart else "pendiente (use --reboot para reiniciar automáticamente)."))
+        return self.allow_restart
+
+    def show_results(self, processor):
+        self._print("\nResultados:")
+        for res in sorted(processor.results.values()): self._print(f"  {res}")
+        timings = processor.timing_summary_lines()
+        if timings: self._print("\nTiempos por fase:\n" + "\n".join(timings))
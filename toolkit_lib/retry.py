@@ -0,0 +1,44 @@
+# --- START OF FILE toolkit_lib/retry.py ---
+
+OUTCOME_SUCCESS, OUTCOME_REBOOT, OUTCOME_RETRY, OUTCOME_FATAL = "exito", "reinicio", "reintentar", "fatal"
+OUTCOMES = (OUTCOME_SUCCESS, OUTCOME_REBOOT, OUTCOME_RETRY, OUTCOME_FATAL)
+
+# Códigos de salida habituales de Windows Installer y de los instaladores que lo imitan.
+DEFAULT_EXIT_CODES = {
+    0: OUTCOME_SUCCESS,
+    3010: OUTCOME_REBOOT,   # ERROR_SUCCESS_REBOOT_REQUIRED
+    1641: OUTCOME_REBOOT,   # ERROR_SUCCESS_REBOOT_INITIATED
+    1618: OUTCOME_RETRY,    # ERROR_INSTALL_ALREADY_RUNNING
+    1500: OUTCOME_RETRY,    # ERROR_INSTALL_ALREADY_RUNNING (versiones antiguas)
+    1601: OUTCOME_RETRY,    # ERROR_INSTALL_SERVICE_FAILURE
+    32: OUTCOME_RETRY,      # ERROR_SHARING_VIOLATION (archivo bloqueado)
+    33: OUTCOME_RETRY,      # ERROR_LOCK_VIOLATION
+}
+DEFAULT_MAX_ATTEMPTS, DEFAULT_BASE_DELAY, DEFAULT_MAX_DELAY = 3, 10.0, 120.0
+
+class RetryPolicy:
+    """Traduce códigos de salida a un resultado y calcula la espera (exponencial) antes de cada reintento."""
+    def __init__(self, exit_codes=None, max_attempts=DEFAULT_MAX_ATTEMPTS, base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY):
+        self.exit_codes = dict(DEFAULT_EXIT_CODES)
+        for code, outcome in (exit_codes or {}).items():
+            if outcome not in OUTCOMES: raise ValueError(f"Resultado '{outcome}' no válido para el código {code} (use {', '.join(OUTCOMES)}).")
+            self.exit_codes[int(code)] = outcome
+        self.max_attempts, self.base_delay, self.max_delay = max(1, int(max_attempts)), float(base_delay), float(max_delay)
+
+    def classify(self, code):
+        return self.exit_codes.get(code, OUTCOME_FATAL)
+
+    def delay(self, attempt):
+        """Espera antes del intento 'attempt + 1' (attempt empieza en 1)."""
+        return min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+
+    @classmethod
+    def from_config(cls, settings=None, app_config=None):
+        """
+        Política global ('retry_policy' en ajustes) con las excepciones de la app:
+        'exit_codes' ({"código": "exito|reinicio|reintentar|fatal"}) y 'max_reintentos'.
+        """
+        glob, app = dict((settings or {}).get("retry_policy") or {}), app_config or {}
+        codes = {**(glob.get("exit_codes") or {}), **(app.get("exit_codes") or {})}
+        attempts = app.get("max_reintentos", glob.get("max_reintentos", DEFAULT_MAX_ATTEMPTS - 1)) + 1
+        return cls(codes, attempts, glob.get("espera_inicial_s", DEFAULT_BASE_DELAY), glob.get("espera_maxima_s", DEFAULT_MAX_DELAY))
@@ -0,0 +1,58 @@
+# --- START OF FILE toolkit_lib/scheduling.py ---
+
+import heapq
+
+def critical_path_priorities(graph, durations):
+    """
+    'graph' es {tarea: {dependencias}}. Devuelve para cada tarea la duración del camino
+    más largo que empieza en ella (ella misma más la cadena de dependientes más lenta).
+    """
+    dependents = {t: [] for t in graph}
+    for t, deps in graph.items():
+        for d in deps:
+            if d in dependents: dependents[d].append(t)
+    memo = {}
+    def visit(t):
+        if t in memo: return memo[t]
+        memo[t] = 0.0  # corta los ciclos; priority_order los detecta después
+        memo[t] = durations.get(t, 0.0) + max((visit(c) for c in dependents[t]), default=0.0)
+        return memo[t]
+    for t in graph: visit(t)
+    return memo
+
+def priority_order(graph, durations):
+    """
+    Orden topológico que, entre las tareas listas, empieza siempre por la de mayor camino
+    crítico (planificación por lista LPT/camino crítico). Devuelve None si hay ciclos.
+    """
+    prio = critical_path_priorities(graph, durations)
+    pending = {t: len([d for d in deps if d in graph]) for t, deps in graph.items()}
+    dependents = {t: [] for t in graph}
+    for t, deps in graph.items():
+        for d in deps:
+            if d in dependents: dependents[d].append(t)
+    index = {t: i for i, t in enumerate(graph)}
+    ready = [(-prio[t], index[t], t) for t, n in pending.items() if n == 0]; heapq.heapify(ready)
+    order = []
+    while ready:
+        _, _, t = heapq.heappop(ready); order.append(t)
+        for c in dependents[t]:
+            pending[c] -= 1
+            if pending[c] == 0: heapq.heappush(ready, (-prio[c], index[c], c))
+    return order if len(order) == len(graph) else None
+
+def simulate_makespan(graph, durations, workers=1):
+    """Duración total estimada del lote ejecutando con 'workers' tareas a la vez en orden de prioridad."""
+    order = priority_order(graph, durations)
+    if order is None: return None
+    prio = critical_path_priorities(graph, durations); finish, running, clock = {}, [], 0.0
+    pending = list(order)
+    while pending or running:
+        started = True
+        while started and len(running) < workers:
+            started = False
+            for t in pending:
+                if all(d in finish for d in graph[t] if d in graph):
+                    heapq.heappush(running, (clock + durations.get(t, 0.0), -prio[t], t)); pending.remove(t); started = True; break
+        end, _, t = heapq.heappop(running); clock = end; finish[t] = end
+    return clock
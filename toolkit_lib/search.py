@@ -0,0 +1,86 @@
+# --- START OF FILE toolkit_lib/search.py ---
+
+import re
+import heapq
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+# Orígenes de los documentos de la búsqueda global.
+SOURCE_APP, SOURCE_INSTALLED, SOURCE_DRIVER, SOURCE_LOG = "app", "instalado", "driver", "log"
+# Peso por origen al ordenar resultados con la misma similitud (el log suele ser ruido).
+SOURCE_WEIGHTS = {SOURCE_APP: 1.0, SOURCE_INSTALLED: 1.0, SOURCE_DRIVER: 1.0, SOURCE_LOG: 0.8}
+# Fracción mínima de los trigramas de la consulta que debe contener un documento.
+MIN_SIMILARITY = 0.4
+
+_WORD = re.compile(r"\w+")
+
+def fold_text(text):
+    """Minúsculas y sin acentos, para comparar en búsquedas ('categoria' encuentra 'Categoría')."""
+    return "".join(c for c in unicodedata.normalize("NFKD", str(text).lower()) if not unicodedata.combining(c))
+
+def trigrams(folded):
+    """Trigramas de cada palabra con relleno, como pg_trgm ('vlc' -> '  v', ' vl', 'vlc', 'lc ')."""
+    grams = set()
+    for word in _WORD.findall(folded):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+class TrigramIndex:
+    """
+    Índice invertido de trigramas para la búsqueda global aproximada (tolera erratas y
+    acentos). Cada documento es (origen, clave) con el texto indexado y una etiqueta para
+    mostrar; sync() reindexa solo los documentos de un origen cuyo texto cambió.
+    """
+    def __init__(self):
+        self._docs, self._postings, self._sources = {}, defaultdict(set), defaultdict(set)
+        self._lock = threading.Lock()
+
+    def __len__(self): return len(self._docs)
+
+    def _unpost(self, doc, grams):
+        for gram in grams:
+            posting = self._postings[gram]; posting.discard(doc)
+            if not posting: del self._postings[gram]
+
+    def add(self, source, key, text, label=None):
+        doc, folded = (source, key), fold_text(text)
+        with self._lock:
+            old = self._docs.get(doc)
+            if old and old[0] == folded: self._docs[doc] = (folded, old[1], label or str(key)); return
+            if old: self._unpost(doc, old[1])
+            grams = trigrams(folded)
+            self._docs[doc] = (folded, grams, label or str(key)); self._sources[source].add(key)
+            for gram in grams: self._postings[gram].add(doc)
+
+    def remove(self, source, key):
+        with self._lock:
+            old = self._docs.pop((source, key), None)
+            if old: self._unpost((source, key), old[1]); self._sources[source].discard(key)
+
+    def sync(self, source, entries):
+        """Deja el origen con exactamente 'entries' ({clave: (texto, etiqueta)})."""
+        with self._lock: stale = [k for k in self._sources.get(source, ()) if k not in entries]
+        for key in stale: self.remove(source, key)
+        for key, (text, label) in entries.items(): self.add(source, key, text, label)
+
+    def search(self, query, limit=20):
+        """[(puntuación, origen, clave, etiqueta)] de mayor a menor similitud."""
+        needle = fold_text(query).strip(); wanted = trigrams(needle)
+        if not wanted: return []
+        threshold, scored = max(1, int(len(wanted) * MIN_SIMILARITY)), []
+        with self._lock:
+            postings = sorted((self._postings.get(gram, set()) for gram in wanted), key=len)
+            # Quien tenga 'threshold' trigramas está en alguna de las len - threshold + 1 listas más cortas: no se recorren las largas.
+            short, long = postings[:len(postings) - threshold + 1], postings[len(postings) - threshold + 1:]
+            shared = Counter()
+            for posting in short: shared.update(posting)
+            for doc, count in shared.items():
+                count += sum(doc in posting for posting in long)
+                if count < threshold: continue
+                folded, grams, label = self._docs[doc]
+                # Cobertura de la consulta, más un poco de precisión (prefiere textos cortos) y un extra si aparece literal.
+                score = count / len(wanted) + 0.25 * count / len(grams) + (0.5 if needle in folded else 0.0)
+                scored.append((round(score * SOURCE_WEIGHTS.get(doc[0], 1.0), 4), doc[0], doc[1], label))
+        return heapq.nlargest(limit, scored, key=lambda hit: hit[0])
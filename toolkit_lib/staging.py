@@ -0,0 +1,137 @@
+# --- START OF FILE toolkit_lib/staging.py ---
+
+import os
+import shutil
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from queue import Queue, Full
+from concurrent.futures import ThreadPoolExecutor
+
+from .metrics import BYTES_TOTAL
+
+# Fuera de %TEMP%: la tarea de limpieza de temporales no debe borrar instaladores que el lote va a ejecutar.
+DEFAULT_STAGING_DIR = Path(os.getenv("LOCALAPPDATA") or Path.home() / ".cache") / "PlayerToolkit" / "staging"
+BUFFER_SIZE = 4 * 1024 * 1024
+READ_AHEAD_BUFFERS = 4
+FREE_SPACE_MARGIN = 512 * 1024 * 1024
+
+class StagingError(Exception):
+    """No se puede preparar la copia local (p. ej. falta espacio en disco)."""
+
+def _is_partial(path: Path): return path.name.endswith((".part", ".part.etag"))
+
+def staging_sources(app_dir: Path, filename):
+    """
+    Archivos a copiar para ejecutar 'filename' en local: la carpeta entera de la app salvo las
+    descargas a medias. Los instaladores que encadenan otros (setup.exe con su .msi, requisitos
+    previos del fabricante) necesitan tener a su lado los mismos archivos que en 'Programas'.
+    """
+    main = app_dir / filename
+    return [main] + [item for item in app_dir.iterdir() if item != main and not _is_partial(item)]
+
+def same_device(a: Path, b: Path):
+    """True si 'a' y 'b' (o su carpeta existente más cercana) están en el mismo volumen."""
+    def device(path):
+        path = Path(path).resolve()
+        while not path.exists() and path != path.parent: path = path.parent
+        return os.stat(path).st_dev
+    return device(a) == device(b)
+
+def _tree_size(path: Path):
+    if path.is_file(): return path.stat().st_size
+    return sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
+
+def copy_with_read_ahead(src: Path, dest: Path):
+    """Copia 'src' con un hilo lector adelantado (buffers grandes) y devuelve el SHA-256 de lo leído."""
+    buffers, h, error, stop = Queue(maxsize=READ_AHEAD_BUFFERS), hashlib.sha256(), [], threading.Event()
+    def put(item):
+        # Si la escritura falla, 'stop' libera al lector para que cierre el origen (p. ej. el USB) y termine.
+        while not stop.is_set():
+            try: buffers.put(item, timeout=0.1); return True
+            except Full: pass
+        return False
+    def reader():
+        try:
+            with open(src, 'rb') as f:
+                for chunk in iter(lambda: f.read(BUFFER_SIZE), b""):
+                    if not put(chunk): return
+        except OSError as e: error.append(e)
+        finally: put(None)
+    t = threading.Thread(target=reader, name="copia_adelantada", daemon=True); t.start()
+    try:
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        with open(dest, 'wb') as out:
+            while (chunk := buffers.get()) is not None: out.write(chunk); h.update(chunk)
+    finally:
+        stop.set(); t.join()
+    if error: raise error[0]
+    shutil.copystat(src, dest)
+    return h.hexdigest()
+
+def _verify(dest: Path, size, sha256):
+    if dest.stat().st_size != size: return False
+    h = hashlib.sha256()
+    with open(dest, 'rb') as f:
+        for chunk in iter(lambda: f.read(BUFFER_SIZE), b""): h.update(chunk)
+    return h.hexdigest() == sha256
+
+class InstallerStager:
+    """
+    Copia a disco local, en segundo plano y en el orden del plan, los instaladores que se
+    van a ejecutar desde un medio lento (USB). Cada tarea espera solo a su propia copia,
+    así que las primeras instalaciones se solapan con la copia de las siguientes.
+    """
+    def __init__(self, cache_dir: Path = None, workers=2, fingerprints=None, log=None):
+        # Subcarpeta propia por lote para que dos lotes no se pisen al limpiar.
+        self.cache_dir, self.fingerprints = Path(cache_dir or DEFAULT_STAGING_DIR) / f"lote_{os.getpid()}_{id(self):x}", fingerprints
+        self.log = log or (lambda msg, level="INFO": logging.info(msg))
+        self.executor, self.workers, self.futures, self.items = None, workers, {}, []
+
+    def add(self, key, app_dir: Path, filename):
+        self.items.append((key, Path(app_dir), filename))
+
+    def required_bytes(self):
+        return sum(_tree_size(p) for _, app_dir, filename in self.items for p in staging_sources(app_dir, filename))
+
+    def start(self):
+        if not self.items: return
+        needed = self.required_bytes()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        free = shutil.disk_usage(self.cache_dir).free
+        if needed + FREE_SPACE_MARGIN > free:
+            raise StagingError(f"Espacio insuficiente para la copia local: se necesitan {needed/1024**2:.0f}MB y hay {free/1024**2:.0f}MB libres.")
+        self.log(f"Copiando {len(self.items)} instaladores ({needed/1024**2:.0f}MB) a '{self.cache_dir}' en segundo plano.")
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="staging")
+        for key, app_dir, filename in self.items:
+            self.futures[key] = self.executor.submit(self._stage_one, key, app_dir, filename)
+
+    def _stage_one(self, key, app_dir, filename):
+        target_dir = self.cache_dir / key
+        for src in staging_sources(app_dir, filename):
+            files = [src] if src.is_file() else [f for f in src.rglob('*') if f.is_file() and not _is_partial(f)]
+            for f in files:
+                dest = target_dir / f.relative_to(app_dir)
+                size, digest = f.stat().st_size, copy_with_read_ahead(f, dest)
+                known = self.fingerprints.lookup(f) if self.fingerprints else None
+                if (known and known != digest) or not _verify(dest, size, digest):
+                    raise StagingError(f"La copia local de '{f.name}' no coincide con el original.")
+                if self.fingerprints and not known: self.fingerprints.record(f, digest)
+                BYTES_TOTAL.inc(size, origen="copia_local")
+        return target_dir / filename
+
+    def get(self, key):
+        """Ruta local del instalador (esperando a que termine su copia), o None si no se pudo preparar."""
+        future = self.futures.get(key)
+        if future is None: return None
+        try: return future.result()
+        except (OSError, StagingError) as e:
+            self.log(f"No se pudo usar la copia local de '{key}' ({e}). Se ejecutará desde el origen.", "WARNING"); return None
+
+    def cleanup(self):
+        if self.executor:
+            for future in self.futures.values(): future.cancel()
+            self.executor.shutdown(wait=True)
+        self.futures.clear(); self.items.clear()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
@@ -0,0 +1,206 @@
+# --- START OF FILE toolkit_lib/system.py ---
+
+import os
+import re
+import time
+import logging
+import threading
+import subprocess
+from pathlib import PureWindowsPath
+
+try: import winreg
+except ImportError: winreg = None
+
+UNINSTALL_ROOTS = (r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall", r"SOFTWARE\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall")
+
+class ProcessResult:
+    def __init__(self, returncode, stdout="", stderr=""):
+        self.returncode, self.stdout, self.stderr = returncode, stdout, stderr
+
+class WindowsSystem:
+    """
+    Acceso real al sistema: registro (HKLM), lanzamiento de procesos, comprobación de
+    privilegios y apertura con el shell. Todo lo que toca Windows pasa por aquí.
+    """
+    simulated = False
+
+    def registry_subkeys(self, path):
+        """Nombres de las subclaves de HKLM\\path. FileNotFoundError si no existe."""
+        with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, path) as key:
+            return [winreg.EnumKey(key, i) for i in range(winreg.QueryInfoKey(key)[0])]
+
+    def registry_values(self, path):
+        """{nombre: dato} de HKLM\\path. OSError si no existe."""
+        with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, path) as key:
+            values = {}
+            for i in range(winreg.QueryInfoKey(key)[1]):
+                try: name, data, _ = winreg.EnumValue(key, i); values[name] = data
+                except OSError: continue
+            return values
+
+    def registry_set(self, path, name, data):
+        with winreg.CreateKeyEx(winreg.HKEY_LOCAL_MACHINE, path, 0, winreg.KEY_SET_VALUE) as key: winreg.SetValueEx(key, name, 0, winreg.REG_SZ, data)
+
+    def registry_delete(self, path, name):
+        with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, path, 0, winreg.KEY_SET_VALUE) as key: winreg.DeleteValue(key, name)
+
+    def run(self, cmd, wait=True, timeout=None):
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8', errors='replace', creationflags=subprocess.CREATE_NO_WINDOW)
+        if not wait: return ProcessResult(0)
+        stdout, stderr = proc.communicate(timeout=timeout)
+        return ProcessResult(proc.returncode, stdout, stderr)
+
+    def is_admin(self):
+        try:
+            import ctypes
+            return bool(ctypes.windll.shell32.IsUserAnAdmin())
+        except Exception: return False
+
+    def shell_open(self, path): os.startfile(path)
+
+class FakeInstaller:
+    """
+    Instalador simulado: tarda 'duration' segundos, sale con 'exit_code' y aplica sus efectos
+    en el registro simulado ('installs': entrada de desinstalación a crear; 'removes': clave a borrar;
+    'reboot': deja marcado un reinicio pendiente). 'duration' y 'exit_code' admiten una lista con un
+    valor por ejecución (el último se repite), p. ej. exit_code=[1618, 0] para simular un reintento.
+    """
+    def __init__(self, duration=0.0, exit_code=0, installs=None, removes=None, reboot=False, stdout=""):
+        self.duration, self.exit_code, self.installs, self.removes, self.reboot, self.stdout = duration, exit_code, installs, removes, reboot, stdout
+        self.runs = 0
+
+    def next_run(self):
+        """(duración, código) de la siguiente ejecución."""
+        pick = lambda v: (v[min(self.runs, len(v) - 1)] if v else 0) if isinstance(v, (list, tuple)) else v
+        run = pick(self.duration), pick(self.exit_code); self.runs += 1
+        return run
+
+class SimulatedSystem:
+    """
+    Windows en memoria y determinista para pruebas de carga y benchmarks en cualquier plataforma.
+    'time_scale' multiplica las duraciones (0 = instantáneo). Los procesos se resuelven por la
+    ruta o el nombre de archivo de cualquier elemento de la línea de comandos (p. ej. 'setup.exe'
+    o el código de producto de un 'msiexec /x {...}').
+    """
+    simulated = True
+    PENDING_RENAMES = (r"SYSTEM\CurrentControlSet\Control\Session Manager", "PendingFileRenameOperations")
+
+    def __init__(self, admin=True, time_scale=1.0, default=None):
+        self.admin, self.time_scale, self.default = admin, time_scale, default or FakeInstaller()
+        self._keys, self._children, self._installers, self._lock = {}, {}, {}, threading.RLock()
+        self.launches, self.opened = [], []
+
+    # --- Registro ---
+    @staticmethod
+    def _norm(path): return str(path).strip("\\").lower()
+
+    def _key(self, path, create=False):
+        norm = self._norm(path)
+        if norm not in self._keys:
+            if not create: raise FileNotFoundError(path)
+            parent, _, name = str(path).strip("\\").rpartition("\\")
+            self._keys[norm] = {}; self._children[norm] = {}
+            if parent: self._key(parent, create=True); self._children[self._norm(parent)][norm] = name
+        return self._keys[norm]
+
+    def registry_subkeys(self, path):
+        with self._lock:
+            self._key(path)
+            return sorted(self._children[self._norm(path)].values(), key=str.lower)
+
+    def registry_values(self, path):
+        with self._lock: return dict(self._key(path))
+
+    def registry_set(self, path, name, data):
+        with self._lock: self._key(path, create=True)[name] = data
+
+    def registry_delete(self, path, name):
+        with self._lock:
+            values = self._key(path)
+            if name not in values: raise FileNotFoundError(name)
+            del values[name]
+
+    def delete_key(self, path):
+        with self._lock:
+            norm = self._norm(path)
+            if norm not in self._keys: return
+            for child in list(self._children[norm]): self.delete_key(child)
+            del self._keys[norm], self._children[norm]
+            parent = norm.rpartition("\\")[0]
+            if parent in self._children: self._children[parent].pop(norm, None)
+
+    def add_uninstall_entry(self, name, version="", uninstall_string=None, key_name=None, install_date=None, wow64=False, uninstaller=None):
+        """Crea una entrada de 'Programas y características' y registra su desinstalador simulado (que la borra)."""
+        key_name = key_name or name
+        path = f"{UNINSTALL_ROOTS[1 if wow64 else 0]}\\{key_name}"
+        uninstall_string = uninstall_string or f"C:\\Program Files\\{key_name}\\uninstall.exe"
+        values = {"DisplayName": name, "UninstallString": uninstall_string}
+        if version: values["DisplayVersion"] = version
+        if install_date: values["InstallDate"] = install_date
+        with self._lock:
+            self._key(path, create=True).update(values)
+            self.add_installer(self._command_keys(uninstall_string)[0], uninstaller or FakeInstaller(removes=path))
+        return path
+
+    # --- Procesos ---
+    @staticmethod
+    def _command_keys(command):
+        """Claves con las que se busca un proceso: el código de producto si es msiexec; si no, la ruta completa y el nombre del ejecutable."""
+        command = str(command).replace('"', '')
+        product = re.search(r'\{[A-Fa-f0-9-]{36}\}', command) if "msiexec" in command.lower() else None
+        if product: return [product.group(0).lower()]
+        exe = command.split(" /")[0].strip()
+        return [exe.lower(), PureWindowsPath(exe).name.lower()]
+
+    def add_installer(self, name, installer: FakeInstaller):
+        with self._lock: self._installers[name.lower()] = installer
+
+    def _resolve(self, cmd):
+        with self._lock:
+            for part in cmd:
+                installer = next((self._installers[k] for k in self._command_keys(part) if k in self._installers), None)
+                if installer: return installer
+        return self.default
+
+    def run(self, cmd, wait=True, timeout=None):
+        installer = self._resolve(cmd)
+        with self._lock: self.launches.append(list(map(str, cmd)))
+        if not wait: threading.Thread(target=self._execute, args=(installer, None), daemon=True).start(); return ProcessResult(0)
+        return self._execute(installer, timeout)
+
+    def _execute(self, installer, timeout):
+        with self._lock: duration, exit_code = installer.next_run()
+        delay = duration * self.time_scale
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout); raise subprocess.TimeoutExpired("simulado", timeout)
+        if delay > 0: time.sleep(delay)
+        with self._lock:
+            if installer.removes: self.delete_key(installer.removes)
+            if installer.installs: self.add_uninstall_entry(**installer.installs)
+            if installer.reboot:
+                values = self._key(self.PENDING_RENAMES[0], create=True)
+                values[self.PENDING_RENAMES[1]] = list(values.get(self.PENDING_RENAMES[1], [])) + ["\\??\\C:\\simulado.tmp", ""]
+        return ProcessResult(exit_code, installer.stdout)
+
+    def is_admin(self): return self.admin
+
+    def shell_open(self, path):
+        with self._lock: self.opened.append(str(path))
+        self.run([str(path)], wait=False)
+
+_system, _system_lock = None, threading.Lock()
+
+def get_system():
+    """Backend del proceso: el real en Windows y el simulado (vacío) en cualquier otra plataforma."""
+    global _system
+    with _system_lock:
+        if _system is None:
+            _system = WindowsSystem() if os.name == "nt" and winreg is not None else SimulatedSystem()
+            if _system.simulated: logging.warning("Plataforma sin registro de Windows: se usa el sistema simulado.")
+        return _system
+
+def set_system(system):
+    """Sustituye el backend (pruebas, benchmarks o reproducción de sesiones). Devuelve el anterior."""
+    global _system
+    with _system_lock: previous, _system = _system, system
+    return previous
@@ -1,9 +1,6 @@
 # --- START OF FILE toolkit_lib/tasks.py ---
 
-import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
 import os
-import subprocess
 import logging
 import shutil
 import requests # type: ignore
@@ -15,66 +12,94 @@ import threading
 import time
 
 from .config import *
+from .variables import compile_variables
+from .distribution import fetch_from_peer
+from .copyengine import copy_path, copy_file
+from .staging import InstallerStager, StagingError, DEFAULT_STAGING_DIR, same_device
+from .tracing import Tracer
+from . import metrics
+from .history import DurationHistory
+from .scheduling import priority_order, simulate_makespan
+from .groups import dependency_closure
+from .reconcile import ReconciliationStore, RECONCILABLE_TYPES, task_fingerprint, find_installed
+from .reboot import RebootTracker, REBOOT_EXIT_CODES, schedule_restart, default_backend
+from .journal import STATE_RUNNING, STATE_DONE, STATE_FAILED, STATE_DEFERRED, register_run_once
+from .utils import uninstall_entry_exists
+from .installer_detect import detect_framework
+from .installer_meta import InstallerMetadataCache
+from .retry import RetryPolicy, OUTCOME_SUCCESS, OUTCOME_REBOOT, OUTCOME_RETRY
+from .reporting import Reporter
+from .system import get_system
+
+# Campos de la configuración que admiten %VARIABLES% y se validan antes de empezar un lote.
+VARIABLE_FIELDS = ("args_instalacion", "uninstall_string", "script_path", "task_command", "reg_path", "reg_value")
+
+# msiexec no admite dos instalaciones a la vez (error 1618): se serializan en todo el proceso.
+_MSI_LOCK = threading.Lock()
+# Tiempo máximo para que desaparezca la entrada del registro tras desinstalar (NSIS/Inno se relanzan desde %TEMP%).
+UNINSTALL_VERIFY_TIMEOUT = 60
 
 def _expand_vars(value, custom_vars=None):
-    if not isinstance(value, str): return value
-    expanded_value = os.path.expandvars(value)
-    if custom_vars:
-        for var, var_value in custom_vars.items():
-            expanded_value = expanded_value.replace(f"%{var}%", var_value)
-    return expanded_value
-
-class ProgressManager:
-    def __init__(self, root_gui):
-        self.root, self.window, self.bar, self.label_status, self.label_percentage = root_gui, None, None, None, None
-
-    def create(self):
-        if self.window and self.window.winfo_exists(): return
-        self.window = tk.Toplevel(self.root)
-        self.window.title("Procesando Tareas..."); self.window.geometry("450x150"); self.window.resizable(False, False)
-        self.window.transient(self.root); self.window.protocol("WM_DELETE_WINDOW", lambda: None); self.window.grab_set()
-        frame = ttk.Frame(self.window, padding="15"); frame.pack(expand=True, fill=tk.BOTH)
-        self.label_status = ttk.Label(frame, text="Iniciando...", font=("Segoe UI", 10), wraplength=400)
-        self.label_status.pack(pady=(0, 10), fill="x")
-        self.bar = ttk.Progressbar(frame, mode="determinate"); self.bar.pack(pady=10, fill="x", ipady=4)
-        self.label_percentage = ttk.Label(frame, text="", font=("Segoe UI", 9, "bold"), anchor="e")
-        self.label_percentage.pack(pady=5, fill="x")
-
-    def update(self, barra=None, status=None, porcentaje=None):
-        if not (self.window and self.window.winfo_exists()): return
-        if barra is not None: self.bar['value'] = barra
-        if status: self.label_status.config(text=status)
-        if porcentaje is not None: self.label_percentage.config(text=porcentaje)
-        self.window.update_idletasks()
-
-    def destroy(self):
-        if self.window and self.window.winfo_exists(): self.window.destroy()
-
-    def release_focus(self):
-        if self.window and self.window.winfo_exists(): self.window.grab_release()
-
-    def regain_focus(self):
-        if self.window and self.window.winfo_exists(): self.window.grab_set()
+    return compile_variables(custom_vars).expand(value)
+
+def _format_eta(seconds):
+    seconds = int(round(seconds))
+    return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m" if seconds >= 3600 else f"{seconds // 60}m {seconds % 60:02d}s"
 
 class TaskProcessor:
-    def __init__(self, root_gui, app_configs, selected_apps, extra_options, programas_dir, custom_variables, log_queue: Queue, ui_update_callback=None, completion_callback=None):
-        self.root, self.app_configs, self.selected_apps, self.extra_options = root_gui, app_configs, selected_apps, extra_options
-        self.programas_dir, self.custom_variables, self.pm = programas_dir, custom_variables, ProgressManager(self.root)
+    """
+    Motor de ejecución de lotes, sin dependencias de interfaz: todo lo que se muestra o se
+    pregunta al usuario pasa por 'reporter' (TkReporter en la aplicación, ConsoleReporter en la CLI).
+    """
+    def __init__(self, reporter: Reporter, app_configs, selected_apps, extra_options, programas_dir, custom_variables, log_queue: Queue = None, ui_update_callback=None, completion_callback=None, settings=None, fingerprints=None, tracer=None, history=None, inventory=None, reconciliation=None, reboot_backend=None, journal=None, workers=None, system=None, recorder=None):
+        self.reporter, self.app_configs, self.selected_apps, self.extra_options = reporter or Reporter(), app_configs, selected_apps, extra_options
+        self.programas_dir, self.custom_variables = programas_dir, custom_variables
+        self.expander = compile_variables(custom_variables)
         self.results, self.log_queue, self.ui_update_callback = {}, log_queue, ui_update_callback
-        self.completion_callback = completion_callback
+        self.completion_callback, self.settings = completion_callback, settings or {}
+        self.fingerprints, self.stager = fingerprints, None
+        self.tracer, self._local = tracer or Tracer(), threading.local()
+        if self.settings.get("metrics_enabled", True) and metrics.record_span not in self.tracer.listeners: self.tracer.listeners.append(metrics.record_span)
+        self.history = history or DurationHistory(); self.tracer.listeners.append(self.history.span_listener)
+        self.graph, self.durations, self.workers = {}, {}, max(1, int(workers or self.settings.get("max_parallel_tasks", 1)))
+        self.inventory, self.reconciliation, self._task_fingerprints = inventory, reconciliation, {}
+        self.system = system or get_system()
+        self.reboot, self._deferred, self.journal = RebootTracker(reboot_backend or default_backend(self.system)), set(), journal
+        self._retries, self.recorder = {}, recorder
+        self.planning_error = None  # motivo por el que el lote no llegó a empezar (p. ej. una dependencia circular)
+
+    @property
+    def current_task(self): return getattr(self._local, "task", None)
+
+    @current_task.setter
+    def current_task(self, value): self._local.task = value
 
     def _log(self, message, level="INFO"):
-        logging.info(message); self.log_queue.put((level, message))
+        logging.info(message)
+        if self.log_queue is not None: self.log_queue.put((level, message))
 
     def _safe_ui_update(self, *args, **kwargs):
-        if self.ui_update_callback: self.root.after(0, lambda: self.ui_update_callback(*args, **kwargs))
+        if self.ui_update_callback: self.reporter.call(lambda: self.ui_update_callback(*args, **kwargs))
     
     def _resolve_dependencies_sequentially(self):
-        graph = {app: set(self.app_configs.get(app, {}).get("dependencies", [])) for app in self.selected_apps}
+        # Las dependencias no seleccionadas se añaden al lote, igual que en la pestaña de aplicaciones y en los grupos.
+        # Al reanudar un lote (p. ej. las tareas pospuestas tras el reinicio) no se repiten las dependencias ya completadas.
+        closure = dependency_closure(self.selected_apps, self.app_configs)
+        done = {a for a in closure if a not in self.selected_apps and self.journal and self.journal.state(a) == STATE_DONE}
+        if done: self._log(f"Dependencias ya completadas en este lote: {', '.join(sorted(done))}")
+        # Como en la pestaña de aplicaciones, no se añaden las ya instaladas ni las que no tienen instalador.
+        for app in [a for a in closure if a not in self.selected_apps and a not in done]:
+            reason = self._skip_dependency_reason(app)
+            if reason: self._log(f"Dependencia '{app}' no añadida: {reason}."); done.add(app)
+        closure = [a for a in closure if a not in done]
+        added = [a for a in closure if a not in self.selected_apps]
+        if added: self._log(f"Se añaden dependencias no seleccionadas: {', '.join(added)}", "WARNING")
+        self.selected_apps = closure
+        graph = {app: set(self.app_configs.get(app, {}).get("dependencies", [])) - done for app in self.selected_apps}
         for app, deps in graph.items():
             for dep in list(deps):
-                if dep not in self.selected_apps:
-                    self._log(f"Advertencia: Dependencia '{dep}' de '{app}' no seleccionada. Ignorando.", "WARNING"); deps.remove(dep)
+                if dep not in self.app_configs:
+                    self._log(f"Advertencia: Dependencia '{dep}' de '{app}' no configurada. Ignorando.", "WARNING"); deps.remove(dep)
         ordered_list, visited = [], set()
         def visit(app):
             if app in visited: return True
@@ -87,35 +112,227 @@ class TaskProcessor:
         visiting = set()
         for app in self.selected_apps:
             if app not in visited:
-                if not visit(app): messagebox.showerror("Error de Dependencias", "Se detectó una dependencia circular."); return None
-        return ordered_list
+                if not visit(app):
+                    self.planning_error = f"Se detectó una dependencia circular con '{app}'."
+                    self.reporter.error("Error de Dependencias", self.planning_error); return None
+        # Entre las tareas listas se empieza por la de camino crítico más largo según el historial.
+        self.graph = graph
+        self.durations = {app: self.history.estimate(app, self.app_configs.get(app, {}).get("tipo")) for app in ordered_list}
+        return priority_order({app: graph[app] for app in ordered_list}, self.durations) or ordered_list
+
+    def _skip_dependency_reason(self, app):
+        """Motivo para no añadir la dependencia 'app' al lote (None si se añade). Elige su instalador igual que la pestaña de aplicaciones."""
+        config = self._effective_config(app)
+        installed = find_installed(self.inventory, config.get("uninstall_key"))
+        if installed: return f"ya instalada ({' '.join(filter(None, installed))})"
+        if config.get("tipo") not in (TASK_TYPE_LOCAL_INSTALL, TASK_TYPE_MANUAL_ASSISTED) or config.get("exe_filename"): return None
+        app_dir = self.programas_dir / app
+        found = sorted(f.name for ext in INSTALLER_EXTENSIONS for f in app_dir.glob(f"*{ext}")) if app_dir.is_dir() else []
+        if found: filename = found[0] if len(found) == 1 else InstallerMetadataCache().newest(app_dir, found)
+        elif config.get("url"): filename = Path(config["url"]).name
+        else: return "no se encontró su instalador"
+        self.extra_options = {**self.extra_options, app: {**self.extra_options.get(app, {}), "exe_filename": filename}}
+        return None
+
+    def _phase(self, name, **args):
+        return self.tracer.span(name, "fase", app=self.current_task, **args)
 
     def run(self):
-        self.root.after(0, self.pm.create)
-        tasks_to_run = self._resolve_dependencies_sequentially()
-        if tasks_to_run is None: self.root.after(0, self.pm.destroy); return
+        """Ejecuta el lote y devuelve {app: texto del resultado}."""
+        self.reporter.progress_start()
+        with self.tracer.span("planificacion", "lote"):
+            tasks_to_run = self._resolve_dependencies_sequentially()
+            if tasks_to_run is None: self.reporter.progress_end(); return self.results
+            tasks_to_run = self._check_unresolved_variables(tasks_to_run)
+            tasks_to_run = self._skip_satisfied(tasks_to_run)
+        with self.tracer.span("inicio_copia_local", "lote"): self._start_staging(tasks_to_run)
+        self.reboot.start()
+        if self.journal: self.journal.begin(tasks_to_run, {t: self._effective_config(t) for t in tasks_to_run})
+        if self.recorder: self.recorder.begin(self, tasks_to_run)
         total_tasks = len(tasks_to_run)
-        for i, app_key in enumerate(tasks_to_run):
-            self._execute_task(app_key)
-            progress = ((i + 1) / total_tasks) * 100
-            self.root.after(0, lambda p=progress, idx=i: self.pm.update(barra=p, status=f"Completadas {idx+1}/{total_tasks} tareas...", porcentaje=f"{int(p)}%"))
-        self.root.after(0, self.pm.destroy); self.root.after(10, self._show_results_log)
-        if self.completion_callback: self.root.after(100, self.completion_callback)
+        self._progress = {"order": tasks_to_run, "done": set(), "running": {}, "stop": threading.Event()}
+        estimate = simulate_makespan({t: self.graph.get(t, set()) for t in tasks_to_run}, self.durations, self.workers)
+        if estimate: self._log(f"Duración estimada del lote: {_format_eta(estimate)} ({total_tasks} tareas, {self.workers} en paralelo).")
+        ticker = threading.Thread(target=self._progress_ticker, daemon=True); ticker.start()
+        try:
+            with self.tracer.span("lote", "lote", tareas=total_tasks, estimado_s=estimate):
+                if self.workers > 1: self._run_parallel(tasks_to_run)
+                else:
+                    for app_key in tasks_to_run: self._run_tracked(app_key)
+        finally:
+            self._progress["stop"].set()
+            if self.stager:
+                with self.tracer.span("limpieza_copia_local", "lote"): self.stager.cleanup()
+            self.history.save(); self._write_metrics()
+            if self.journal: self.journal.finish()
+            if self.reconciliation: self.reconciliation.save()
+            if self.recorder: self.recorder.finish(self)
+        self.reporter.progress_end(); self.reporter.show_results(self)
+        if self.completion_callback: self.reporter.call(self.completion_callback)
+        if self.reboot.required: self._prompt_restart()
+        return self.results
+
+    def _run_tracked(self, app_key):
+        self._progress["running"][app_key] = time.monotonic(); ok = False
+        if self.journal: self.journal.mark(app_key, STATE_RUNNING)
+        try: ok = False if self._defer_if_reboot_pending(app_key) else self._execute_task(app_key); return ok
+        finally:
+            if self.journal: self.journal.mark(app_key, STATE_DONE if ok else STATE_DEFERRED if app_key in self._deferred else STATE_FAILED, self.results.get(app_key))
+            self._progress["running"].pop(app_key, None); self._progress["done"].add(app_key); self._report_progress()
+
+    def _uses_msi(self, app_key):
+        config = self._effective_config(app_key)
+        if config.get("tipo") == TASK_TYPE_UNINSTALL: return "msiexec" in str(config.get("uninstall_string") or "").lower()
+        return str(config.get("exe_filename") or "").lower().endswith(".msi")
+
+    def _run_parallel(self, tasks):
+        """
+        Ejecuta hasta 'workers' tareas a la vez respetando dependencias y la prioridad de 'tasks'.
+        Las tareas MSI van por un único carril para no ocupar hilos esperando a _MSI_LOCK.
+        """
+        pending, running = list(tasks), {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="tarea") as pool:
+            while pending or running:
+                for app_key in [t for t in pending if all(d in self._progress["done"] for d in self.graph.get(t, ()) if d in tasks)]:
+                    if len(running) >= self.workers: break
+                    if self._uses_msi(app_key) and any(self._uses_msi(r) for r in running.values()): continue
+                    pending.remove(app_key); running[pool.submit(self._run_tracked, app_key)] = app_key
+                for future in as_completed(list(running)):
+                    running.pop(future); future.result(); break
+
+    def _remaining_seconds(self):
+        now, p = time.monotonic(), self._progress
+        work = sum(self.durations.get(t, 0) for t in p["order"] if t not in p["done"] and t not in p["running"])
+        work += sum(max(0.0, self.durations.get(t, 0) - (now - started)) for t, started in list(p["running"].items()))
+        return work / self.workers
+
+    def _report_progress(self):
+        p = self._progress; total = len(p["order"]); done = len(p["done"])
+        expected = sum(self.durations.get(t, 0) for t in p["order"]) or 1
+        remaining = self._remaining_seconds()
+        bar = 100.0 if done == total else min(99.0, max(done * 100 / total, (1 - remaining * self.workers / expected) * 100))
+        status = f"Completadas {done}/{total} tareas" + (f" · Restante estimado: {_format_eta(remaining)}" if done < total else "")
+        self.reporter.progress_update(barra=bar, status=status, porcentaje=f"{int(bar)}%")
+
+    def _progress_ticker(self):
+        while not self._progress["stop"].wait(2.0): self._report_progress()
+
+    def _write_metrics(self):
+        if not self.settings.get("metrics_enabled", True): return
+        try: metrics.REGISTRY.write_textfile(self.programas_dir.parent / "logs" / "playertoolkit.prom")
+        except OSError as e: logging.warning(f"No se pudieron escribir las métricas: {e}")
+
+    def _start_staging(self, tasks):
+        """Copia en segundo plano a disco local los instaladores del plan si 'Programas' está en otra unidad (USB)."""
+        if not self.settings.get("staging_enabled", True): return
+        cache_dir = self._staging_root()
+        if same_device(self.programas_dir, cache_dir): return
+        stager = InstallerStager(cache_dir, self.settings.get("staging_workers", 2), self.fingerprints, self._log)
+        for app_key in tasks:
+            config = self._effective_config(app_key)
+            if config.get("tipo") not in (TASK_TYPE_LOCAL_INSTALL, TASK_TYPE_MANUAL_ASSISTED) or config.get("staging") is False: continue
+            filename = config.get("exe_filename")
+            if filename and (self.programas_dir / app_key / filename).is_file(): stager.add(app_key, self.programas_dir / app_key, filename)
+        try: stager.start(); self.stager = stager
+        except (StagingError, OSError) as e: self._log(f"Se omite la copia local: {e}", "WARNING")
+
+    def _staging_root(self): return Path(self.settings.get("staging_dir") or DEFAULT_STAGING_DIR).resolve()
+
+    def _effective_config(self, app_key):
+        config = self.app_configs.get(app_key, {}).copy()
+        if app_key in self.extra_options: config.update(self.extra_options[app_key])
+        return config
+
+    def _check_unresolved_variables(self, tasks):
+        """Descarta antes de empezar las tareas con %VARIABLES% sin definir (y sus dependientes)."""
+        blocked = {}
+        for app_key in tasks:
+            config = self._effective_config(app_key)
+            missing = set().union(*(self.expander.unresolved(config.get(f)) for f in VARIABLE_FIELDS))
+            if missing: blocked[app_key] = sorted(missing)
+        if not blocked: return tasks
+        for app_key in tasks:
+            if app_key not in blocked and any(d in blocked for d in self.app_configs.get(app_key, {}).get("dependencies", [])):
+                blocked[app_key] = None
+        lines = []
+        for app_key, missing in blocked.items():
+            if missing:
+                names = ", ".join(f"%{n}%" for n in missing)
+                self.results[app_key] = f"❌ '{app_key}': Variables sin resolver: {names}"; lines.append(f"- {app_key}: {names}")
+            else: self.results[app_key] = f"❌ '{app_key}': Omitida, depende de una tarea con variables sin resolver."
+            self._log(self.results[app_key][2:], "ERROR"); self._safe_ui_update(app_key, status='fail', text="Variables sin resolver")
+        self.reporter.warning("Variables sin resolver", "Se omitirán las siguientes tareas porque usan variables no definidas:\n\n" + "\n".join(lines))
+        return [t for t in tasks if t not in blocked]
+
+    def _task_fingerprint(self, app_key, config):
+        filename = config.get("exe_filename")
+        path = self.programas_dir / app_key / filename if filename else None
+        installer = (self.fingerprints.digest(path) if self.fingerprints else None) if path and path.is_file() else None
+        return task_fingerprint(config, installer or config.get("url"))
+
+    def _skip_satisfied(self, tasks):
+        """Omite las instalaciones cuya huella coincide con la última ejecución correcta y que siguen instaladas."""
+        if self.reconciliation is None or self.inventory is None or not self.settings.get("reconcile_enabled", True): return tasks
+        satisfied = []
+        for app_key in tasks:
+            config = self._effective_config(app_key)
+            if config.get("tipo") not in RECONCILABLE_TYPES: continue
+            fingerprint = self._task_fingerprint(app_key, config); self._task_fingerprints[app_key] = fingerprint
+            installed = find_installed(self.inventory, config.get("uninstall_key"))
+            if self.reconciliation.is_satisfied(app_key, fingerprint, installed):
+                satisfied.append(app_key); self.results[app_key] = f"⏭️ '{app_key}': Ya aplicada ({installed[0]} {installed[1]}), sin cambios."
+                self._log(self.results[app_key][3:]); self._safe_ui_update(app_key, status='success', text="Sin cambios")
+        if satisfied: self._log(f"Reconciliación: {len(satisfied)} de {len(tasks)} tareas ya estaban aplicadas.")
+        return [t for t in tasks if t not in satisfied]
+
+    def _defer_if_reboot_pending(self, app_key):
+        """Con 'defer_after_reboot', pospone las tareas que dependen de otra que dejó un reinicio pendiente."""
+        if not self.settings.get("defer_after_reboot", False): return False
+        blocking = [d for d in self.graph.get(app_key, ()) if d in self.reboot.apps or d in self._deferred]
+        if not blocking: return False
+        self._deferred.add(app_key)
+        self.results[app_key] = f"⏸️ '{app_key}': Pospuesta hasta después del reinicio (depende de {', '.join(blocking)})."
+        self._log(self.results[app_key][3:], "WARNING"); self._safe_ui_update(app_key, status='pending', text="Tras reiniciar")
+        return True
+
+    def _prompt_restart(self):
+        # Las pospuestas quedan en el diario como STATE_DEFERRED; RunOnce reanuda el lote en el primer inicio de sesión tras el reinicio,
+        # también si el usuario reinicia más tarde por su cuenta.
+        resumable = bool(self.journal and self.journal.unfinished() and self.settings.get("resume_run_once", True))
+        message = "Las siguientes tareas necesitan reiniciar el equipo para completarse:\n\n" + "\n".join(self.reboot.summary_lines())
+        if self._deferred: message += f"\n\nPospuestas hasta después del reinicio ({'se ejecutarán automáticamente' if resumable else 'vuelva a ejecutarlas'}):\n" + "\n".join(f"- {a}" for a in sorted(self._deferred))
+        restart = self.reporter.confirm_restart(message)
+        if resumable and (restart or self._deferred) and register_run_once(system=self.system):
+            self._log("El lote se reanudará automáticamente al iniciar sesión tras el reinicio.")
+        if restart:
+            try: schedule_restart(60, system=self.system); self._log("Reinicio programado en 60 segundos.", "WARNING")
+            except OSError as e: self.reporter.error("Error", f"No se pudo programar el reinicio:\n{e}")
+        else: self._log("Reinicio pendiente pospuesto por el usuario.", "WARNING")
 
     def _execute_task(self, app_key):
         self._safe_ui_update(app_key, status='running', text="En cola...")
-        self._log(f"--- Iniciando: {app_key} ---"); config = self.app_configs.get(app_key, {}).copy()
-        if app_key in self.extra_options: config.update(self.extra_options[app_key])
-        success = True
-        if config.get("pre_task_script"): success = self._run_script(config["pre_task_script"])
-        if success:
-            handler = self._get_task_handler(config.get("tipo"))
-            success = handler(app_key, config) if handler else False
-        if success and config.get("post_task_script"):
-            if not self._run_script(config["post_task_script"]): self.results[app_key] = f"⚠️ '{app_key}': Tarea OK, script POST falló."
+        self._log(f"--- Iniciando: {app_key} ---"); config = self._effective_config(app_key)
+        self.current_task = app_key
+        with self.tracer.span(app_key, "tarea", tipo=config.get("tipo")) as span_args:
+            success = True
+            if config.get("pre_task_script"):
+                with self._phase("pre_script"): success = self._run_script(config["pre_task_script"])
+            if success:
+                handler = self._get_task_handler(config.get("tipo"))
+                with self._phase("tarea"): success = handler(app_key, config) if handler else False
+            if success and config.get("post_task_script"):
+                with self._phase("post_script"):
+                    if not self._run_script(config["post_task_script"]): self.results[app_key] = f"⚠️ '{app_key}': Tarea OK, script POST falló."
+            span_args["ok"] = success
+            if success: self.reboot.check(app_key)
         
+        if success and app_key in self._task_fingerprints and self.results.get(app_key) is None:
+            self.reconciliation.record_success(app_key, self._task_fingerprint(app_key, config))
+        elif self.reconciliation and app_key in self._task_fingerprints: self.reconciliation.forget(app_key)
+        if success and app_key in self.reboot.apps: self.results.setdefault(app_key, f"🔄 '{app_key}': Completado, requiere reiniciar.")
         if success: self.results.setdefault(app_key, f"✅ '{app_key}': Completado con éxito."); self._log(f"--- ÉXITO: {app_key} ---", "SUCCESS"); self._safe_ui_update(app_key, status='success', text="Completado")
         else: self.results.setdefault(app_key, f"❌ '{app_key}': Falló."); self._log(f"--- ERROR: {app_key} ---", "ERROR"); self._safe_ui_update(app_key, status='fail', text="Falló")
+        if self._retries.get(app_key): self.results[app_key] += f" ({len(self._retries[app_key])} reintento(s), códigos: {', '.join(map(str, self._retries[app_key]))})"
         return success
 
     def _get_task_handler(self, task_type):
@@ -134,6 +351,9 @@ class TaskProcessor:
         self._log(f"Advertencia: Script no encontrado: {script_key}", "WARNING"); return True
 
     def _download_file(self, url, dest_path, app_key):
+        with self._phase("descarga", url=url): return self._download_file_inner(url, dest_path, app_key)
+
+    def _download_file_inner(self, url, dest_path, app_key):
         try:
             self._log(f"Descargando desde {url}"); self._safe_ui_update(app_key, phase='download', text="Descargando...")
             with requests.get(url, stream=True, timeout=30) as r:
@@ -142,42 +362,81 @@ class TaskProcessor:
                     for chunk in r.iter_content(8192):
                         f.write(chunk); downloaded += len(chunk)
                         if total_size: self._safe_ui_update(app_key, phase='download', text=f"Descargando {int((downloaded/total_size)*100)}%", progress=int((downloaded/total_size)*100))
+            metrics.BYTES_TOTAL.inc(downloaded, origen="url")
             return True
-        except requests.RequestException as e: self._log(f"Error de descarga: {e}", "ERROR"); messagebox.showerror("Error", f"Fallo en '{url}':\n{e}"); return False
+        except requests.RequestException as e: self._log(f"Error de descarga: {e}", "ERROR"); self.reporter.error("Error", f"Fallo en '{url}':\n{e}"); return False
 
     def _prepare_installer(self, app_key, config):
         filename = config.get("exe_filename")
         if not filename: return None
         exe_path = self.programas_dir / app_key / filename
         if not exe_path.exists():
+            if self._download_from_peer(app_key, filename, exe_path): return exe_path
             if not config.get("url") or not self._download_file(config["url"], exe_path, app_key): return None
+        if self.stager:
+            self._safe_ui_update(app_key, phase='download', text="Preparando copia local...")
+            with self._phase("espera_copia_local"): local = self.stager.get(app_key)
+            if local: self._log(f"Ejecutando desde la copia local '{local}'"); return local
         return exe_path
 
+    def _download_from_peer(self, app_key, filename, dest_path):
+        peer = self.settings.get("lan_peer_url")
+        if not peer: return False
+        try:
+            self._log(f"Descargando '{filename}' desde el equipo par {peer}"); self._safe_ui_update(app_key, phase='download', text="Descargando (LAN)...")
+            dest_path.parent.mkdir(parents=True, exist_ok=True)
+            with self._phase("descarga_lan", peer=peer): ok = fetch_from_peer(peer, f"{app_key}/{filename}", dest_path, lambda p: self._safe_ui_update(app_key, phase='download', text=f"Descargando (LAN) {p}%", progress=p))
+            if not ok: self._log(f"Descarga incompleta desde {peer}.", "WARNING")
+            else: metrics.BYTES_TOTAL.inc(dest_path.stat().st_size, origen="lan")
+            return ok
+        except (requests.RequestException, OSError) as e:
+            self._log(f"No se pudo descargar desde el equipo par ({e}). Usando la URL de la aplicación.", "WARNING"); return False
+
     def _handle_local_install(self, app_key, config):
         exe_path = self._prepare_installer(app_key, config)
         if not exe_path: return False
         self._safe_ui_update(app_key, phase='install', text="Instalando...")
         return self._run_command(exe_path, config.get("args_instalacion",[]))
 
+    def _requires_user(self, app_key):
+        if self.reporter.interactive: return False
+        self.results[app_key] = f"❌ '{app_key}': Requiere intervención del usuario (no disponible sin interfaz)."; return True
+
     def _handle_manual_assisted(self, app_key, config):
+        if self._requires_user(app_key): return False
         exe_path = self._prepare_installer(app_key, config)
         if not exe_path: return False
-        os.startfile(exe_path)
+        self.system.shell_open(exe_path)
         self._safe_ui_update(app_key, phase='install', text="Esperando...")
-        self.pm.release_focus()
-        confirmed = messagebox.askokcancel(f"Acción Requerida: {app_key}", config.get("mensaje_usuario"))
-        self.pm.regain_focus()
-        return confirmed
+        with self._phase("espera_usuario"): return self.reporter.confirm_user_action(f"Acción Requerida: {app_key}", config.get("mensaje_usuario"))
 
     def _handle_uninstall(self, app_key, config):
-        cmd_str = _expand_vars(config.get("uninstall_string"), self.custom_variables)
+        cmd_str = self.expander.expand(config.get("uninstall_string"))
         if not cmd_str: return False
         args = []; cmd = cmd_str.replace('"', '')
         if "unins000" in cmd.lower(): args = ["/VERYSILENT", "/SUPPRESSMSGBOXES", "/NORESTART"]
+        elif cmd.lower().endswith(".exe") and self._uninstaller_framework(cmd) == "nsis": args = ["/S"]
         elif "msiexec" in cmd.lower():
             match = re.search(r'\{([A-Fa-f0-9-]{36})\}', cmd, re.I)
             if match: cmd, args = "msiexec", ["/x", match.group(0), "/qn", "/norestart"]
-        return self._run_command(cmd, args)
+        if not self._run_command(cmd, args): return False
+        return self._verify_uninstalled(app_key, config.get("registry_key"))
+
+    def _uninstaller_framework(self, path):
+        try: return detect_framework(path) if Path(path).is_file() else None
+        except OSError: return None
+
+    def _verify_uninstalled(self, app_key, registry_key):
+        """Confirma la desinstalación releyendo solo su subclave del registro."""
+        if not registry_key: return True
+        self._safe_ui_update(app_key, text="Verificando...")
+        with self._phase("verificacion"):
+            deadline = time.monotonic() + UNINSTALL_VERIFY_TIMEOUT
+            while uninstall_entry_exists(registry_key, self.system):
+                if time.monotonic() > deadline:
+                    self.results[app_key] = f"❌ '{app_key}': El desinstalador terminó pero la entrada sigue en el registro."; return False
+                time.sleep(1)
+        self._log(f"Verificado: '{app_key}' ya no aparece en el registro."); return True
     
     def _handle_install_driver(self, app_key, config):
         driver_dir = config.get("driver_dir_name")
@@ -190,8 +449,8 @@ class TaskProcessor:
     # --- INICIO DEL CÓDIGO CORREGIDO ---
     def _run_command(self, command, args=None, wait=True, timeout=600):
         try:
-            cmd_str = str(_expand_vars(command, self.custom_variables))
-            args = [_expand_vars(a, self.custom_variables) for a in (args or [])]
+            cmd_str = str(self.expander.expand(str(command)))
+            args = [self.expander.expand(a) for a in (args or [])]
             
             # Lógica corregida para manejar .msi
             if cmd_str.lower().endswith('.msi'):
@@ -201,38 +460,82 @@ class TaskProcessor:
 
             self._log(f"Ejecutando: {' '.join(full_cmd)}")
 
-            proc = subprocess.Popen(full_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8', errors='replace', creationflags=subprocess.CREATE_NO_WINDOW)
-            if not wait: return True 
-
-            stdout, stderr = proc.communicate(timeout=timeout)
-            if stdout: self._log(f"Salida de '{Path(command).name}':\n{stdout.strip()}")
-            if stderr: self._log(f"Errores de '{Path(command).name}':\n{stderr.strip()}", level="ERROR")
-            self._log(f"Comando finalizado con código: {proc.returncode}")
-            return proc.returncode in [0, 3010]
+            is_msi = Path(full_cmd[0]).stem.lower() == "msiexec"
+            policy, app_key, attempt = self._retry_policy(), self.current_task, 1
+            while True:
+                code = self._run_attempt(command, cmd_str, full_cmd, is_msi, wait, timeout, attempt)
+                outcome = policy.classify(code)
+                if outcome == OUTCOME_REBOOT:
+                    self._log(f"Reinicio pendiente: {REBOOT_EXIT_CODES.get(code, f'código {code}')}. Se pedirá un único reinicio al terminar el lote.", "WARNING")
+                    self.reboot.record(app_key, f"código {code}")
+                if outcome in (OUTCOME_SUCCESS, OUTCOME_REBOOT): return True
+                if outcome != OUTCOME_RETRY or attempt >= policy.max_attempts:
+                    if outcome == OUTCOME_RETRY: self._log(f"Código {code}: se agotaron los {policy.max_attempts} intentos.", "ERROR")
+                    return False
+                delay = policy.delay(attempt); self._retries.setdefault(app_key, []).append(code)
+                metrics.RETRIES_TOTAL.inc(codigo=code)
+                self._log(f"Código {code} (reintentable). Reintento {attempt}/{policy.max_attempts - 1} en {delay:.0f}s...", "WARNING")
+                self._safe_ui_update(app_key, text=f"Reintentando en {delay:.0f}s ({code})")
+                with self._phase("espera_reintento", codigo=code): time.sleep(delay)
+                attempt += 1
         except Exception as e:
             self._log(f"Error crítico ejecutando '{Path(command).name}': {e}", "ERROR")
             return False
+
+    def _retry_policy(self):
+        try: return RetryPolicy.from_config(self.settings, self._effective_config(self.current_task) if self.current_task else None)
+        except (ValueError, TypeError) as e: self._log(f"Política de reintentos no válida ({e}). Se usa la predeterminada.", "WARNING"); return RetryPolicy()
+
+    def _run_attempt(self, command, cmd_str, full_cmd, is_msi, wait, timeout, attempt):
+        # El bloqueo MSI se libera durante la espera entre reintentos para no frenar al resto de tareas MSI.
+        if is_msi and not _MSI_LOCK.acquire(blocking=False):
+            self._log("Esperando a que termine otra instalación MSI...")
+            with self._phase("espera_msi"): _MSI_LOCK.acquire()
+        try:
+            with self._phase("ejecucion", comando=Path(cmd_str).name, intento=attempt) as span_args:
+                return self._wait_command(command, full_cmd, wait, timeout, span_args)
+        finally:
+            if is_msi: _MSI_LOCK.release()
+
+    def _wait_command(self, command, full_cmd, wait, timeout, span_args):
+        proc = self.system.run(full_cmd, wait, timeout)
+        if not wait: return 0
+
+        if proc.stdout: self._log(f"Salida de '{Path(command).name}':\n{proc.stdout.strip()}")
+        if proc.stderr: self._log(f"Errores de '{Path(command).name}':\n{proc.stderr.strip()}", level="ERROR")
+        self._log(f"Comando finalizado con código: {proc.returncode}"); span_args["codigo"] = proc.returncode
+        return proc.returncode
     # --- FIN DEL CÓDIGO CORREGIDO ---
 
-    def _show_results_log(self):
-        log_win = tk.Toplevel(self.root); log_win.title("Resultados"); log_win.geometry("600x400"); log_win.transient(self.root); log_win.grab_set()
-        text = tk.Text(log_win, wrap="word", font=("Segoe UI", 10), padx=10, pady=10)
-        text.pack(expand=True, fill="both"); text.tag_configure("success", foreground="green"); text.tag_configure("fail", foreground="red")
-        for res in sorted(self.results.values()): text.insert(tk.END, res + "\n", "success" if "✅" in res else "fail")
-        text.config(state="disabled"); ttk.Button(log_win, text="Cerrar", command=log_win.destroy).pack(pady=10)
-    
+    def timing_summary_lines(self):
+        lines = []
+        for app_key, e in ((e["name"], e) for e in self.tracer.spans("tarea")):
+            phases = [p for p in self.tracer.spans("fase") if p["args"].get("app") == app_key and p["name"] != "tarea" and e["ts"] <= p["ts"] <= e["ts"] + e["dur"]]
+            detail = ", ".join(f"{p['name']} {p['dur']/1e6:.1f}s" for p in phases)
+            lines.append(f"  {app_key}: {e['dur']/1e6:.1f}s" + (f" ({detail})" if detail else ""))
+        totals = self.tracer.summary("fase"); totals.pop("tarea", None)
+        if totals: lines.append("  Total: " + ", ".join(f"{n} {a['total_s']:.1f}s" for n, a in sorted(totals.items(), key=lambda i: -i[1]["total_s"])))
+        return lines
+
     def _handle_copy_interactive(self, app_key, config):
         filename = config.get("selected_filename");
         if not filename: return False
         src = self.programas_dir / app_key / filename
-        if not src.exists(): messagebox.showerror("Error", f"Archivo no encontrado:\n{src}"); return False
-        
-        self.pm.release_focus(); dest_str = filedialog.asksaveasfilename(title=f"Guardar '{filename}'", initialfile=filename); self.pm.regain_focus()
+        if not src.exists(): self.reporter.error("Error", f"Archivo no encontrado:\n{src}"); return False
+        if self._requires_user(app_key): return False
+
+        dest_str = self.reporter.ask_destination(f"Guardar '{filename}'", filename)
         if not dest_str: return False
         try:
-            dest = Path(_expand_vars(dest_str, self.custom_variables)); dest.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(src, dest); self._log(f"Archivo copiado a '{dest}'"); return True
-        except Exception as e: messagebox.showerror("Error", f"No se pudo copiar:\n{e}"); return False
+            dest = Path(self.expander.expand(dest_str)); dest.parent.mkdir(parents=True, exist_ok=True)
+            def report(done, total, rate):
+                pct = int(done * 100 / total) if total else 100
+                self._safe_ui_update(app_key, text=f"Copiando {pct}% ({rate/1024**2:.1f} MB/s)", progress=pct)
+            started = time.perf_counter()
+            with self._phase("copia", destino=str(dest)): copy_path(src, dest, report)
+            metrics.BYTES_TOTAL.inc(src.stat().st_size, origen="copia")
+            self._log(f"Archivo copiado a '{dest}' en {time.perf_counter() - started:.1f}s"); return True
+        except Exception as e: self.reporter.error("Error", f"No se pudo copiar:\n{e}"); return False
 
     def _handle_power_config(self, app_key, config):
         cmds = [["powercfg", "/change", opt, "0"] for opt in ["monitor-timeout-ac", "standby-timeout-ac", "hibernate-timeout-ac", "monitor-timeout-dc", "standby-timeout-dc", "hibernate-timeout-dc"]]
@@ -247,11 +550,13 @@ class TaskProcessor:
             
     def _handle_clean_temp(self, app_key, config):
         temp_folders = [os.environ.get(v) for v in ('TEMP', 'TMP') if os.environ.get(v)] + [r'C:\Windows\Temp']
-        count = 0; size = 0
+        count = 0; size = 0; staging_root = self._staging_root()
         for folder in temp_folders:
-            p = Path(_expand_vars(folder)); 
+            p = Path(self.expander.expand(folder)); 
             if not p.is_dir(): continue
             for item in p.glob('*'):
+                # La copia local del lote puede estar en %TEMP% (ajuste 'staging_dir'): no se toca.
+                if item.resolve() == staging_root or item.resolve() in staging_root.parents: continue
                 try:
                     if item.is_file(): size+=item.stat().st_size; item.unlink(missing_ok=True); count+=1
                     elif item.is_dir(): size+=sum(f.stat().st_size for f in item.rglob('*')); shutil.rmtree(item, ignore_errors=True); count+=1
@@ -268,10 +573,10 @@ class TaskProcessor:
     def _handle_unimplemented(self, app_key, config): self._log(f"Tarea '{config.get('tipo')}' no implementada."); return True
 
     def _script_copy_lsplayer_shortcut(self):
-        s_name = "LSPlayerVideo.lnk"; startup = Path(_expand_vars("%PROGRAMDATA%")) / "Microsoft/Windows/Start Menu/Programs/Startup"
-        src = next((p / s_name for p in [Path.home()/"Desktop", Path(_expand_vars("%PUBLIC%"))/"Desktop"] if (p/s_name).exists()), None)
+        s_name = "LSPlayerVideo.lnk"; startup = Path(self.expander.expand("%PROGRAMDATA%")) / "Microsoft/Windows/Start Menu/Programs/Startup"
+        src = next((p / s_name for p in [Path.home()/"Desktop", Path(self.expander.expand("%PUBLIC%"))/"Desktop"] if (p/s_name).exists()), None)
         if src:
-            try: shutil.copy2(src, startup); self._log(f"Acceso directo copiado a {startup}"); return True
+            try: copy_file(src, startup); self._log(f"Acceso directo copiado a {startup}"); return True
             except Exception as e: self._log(f"Error copiando acceso directo: {e}", "ERROR"); return False
         self._log(f"No se encontró el acceso directo '{s_name}' en el escritorio.", "WARNING")
         return True
\ No newline at end of file
@@ -0,0 +1,65 @@
+# --- START OF FILE toolkit_lib/tracing.py ---
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from collections import defaultdict
+from pathlib import Path
+
+class Tracer:
+    """
+    Traza en memoria de intervalos (spans) con nombre y categoría. Se puede exportar en
+    formato Chrome trace-event (chrome://tracing, Perfetto) o resumir por fase.
+    """
+    def __init__(self, name="PlayerToolkit"):
+        self.name, self.events, self._origin, self.listeners = name, [], time.perf_counter(), []
+
+    def _now_us(self): return (time.perf_counter() - self._origin) * 1e6
+
+    @contextmanager
+    def span(self, name, cat="tarea", **args):
+        start = self._now_us(); error = None
+        try: yield args
+        except BaseException as e: error = e; raise
+        finally:
+            if error is not None: args["error"] = repr(error)
+            event = {"name": name, "cat": cat, "ph": "X", "ts": start, "dur": self._now_us() - start,
+                     "pid": os.getpid(), "tid": threading.get_ident(), "args": args}
+            self.events.append(event)
+            for listener in self.listeners: listener(event)
+
+    def instant(self, name, cat="evento", **args):
+        self.events.append({"name": name, "cat": cat, "ph": "i", "s": "t", "ts": self._now_us(), "pid": os.getpid(), "tid": threading.get_ident(), "args": args})
+
+    def extend(self, other: "Tracer"):
+        """Añade los eventos de otra traza, alineando sus relojes."""
+        shift = (other._origin - self._origin) * 1e6
+        self.events.extend(dict(e, ts=e["ts"] + shift) for e in list(other.events))
+
+    def to_chrome(self):
+        names = {tid: f"hilo-{i}" for i, tid in enumerate(dict.fromkeys(e["tid"] for e in self.events))}
+        meta = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": n}} for tid, n in names.items()]
+        meta.append({"name": "process_name", "ph": "M", "pid": os.getpid(), "tid": 0, "args": {"name": self.name}})
+        return {"traceEvents": meta + list(self.events), "displayTimeUnit": "ms"}
+
+    def export_chrome(self, path: Path):
+        path = Path(path); path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f: json.dump(self.to_chrome(), f)
+        return path
+
+    def summary(self, cat=None):
+        """{nombre: {'count', 'total_s', 'max_s'}} de los spans (opcionalmente de una sola categoría)."""
+        agg = defaultdict(lambda: {"count": 0, "total_s": 0.0, "max_s": 0.0})
+        for e in list(self.events):
+            if e["ph"] != "X" or (cat and e["cat"] != cat): continue
+            a = agg[e["name"]]; d = e["dur"] / 1e6
+            a["count"] += 1; a["total_s"] += d; a["max_s"] = max(a["max_s"], d)
+        return dict(agg)
+
+    def spans(self, cat=None):
+        return [e for e in list(self.events) if e["ph"] == "X" and (cat is None or e["cat"] == cat)]
+
+# Traza global del arranque de la aplicación.
+STARTUP_TRACER = Tracer("PlayerToolkit (arranque)")
@@ -3,8 +3,6 @@
 import tkinter as tk
 from tkinter import ttk, simpledialog, filedialog, messagebox
 import json
-from pathlib import Path
-import sys
 from .helpers import ScrollableFrame, ToolTip
 from ..config import *
 
@@ -24,8 +22,8 @@ class ComboboxDialog(simpledialog.Dialog):
     def apply(self): self.result = self.combo.get()
 
 class NewAppConfigDialog(simpledialog.Dialog):
-    def __init__(self, parent, title, app_name, initial_config=None):
-        self.app_name, self.config = app_name, initial_config or DEFAULT_APP_CONFIG.copy()
+    def __init__(self, parent, title, app_name, initial_config=None, detection=None):
+        self.app_name, self.config, self.detection = app_name, initial_config or DEFAULT_APP_CONFIG.copy(), detection
         super().__init__(parent, title)
 
     def body(self, master):
@@ -39,6 +37,8 @@ class NewAppConfigDialog(simpledialog.Dialog):
             if key == "tipo": widget = ttk.Combobox(master, textvariable=var, state='readonly', values=[TASK_TYPE_LOCAL_INSTALL, TASK_TYPE_MANUAL_ASSISTED, TASK_TYPE_COPY_INTERACTIVE, TASK_TYPE_CLEAN_TEMP, TASK_TYPE_POWER_CONFIG, TASK_TYPE_RUN_POWERSHELL])
             else: widget = ttk.Entry(master, textvariable=var)
             widget.grid(row=i, column=1, sticky='ew', padx=5, pady=3); self.entries[key] = var
+        if self.detection:
+            ttk.Label(master, text=f"Instalador detectado: {self.detection['label']} ({self.detection['file']}). Se proponen argumentos silenciosos.", foreground='gray', wraplength=350).grid(row=len(fields), columnspan=2, sticky='w', padx=5, pady=(8, 0))
         return master
 
     def apply(self):
@@ -54,8 +54,8 @@ class NewAppConfigDialog(simpledialog.Dialog):
         except (json.JSONDecodeError, ValueError) as e: messagebox.showerror("Error", f"Argumentos no es una lista JSON válida.\n{e}", parent=self); self.result = None
 
 class ConfigWizardDialog(simpledialog.Dialog):
-    def __init__(self, parent, title, app_name, app_config, all_app_keys):
-        self.app_name, self.config, self.all_app_keys = app_name, app_config.copy(), all_app_keys
+    def __init__(self, parent, title, app_name, app_config, all_app_keys, detection=None):
+        self.app_name, self.config, self.all_app_keys, self.detection = app_name, app_config.copy(), all_app_keys, detection
         self.current_step, self.steps, self.entries = 0, [], {}
         super().__init__(parent, title)
 
@@ -85,8 +85,15 @@ class ConfigWizardDialog(simpledialog.Dialog):
             ttk.Label(frame, text=label).grid(row=i+1, column=0, sticky='w', padx=5, pady=5); var = tk.StringVar(value=val)
             entry = ttk.Entry(frame, textvariable=var); entry.grid(row=i+1, column=1, sticky='ew', padx=5, pady=5); self.entries[key] = var
             ToolTip(entry, "Para listas, usar formato JSON. Ej: [\"/S\", \"-D=C:\\\\\"]")
+        if self.detection:
+            row = len(fields) + 1; d = self.detection
+            ttk.Label(frame, text=f"Detectado: {d['label']} ({d['file']}) → {' '.join(d['args'])}", style='Muted.TLabel', wraplength=300).grid(row=row, column=0, columnspan=2, sticky='w', padx=5, pady=(10, 0))
+            ttk.Button(frame, text="Usar instalación desatendida", command=self._apply_detection).grid(row=row + 1, column=0, columnspan=2, sticky='w', padx=5, pady=5)
         return frame
 
+    def _apply_detection(self):
+        self.entries['args_instalacion'].set(json.dumps(self.detection['args'])); self.entries['tipo'].set(TASK_TYPE_LOCAL_INSTALL)
+
     def _create_step_dependencies(self, parent):
         frame = ttk.Frame(parent, padding=10); ttk.Label(frame, text="Dependencias", font=("Segoe UI", 12, "bold")).pack(anchor='w'); ttk.Label(frame, text="Selecciona las apps a instalar ANTES que esta.").pack(anchor='w', pady=(0,10))
         scroll_frame = ScrollableFrame(frame); scroll_frame.pack(expand=True, fill='both')
@@ -179,17 +186,11 @@ class GroupEditorDialog(simpledialog.Dialog):
         if not name: messagebox.showwarning("Vacío", "El nombre no puede estar vacío.", parent=self); self.result = None; return
         self.result = (name, [n for n, v in self.app_vars.items() if v.get()])
 
-def open_group_manager(parent, callback_on_close, app_configs):
+def open_group_manager(parent, callback_on_close, app_configs, group_repo):
     win = tk.Toplevel(parent); win.title("Gestionar Grupos"); win.transient(parent); win.grab_set(); win.geometry("450x450")
-    base = Path(sys.executable).parent if getattr(sys, 'frozen', False) else Path(sys.argv[0]).parent
-    grupos_dir = base / "Programas" / "Grupos"
-    def load_groups():
-        grupos_dir.mkdir(exist_ok=True); groups = {}
-        for f in grupos_dir.glob("*.txt"): groups[f.stem] = [l.strip() for l in open(f, 'r', encoding='utf-8') if l.strip()]
-        return groups
-    groups = load_groups()
-    def save(name, apps): open(grupos_dir / f"{name}.txt", 'w', encoding='utf-8').write("\n".join(apps))
-    def delete(name): (grupos_dir / f"{name}.txt").unlink(missing_ok=True)
+    groups = group_repo.load()
+    def save(name, apps): group_repo.save(name, apps)
+    def delete(name): group_repo.delete(name)
     def populate(): listbox.delete(0, tk.END); [listbox.insert(tk.END, n) for n in sorted(groups.keys())]
     def add():
         d = GroupEditorDialog(win, "Crear Grupo", app_configs)
@@ -212,4 +213,34 @@ def open_group_manager(parent, callback_on_close, app_configs):
     ttk.Button(btn_frame, text="Nuevo...", command=add).pack(pady=5, fill=tk.X)
     ttk.Button(btn_frame, text="Editar...", command=edit).pack(pady=5, fill=tk.X)
     ttk.Button(btn_frame, text="Eliminar", command=delete_selected).pack(pady=5, fill=tk.X)
-    populate(); win.protocol("WM_DELETE_WINDOW", lambda: (callback_on_close(), win.destroy()))
\ No newline at end of file
+    populate(); win.protocol("WM_DELETE_WINDOW", lambda: (callback_on_close(), win.destroy()))
+def open_inventory_history(parent, history):
+    """Registros del historial de inventario (el más reciente arriba) y qué cambió desde el elegido hasta hoy."""
+    win = tk.Toplevel(parent); win.title("Historial del Inventario"); win.transient(parent); win.geometry("760x520")
+    snapshots = ttk.Treeview(win, columns=('n', 'fecha', 'etiqueta', 'cambios'), show='headings', height=8, selectmode='browse')
+    for col, text, width in (('n', "#", 50), ('fecha', "Fecha", 150), ('etiqueta', "Origen", 180), ('cambios', "Cambios", 200)):
+        snapshots.heading(col, text=text); snapshots.column(col, width=width, stretch=col == 'etiqueta')
+    snapshots.pack(fill='x', padx=10, pady=(10, 5))
+    summary = ttk.Label(win, text="Elige un registro para ver qué cambió desde entonces."); summary.pack(anchor='w', padx=10)
+    changes = ttk.Treeview(win, columns=('cambio', 'nombre', 'detalle'), show='headings')
+    for col, text, width in (('cambio', "Cambio", 100), ('nombre', "Programa", 280), ('detalle', "Detalle", 320)):
+        changes.heading(col, text=text); changes.column(col, width=width, stretch=col != 'cambio')
+    changes.pack(fill='both', expand=True, padx=10, pady=(5, 10))
+    for e in reversed(history.entries):
+        r = e["resumen"]
+        snapshots.insert('', 'end', iid=str(e["n"]), values=(e["n"], e["t"].replace("T", " "), e["etiqueta"] or "-", f"+{r['añadidos']}  −{r['eliminados']}  ~{r['cambiados']}"))
+
+    def show_changes(event=None):
+        if not snapshots.selection(): return
+        n = int(snapshots.selection()[0])
+        try: before, delta = history.state(n), history.changes_since(n)
+        except (KeyError, OSError, ValueError) as e: summary.config(text=f"No se pudo reconstruir el registro {n}: {e}"); return
+        changes.delete(*changes.get_children())
+        for name, data in sorted(delta["añadidos"].items()): changes.insert('', 'end', values=("➕ Añadido", name, data.get("version", "")))
+        for name in delta["eliminados"]: changes.insert('', 'end', values=("➖ Eliminado", name, before.get(name, {}).get("version", "")))
+        for name, fields in sorted(delta["cambiados"].items()):
+            detail = ", ".join(f"{k}: {before.get(name, {}).get(k, '')} → {v if v is not None else ''}" for k, v in sorted(fields.items()))
+            changes.insert('', 'end', values=("✏️ Cambiado", name, detail))
+        total = sum(len(v) for v in delta.values())
+        summary.config(text=f"Desde el registro {n}: {len(delta['añadidos'])} añadidos, {len(delta['eliminados'])} eliminados, {len(delta['cambiados'])} cambiados." if total else f"Sin cambios desde el registro {n}.")
+    snapshots.bind("<<TreeviewSelect>>", show_changes)
@@ -0,0 +1,64 @@
+# --- START OF FILE toolkit_lib/ui/global_search.py ---
+
+import tkinter as tk
+from tkinter import ttk
+import time
+
+from ..search import SOURCE_APP, SOURCE_INSTALLED, SOURCE_DRIVER, SOURCE_LOG
+
+SOURCE_LABELS = {SOURCE_APP: "📦 Aplicación", SOURCE_INSTALLED: "🗑️ Instalado", SOURCE_DRIVER: "🔩 Driver", SOURCE_LOG: "📜 Log"}
+DEBOUNCE_MS, MAX_RESULTS, MIN_QUERY = 150, 15, 2
+
+class GlobalSearchBox(ttk.Frame):
+    """Búsqueda global con resultados desplegables; al elegir uno se llama a on_select(origen, clave)."""
+    def __init__(self, parent, index, on_select, width=36):
+        super().__init__(parent)
+        self.index, self.on_select, self.hits, self.popup, self.tree, self._job = index, on_select, [], None, None, None
+        self.var = tk.StringVar(); self.var.trace_add("write", lambda *a: self._schedule())
+        ttk.Label(self, text="🔎").pack(side="left", padx=(0, 5))
+        self.entry = ttk.Entry(self, textvariable=self.var, width=width); self.entry.pack(side="left")
+        self.entry.bind("<Down>", self._focus_results); self.entry.bind("<Return>", lambda e: self._choose(0)); self.entry.bind("<Escape>", lambda e: self.close())
+
+    def _schedule(self):
+        if self._job: self.after_cancel(self._job)
+        self._job = self.after(DEBOUNCE_MS, self._run)
+
+    def _run(self):
+        self._job, query = None, self.var.get()
+        if len(query.strip()) < MIN_QUERY: self.close(); return
+        start = time.perf_counter(); self.hits = self.index.search(query, MAX_RESULTS)
+        self._show((time.perf_counter() - start) * 1000)
+
+    def _create_popup(self):
+        self.popup = tk.Toplevel(self); self.popup.wm_overrideredirect(True); self.popup.transient(self.winfo_toplevel())
+        self.tree = ttk.Treeview(self.popup, columns=('origen', 'resultado'), show='headings', height=10, selectmode='browse')
+        self.tree.column('origen', width=110, stretch=False); self.tree.column('resultado', width=420)
+        self.tree.pack(fill='both', expand=True)
+        self.tree.bind("<Double-1>", lambda e: self._choose_selected()); self.tree.bind("<Return>", lambda e: self._choose_selected())
+        self.tree.bind("<Escape>", lambda e: (self.close(), self.entry.focus_set()))
+
+    def _show(self, elapsed_ms):
+        if not (self.popup and self.popup.winfo_exists()): self._create_popup()
+        self.tree.heading('origen', text=f"{len(self.hits)} resultados"); self.tree.heading('resultado', text=f"({elapsed_ms:.1f} ms)")
+        self.tree.delete(*self.tree.get_children())
+        for i, (_, source, _, label) in enumerate(self.hits): self.tree.insert('', 'end', iid=str(i), values=(SOURCE_LABELS.get(source, source), label))
+        if not self.hits: self.tree.insert('', 'end', values=("", "Sin resultados"))
+        self.update_idletasks()
+        self.popup.geometry(f"+{self.entry.winfo_rootx()}+{self.entry.winfo_rooty() + self.entry.winfo_height()}"); self.popup.lift()
+
+    def _focus_results(self, event=None):
+        if self.hits and self.tree:
+            self.tree.focus_set(); self.tree.selection_set("0"); self.tree.focus("0")
+
+    def _choose_selected(self):
+        selection = self.tree.selection() if self.tree else ()
+        if selection and selection[0].isdigit(): self._choose(int(selection[0]))
+
+    def _choose(self, i):
+        if i >= len(self.hits): return
+        _, source, key, _ = self.hits[i]
+        self.close(); self.on_select(source, key)
+
+    def close(self):
+        if self.popup and self.popup.winfo_exists(): self.popup.destroy()
+        self.popup, self.tree = None, None
@@ -1,7 +1,7 @@
 # --- START OF FILE toolkit_lib/ui/main_app.py ---
 
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
+from tkinter import ttk, filedialog, messagebox, simpledialog
 import json
 import shutil
 import sv_ttk # type: ignore
@@ -16,19 +16,37 @@ from datetime import datetime
 import subprocess
 import requests
 import re
+import bisect
 from collections import defaultdict
 
 from ..config import *
 from ..tasks import TaskProcessor
-from ..utils import scan_installed_software, clear_cache, scan_drivers
+from ..utils import scan_installed_software, clear_cache, scan_drivers, read_inf_metadata, uninstall_entry_exists, save_cached_scan, get_programas_dir_hash
+from ..variables import load_custom_variables
+from ..groups import GroupRepository, dependency_closure
+from ..fingerprints import FingerprintCache
+from ..distribution import InstallerServer
+from ..tracing import Tracer
+from ..history import DurationHistory, HISTORY_FILE_NAME
+from ..reconcile import ReconciliationStore, STATE_FILE_NAME, find_installed
+from ..installer_meta import InstallerMetadataCache, upgrade_status, STATUS_UPGRADEABLE, STATUS_MISSING
+from ..installer_detect import InstallerDetector
+from ..replay import new_recorder
+from ..search import TrigramIndex, fold_text, SOURCE_APP, SOURCE_INSTALLED, SOURCE_DRIVER, SOURCE_LOG
+from ..journal import BatchJournal, JOURNAL_FILE_NAME, STATE_DONE, RESUME_ARG, clear_run_once
+from ..jobs import JobService, PRIORITY_QUICK, PRIORITY_NORMAL, RESOURCE_PROGRESS, RESOURCE_INSTALLER, RESOURCE_DRIVERS
+from .. import metrics
+from ..updater import ReleaseClient, DeltaUpdater, UpdateError, MANIFEST_SUFFIX, STAGING_MARKER
 from .dialogs import ConfigWizardDialog, VariablesManagerDialog, open_group_manager, ComboboxDialog
 from .helpers import ToolTip
+from .global_search import GlobalSearchBox
+from .reporter import TkReporter
 from .tabs.tab_dashboard import create_dashboard_tab, refresh_dashboard
 from .tabs.tab_apps import create_apps_tab
 from .tabs.tab_drivers import create_drivers_tab
 from .tabs.tab_groups import create_groups_tab
 from .tabs.tab_uninstall import create_uninstall_tab
-from .tabs.tab_log import create_log_tab
+from .tabs.tab_log import create_log_tab, refresh_jobs
 from .tabs.tab_config import create_config_tab
 
 try:
@@ -41,7 +59,10 @@ APP_VERSION = "Versión 6.1.8"
 GITHUB_OWNER = "JoelAnonRosendo"
 GITHUB_REPO = "PlayerToolkit"
 UPDATER_SCRIPT_NAME = "updater.bat"
-STATUS_ICONS = {"pending": "▫️", "running": "⚙️", "success": "✅", "fail": "❌", "installed": "✔️"}
+STATUS_ICONS = {"pending": "▫️", "running": "⚙️", "success": "✅", "fail": "❌", "installed": "✔️", "upgradeable": "⬆️"}
+SEARCH_DEBOUNCE_MS = 200
+# Líneas del log más recientes que entran en la búsqueda global.
+LOG_INDEX_LIMIT = 5000
 
 class PlayerToolkitApp:
     def __init__(self, root, scan_results, app_configs, installed_software):
@@ -49,6 +70,12 @@ class PlayerToolkitApp:
         self.app_tree = None; self.extra_options = {}; self.config_treeview = None; self.modified_configs = set()
         self.uninstall_vars = {}; self.log_queue = Queue(); self.CHECK_CHAR, self.UNCHECK_CHAR = "☑", "☐"
         self.update_status_label = None; self.is_downloading_update = False
+        # Árbol de aplicaciones: última fila aplicada por app, categorías, orden, índice de búsqueda y filas ocultas por el filtro.
+        self._app_rows, self._app_categories, self._app_order, self._app_search, self._app_hidden = {}, {}, {}, {}, set()
+        self._app_touched, self._app_filter_job, self.search_var = set(), None, None
+        # Búsqueda global: apps, inventario, drivers (con los metadatos de sus .inf) y log.
+        self.search_index, self._inf_cache, self._log_seq, self._driver_indexer = TrigramIndex(), {}, 0, None
+        self._pending_drivers, self._driver_index_lock = None, threading.Lock()
 
         logging.info(f"--- Iniciando PlayerToolkit {APP_VERSION} ---")
 
@@ -57,17 +84,34 @@ class PlayerToolkitApp:
 
         self.programas_dir = self.user_data_dir / "Programas"; self.conf_dir = self.user_data_dir / "conf"
         self.drivers_dir = self.programas_dir / "Drivers"; self.drivers_dir.mkdir(exist_ok=True)
-        self.update_ready_path = self.user_data_dir / "update.zip"
+        self.update_staging_dir = self.user_data_dir / "update_staging"
+        self.release_client = ReleaseClient(self.conf_dir / "update_cache.json")
+        self.delta_updater = DeltaUpdater(self.user_data_dir, self.update_staging_dir, progress_callback=self._on_update_progress)
+        self.group_repo = GroupRepository(self.programas_dir / "Grupos", self.app_configs)
+        self.settings = load_settings(self.conf_dir); self.fingerprints = FingerprintCache(self.conf_dir / "fingerprints.json")
+        self.installer_meta = InstallerMetadataCache(self.conf_dir / "installer_meta.json")
+        self.installer_detector = InstallerDetector(self.conf_dir / "instaladores_detectados.json")
+        self.tracer = Tracer("PlayerToolkit (UI)"); self.metrics_server = None
+        self.history = DurationHistory(self.conf_dir / HISTORY_FILE_NAME); self.reconciliation = ReconciliationStore(self.conf_dir / STATE_FILE_NAME)
+        if self.settings.get("metrics_enabled", True):
+            self.tracer.listeners.append(metrics.record_span)
+            if self.settings.get("metrics_port"):
+                try: self.metrics_server = metrics.MetricsServer(metrics.REGISTRY, int(self.settings["metrics_port"])); self.metrics_server.start()
+                except OSError as e: logging.error(f"No se pudo iniciar el servidor de métricas: {e}"); self.metrics_server = None
+        self.jobs = JobService(on_change=lambda: self.root.after(0, self._refresh_jobs_view))
+        self.lan_server = InstallerServer(self.programas_dir, port=self.settings["lan_server_port"], max_connections=self.settings["lan_server_max_connections"], fingerprints=self.fingerprints)
 
         self._setup_styles(); self._setup_ui()
 
         self._populate_config_treeview()
         self.refresh_dashboard() 
-        self._populate_app_tree(); self._check_installed_status(); self._populate_uninstall_tab(); self.scan_and_populate_drivers()
+        self._refresh_app_tree(); self._populate_uninstall_tab(); self.scan_and_populate_drivers()
         self._process_log_queue()
+        threading.Thread(target=lambda: self._warm_installer_meta() and self.root.after(0, self._light_refresh_ui), name="metadatos", daemon=True).start()
 
         if DND_SUPPORT: self.root.drop_target_register(DND_FILES); self.root.dnd_bind('<<Drop>>', self._on_drop)
         self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.root.after(500, self._offer_resume)
 
     def _setup_styles(self):
         s = ttk.Style(self.root); s.configure('Muted.TLabel', foreground='gray'); s.configure('Accent.TButton', font=("Segoe UI", 11, "bold"), padding=10)
@@ -86,6 +130,7 @@ class PlayerToolkitApp:
         main = ttk.Frame(self.root, padding="10"); main.pack(expand=True, fill=tk.BOTH); main.rowconfigure(1, weight=1); main.columnconfigure(0, weight=1)
         top = ttk.Frame(main); top.grid(row=0, column=0, sticky="ew", pady=(0, 5))
         ttk.Label(top, text="PlayerToolkit", font=("Segoe UI", 16, "bold")).pack(side="left"); ttk.Button(top, text="🌙/☀️", command=sv_ttk.toggle_theme).pack(side="right")
+        self.global_search = GlobalSearchBox(top, self.search_index, self._jump_to_search_result); self.global_search.pack(side="right", padx=10)
         self.notebook = ttk.Notebook(main); self.notebook.grid(row=1, column=0, sticky="nsew", pady=5)
 
         self.dashboard_tab_frame = create_dashboard_tab(self.notebook, self)
@@ -96,6 +141,7 @@ class PlayerToolkitApp:
         self.log_tab_frame = create_log_tab(self.notebook, self)
         self.config_tab_frame = create_config_tab(self.notebook, self)
         self.refresh_dashboard = lambda: refresh_dashboard(self)
+        self._refresh_jobs_view = lambda: refresh_jobs(self)
 
         bottom = ttk.Frame(main); bottom.grid(row=2, column=0, sticky="ew", pady=(10, 0))
         self.continue_button = ttk.Button(bottom, text="Ejecutar Tareas ➔", style='Accent.TButton', command=self._on_siguiente_click)
@@ -134,7 +180,7 @@ class PlayerToolkitApp:
         api_url = f"https://api.github.com/repos/{GITHUB_OWNER}/{GITHUB_REPO}/releases/latest"
         self.root.after(0, self.update_status_label.config, {'text': 'Buscando actualizaciones...', 'foreground': 'white'})
         try:
-            response = requests.get(api_url, timeout=10); response.raise_for_status(); latest_release = response.json()
+            latest_release = self.release_client.latest_release(api_url)
             latest_version_tag = latest_release.get("tag_name")
             if not latest_version_tag: self.root.after(0, self._show_update_error, "No se encontró tag de versión."); return
             
@@ -145,40 +191,42 @@ class PlayerToolkitApp:
                 if not latest_version_str: self.root.after(0, self._show_update_error, f"El tag '{latest_version_tag}' no es X.Y.Z."); return
                 
                 expected_asset_name = f"PlayerToolkit_v{latest_version_str}.zip"
-                update_asset = next((asset for asset in latest_release.get("assets", []) if asset['name'] == expected_asset_name), None)
-                
-                if update_asset: self.root.after(0, self._show_update_available, latest_version_tag, update_asset)
+                assets = {asset['name']: asset for asset in latest_release.get("assets", [])}
+                update_asset = assets.get(expected_asset_name)
+                # El manifiesto de hashes por archivo es opcional: sin él se descarga el paquete completo.
+                manifest_asset = assets.get(f"PlayerToolkit_v{latest_version_str}{MANIFEST_SUFFIX}")
+                if update_asset: self.root.after(0, self._show_update_available, latest_version_tag, update_asset, manifest_asset)
                 else: self.root.after(0, self._show_update_error, f"No se encontró el archivo '{expected_asset_name}'.")
             else:
                 self.root.after(0, self._show_no_update)
         except requests.RequestException as e: self.root.after(0, self._show_update_error, f"Error de red: {e}")
         except Exception as e: self.root.after(0, self._show_update_error, f"Error: {e}")
 
-    def _show_update_available(self, new_version, asset):
+    def _show_update_available(self, new_version, asset, manifest_asset=None):
         msg = f"¡Nueva versión disponible: {new_version}!\n\n¿Descargar ahora?\nSe instalará al cerrar la aplicación."
         parent = self.update_status_label.winfo_toplevel() if self.update_status_label and self.update_status_label.winfo_exists() else self.root
-        if messagebox.askyesno("Actualización Disponible", msg, parent=parent): self._start_background_download(asset)
+        if messagebox.askyesno("Actualización Disponible", msg, parent=parent): self._start_background_download(asset, manifest_asset)
 
-    def _start_background_download(self, asset):
+    def _start_background_download(self, asset, manifest_asset=None):
         if self.is_downloading_update: return
         self.is_downloading_update = True; self.update_status_label.config(text="Iniciando descarga...")
-        threading.Thread(target=self._download_thread, args=(asset['browser_download_url'], asset['size']), daemon=True).start()
+        manifest_url = manifest_asset['browser_download_url'] if manifest_asset else None
+        threading.Thread(target=self._download_thread, args=(asset['browser_download_url'], manifest_url), daemon=True).start()
+
+    def _on_update_progress(self, done, total):
+        if self.update_status_label: self.root.after(0, self.update_status_label.config, {'text': f'Descargando: {int(done * 100 / total)}%'})
 
-    def _download_thread(self, url, total_size):
+    def _download_thread(self, url, manifest_url=None):
         try:
-            downloaded = 0
-            with requests.get(url, stream=True, timeout=60) as r:
-                r.raise_for_status()
-                with open(self.update_ready_path, 'wb') as f:
-                    for chunk in r.iter_content(chunk_size=8192):
-                        f.write(chunk); downloaded += len(chunk)
-                        if total_size > 0:
-                            progress = (downloaded / total_size) * 100
-                            self.root.after(0, self.update_status_label.config, {'text': f'Descargando: {int(progress)}%'})
-            self.root.after(0, self.update_status_label.config, {'text': 'Descarga completa.\nSe instalará al cerrar.', 'foreground': 'green'})
-        except requests.RequestException as e:
+            manifest = self.release_client.get_json(manifest_url, timeout=30) if manifest_url else None
+            staged = self.delta_updater.prepare(url, manifest)
+            if not staged:
+                self.delta_updater.discard()
+                self.root.after(0, self.update_status_label.config, {'text': 'Los archivos locales ya están al día.', 'foreground': 'green'}); return
+            self.root.after(0, self.update_status_label.config, {'text': f'Descarga completa ({len(staged)} archivos).\nSe instalará al cerrar.', 'foreground': 'green'})
+        except (requests.RequestException, UpdateError, OSError) as e:
             self.root.after(0, self.update_status_label.config, {'text': f'Error de descarga: {e}', 'foreground': 'red'})
-            if self.update_ready_path.exists(): self.update_ready_path.unlink()
+            self.delta_updater.discard()
         finally: self.is_downloading_update = False
 
     def _show_no_update(self): 
@@ -197,22 +245,27 @@ class PlayerToolkitApp:
         self.notebook.select(self.log_tab_frame)
         self._update_task_ui(task_key, status='pending')
         # Tareas rápidas NO necesitan un re-escaneo completo, solo una actualización de la UI.
-        processor = TaskProcessor(self.root, self.app_configs, [task_key], {}, self.programas_dir, self._load_custom_variables(), self.log_queue, self._update_task_ui, self._light_refresh_ui)
-        threading.Thread(target=processor.run, daemon=True).start()
+        self._submit_batch(f"Tarea rápida: {task_key}", self.app_configs, [task_key], {}, self._update_task_ui, self._light_refresh_ui, PRIORITY_QUICK, (RESOURCE_PROGRESS,), key=("rapida", task_key))
 
     def apply_group_from_dashboard(self, group_name):
-        apps = set(self._load_groups().get(group_name, []))
-        for cid in self.app_tree.get_children():
-            for aid in self.app_tree.get_children(cid):
-                if 'disabled' not in self.app_tree.item(aid,'tags'): self._set_item_checked(aid, aid in apps)
-            self._update_parent_check_state(cid)
+        # La clausura ya incluye las dependencias transitivas del grupo (calculada en caché).
+        apps = set(self.group_repo.closure(group_name))
+        added = sorted(apps - set(self.group_repo.get(group_name)))
+        if added: self.log_queue.put(("INFO", f"Grupo '{group_name}': dependencias añadidas automáticamente: {', '.join(added)}"))
+        for key, row in self._app_rows.items():
+            if 'disabled' not in row["tags"]: self._set_item_checked(key, key in apps)
+        for cid in self._app_categories.values(): self._update_parent_check_state(cid)
         self.notebook.select(self.app_tab_frame)
 
     def _on_siguiente_click(self):
         active_tab = self.notebook.tab(self.notebook.select(), "text")
         if "Aplicaciones" in active_tab:
-            selected = [c for cat in self.app_tree.get_children() for c in self.app_tree.get_children(cat) if self.app_tree.item(c,'text').startswith(self.CHECK_CHAR)]
+            # Incluye las filas marcadas que el filtro de búsqueda tiene ocultas.
+            selected = [k for cat in sorted(self._app_order) for k in self._app_order[cat] if self._is_checked(k)]
             if not selected: messagebox.showwarning("Sin Selección", "No ha seleccionado ninguna aplicación."); return
+            missing_deps = [d for d in dependency_closure(selected, self.app_configs) if d not in selected and self.app_tree.exists(d) and 'disabled' not in self.app_tree.item(d, 'tags')]
+            for dep in missing_deps: self._set_item_checked(dep, True); self._update_parent_check_state(self.app_tree.parent(dep))
+            selected += missing_deps
             extra_opts = {}; resumen = "Se realizarán las siguientes acciones:\n\n"
             for key in selected:
                 cfg = self.app_configs[key]; line = f"- {cfg['icon']} {key}";
@@ -220,8 +273,7 @@ class PlayerToolkitApp:
                 if cfg["tipo"] in [TASK_TYPE_LOCAL_INSTALL,TASK_TYPE_MANUAL_ASSISTED]:
                     if len(res) == 1: extra_opts[key] = {'exe_filename': res[0]}
                     elif len(res) > 1:
-                        chosen = self.extra_options.get(key, {}).get('selected')
-                        if not chosen: messagebox.showerror("Error", f"Para '{key}', por favor elija un archivo/versión."); return
+                        chosen = self.extra_options.get(key, {}).get('selected') or self.installer_meta.newest(self.programas_dir / key, res)
                         line += f" ({chosen})"; extra_opts[key] = {'exe_filename': chosen}
                     elif cfg.get("url"): extra_opts[key] = {'exe_filename': Path(cfg["url"]).name}
                     else: messagebox.showerror("Error", f"No se encontró instalador para '{key}'."); return
@@ -234,8 +286,7 @@ class PlayerToolkitApp:
             if messagebox.askyesno("Confirmar Acciones", resumen):
                 self.notebook.select(self.log_tab_frame)
                 # La instalación sí requiere un re-escaneo completo al finalizar.
-                processor = TaskProcessor(self.root, self.app_configs, selected, extra_opts, self.programas_dir, self._load_custom_variables(), self.log_queue, self._update_task_ui, lambda: self._rescan_and_refresh_ui(True))
-                threading.Thread(target=processor.run, daemon=True).start()
+                self._submit_batch(f"Lote de aplicaciones ({len(selected)})", self.app_configs, selected, extra_opts, self._update_task_ui, lambda: self._rescan_and_refresh_ui(True))
 
         elif "Drivers" in active_tab:
             selected = [self.drivers_tree.item(i, 'tags')[0] for i in self.drivers_tree.selection()]
@@ -244,27 +295,86 @@ class PlayerToolkitApp:
                 self.notebook.select(self.log_tab_frame)
                 drv_cfgs = {name: {"tipo": TASK_TYPE_INSTALL_DRIVER, "driver_dir_name": name} for name in selected}
                 # Los drivers NO necesitan un re-escaneo, solo una actualización de su propia lista.
-                processor = TaskProcessor(self.root, drv_cfgs, selected, {}, self.programas_dir, self._load_custom_variables(), self.log_queue, None, self.scan_and_populate_drivers)
-                threading.Thread(target=processor.run, daemon=True).start()
+                self._submit_batch(f"Drivers ({len(selected)})", drv_cfgs, selected, {}, None, self.scan_and_populate_drivers, resources=(RESOURCE_PROGRESS, RESOURCE_DRIVERS))
     
     def _on_uninstall_click(self):
         selected = {n:d['data'] for n,d in self.uninstall_vars.items() if d['var'].get()}
         if not selected or not messagebox.askyesno("Confirmar", "Desinstalar:\n" + "\n".join([f"- {n}" for n in selected]) + "\n\n¿Continuar?"): return
         self.notebook.select(self.log_tab_frame)
-        cfgs = {n:{"tipo":TASK_TYPE_UNINSTALL, "uninstall_string":d["uninstall_string"]} for n,d in selected.items()}
-        # La desinstalación requiere un re-escaneo completo.
-        processor = TaskProcessor(self.root, cfgs, list(selected.keys()), {}, self.programas_dir, self._load_custom_variables(), self.log_queue, completion_callback=lambda:self._rescan_and_refresh_ui(True))
-        threading.Thread(target=processor.run, daemon=True).start()
+        cfgs = {n:{"tipo":TASK_TYPE_UNINSTALL, "uninstall_string":d["uninstall_string"], "registry_key":d.get("registry_key")} for n,d in selected.items()}
+        # Los desinstaladores que no son MSI se ejecutan en paralelo; al terminar solo se releen sus subclaves.
+        self._submit_batch(f"Desinstalación ({len(selected)})", cfgs, list(selected.keys()), {}, None, lambda: self._after_uninstall(cfgs), workers=self.settings.get("uninstall_workers", 4))
+
+    def _after_uninstall(self, cfgs):
+        """Actualiza el inventario con las entradas desinstaladas sin volver a escanear todo el registro."""
+        if any(not c.get("registry_key") for c in cfgs.values()): self._rescan_and_refresh_ui(True); return
+        removed = [n for n, c in cfgs.items() if not uninstall_entry_exists(c["registry_key"])]
+        for name in removed: self.installed_software.pop(name, None)
+        self.reconciliation.update_installed(self.app_configs, self.installed_software)
+        save_cached_scan(self.installed_software, self.scan_results, get_programas_dir_hash(self.programas_dir), f"desinstalación ({len(removed)})")
+        self._populate_uninstall_tab(); self._refresh_app_tree(); self.refresh_dashboard()
 
     # --- FIN DEL CÓDIGO MODIFICADO ---
 
+    def toggle_lan_server(self):
+        try:
+            if self.lan_server.running: self.lan_server.stop(); messagebox.showinfo("Servidor LAN", "Servidor detenido.", parent=self.root)
+            else:
+                self.lan_server.start()
+                messagebox.showinfo("Servidor LAN", f"Compartiendo 'Programas' en el puerto {self.lan_server.port}.\nEn los demás equipos, configura como par: http://<IP de este equipo>:{self.lan_server.port}", parent=self.root)
+        except OSError as e: messagebox.showerror("Servidor LAN", f"No se pudo iniciar el servidor:\n{e}", parent=self.root)
+        if hasattr(self, 'lan_server_button'): self.lan_server_button.config(text="Detener Servidor LAN" if self.lan_server.running else "Iniciar Servidor LAN")
+
+    def configure_lan_peer(self):
+        url = simpledialog.askstring("Equipo Par (LAN)", "URL del equipo que comparte 'Programas' (vacío para desactivar):", initialvalue=self.settings.get("lan_peer_url") or "", parent=self.root)
+        if url is None: return
+        self.settings["lan_peer_url"] = url.strip() or None
+        try: save_settings(self.conf_dir, self.settings)
+        except IOError as e: messagebox.showerror("Error", f"No se pudo guardar:\n{e}", parent=self.root)
+
+    def _write_metrics(self):
+        if not self.settings.get("metrics_enabled", True): return
+        try: metrics.REGISTRY.write_textfile(self.user_data_dir / "logs" / "playertoolkit.prom")
+        except OSError as e: logging.warning(f"No se pudieron escribir las métricas: {e}")
+
+    def _new_journal(self): return BatchJournal(self.conf_dir / JOURNAL_FILE_NAME)
+
+    def _submit_batch(self, label, configs, selected, extra_opts, ui_callback, completion_callback, priority=PRIORITY_NORMAL, resources=(RESOURCE_PROGRESS, RESOURCE_INSTALLER), key=None, journal=None, workers=None):
+        """Encola un lote. El TaskProcessor se crea al arrancar el trabajo, con el inventario y el diario vigentes en ese momento."""
+        def run():
+            TaskProcessor(TkReporter(self.root), configs, selected, extra_opts, self.programas_dir, self._load_custom_variables(), self.log_queue, ui_callback, completion_callback, settings=self.settings, fingerprints=self.fingerprints,
+                          history=self.history, inventory=self.installed_software, reconciliation=self.reconciliation, journal=journal or self._new_journal(), workers=workers,
+                          recorder=new_recorder(self.user_data_dir / "logs") if self.settings.get("record_sessions") else None).run()
+        return self.jobs.submit(label, run, priority, resources, key)
+
+    def _offer_resume(self):
+        """Ofrece reanudar el lote que quedó a medias (cierre, cuelgue o reinicio). Con --resume se reanuda sin preguntar."""
+        clear_run_once()
+        journal = BatchJournal.load(self.conf_dir / JOURNAL_FILE_NAME)
+        if not journal: return
+        pending = journal.unfinished()
+        if RESUME_ARG not in sys.argv and not messagebox.askyesno("Lote sin terminar", f"Hay un lote del {journal.data.get('created', '?')} sin terminar.\n\nTareas pendientes:\n- " + "\n- ".join(pending) + "\n\n¿Reanudarlo ahora?"):
+            journal.discard(); return
+        configs = {**self.app_configs, **journal.configs()}
+        # La tarea que estaba en curso se vuelve a comprobar: si ya aparece instalada, se da por completada.
+        for app in journal.in_flight():
+            installed = find_installed(self.installed_software, configs.get(app, {}).get("uninstall_key"))
+            if installed: journal.mark(app, STATE_DONE, f"Verificada al reanudar ({installed[0]} {installed[1]})"); logging.info(f"Reanudación: '{app}' ya estaba instalada.")
+        pending = journal.unfinished()
+        if not pending: journal.discard(); return
+        logging.info(f"Reanudando lote: {', '.join(pending)}")
+        self.notebook.select(self.log_tab_frame)
+        self._submit_batch(f"Reanudación de lote ({len(pending)})", configs, pending, {}, self._update_task_ui, lambda: self._rescan_and_refresh_ui(True), journal=journal)
+
     def _on_close(self):
-        if self.update_ready_path.exists() and messagebox.askyesno("Instalar Actualización", "Actualización lista. ¿Cerrar e instalar ahora?"):
+        self.jobs.shutdown(); self.lan_server.stop(); self.fingerprints.save(); self.installer_meta.save(); self.installer_detector.save(); self._write_metrics()
+        if self.metrics_server: self.metrics_server.stop()
+        if self.delta_updater.is_ready() and messagebox.askyesno("Instalar Actualización", "Actualización lista. ¿Cerrar e instalar ahora?"):
              self._launch_updater()
         self.root.destroy()
 
     def _launch_updater(self):
-        script = f"""@echo off\ntaskkill /PID {os.getpid()} /F>nul\ntimeout /t 2>nul\npowershell Expand-Archive -Path '{self.update_ready_path}' -Dest '.' -Force\ndel "{self.update_ready_path}"\nstart "" "{os.path.basename(sys.executable)}"\ndel "%~f0" """;
+        script = f"""@echo off\ntaskkill /PID {os.getpid()} /F>nul\ntimeout /t 2>nul\nxcopy "{self.update_staging_dir}" "{self.user_data_dir}" /E /Y /Q /I>nul\nrmdir /S /Q "{self.update_staging_dir}"\ndel "{self.user_data_dir / STAGING_MARKER}" 2>nul\nstart "" "{os.path.basename(sys.executable)}"\ndel "%~f0" """;
         updater_path = self.user_data_dir / UPDATER_SCRIPT_NAME
         with open(updater_path, "w", encoding="utf-8") as f: f.write(script)
         subprocess.Popen([str(updater_path)], creationflags=subprocess.DETACHED_PROCESS)
@@ -281,54 +391,134 @@ class PlayerToolkitApp:
     def _rescan_and_refresh_ui(self, silent=False):
         # Esta es la función LENTA y COMPLETA, solo para cambios de software.
         def do_rescan():
-            clear_cache(); self.installed_software = scan_installed_software()
-            self.scan_results.clear()
-            for k,c in self.app_configs.items():
-                if c.get('tipo') in [TASK_TYPE_LOCAL_INSTALL, TASK_TYPE_MANUAL_ASSISTED, TASK_TYPE_COPY_INTERACTIVE]:
-                     self.scan_results[k] = [f.name for ext in INSTALLER_EXTENSIONS for f in (self.programas_dir/k).glob(f"*{ext}")] if (self.programas_dir/k).is_dir() else [STATUS_FOLDER_NOT_FOUND]
+            with self.tracer.span("scan_installed_software", "escaneo"):
+                clear_cache(); self.installed_software = scan_installed_software()
+            self.reconciliation.update_installed(self.app_configs, self.installed_software)
+            with self.tracer.span("escaneo_archivos", "escaneo"):
+                self.scan_results.clear()
+                for k,c in self.app_configs.items():
+                    if c.get('tipo') in [TASK_TYPE_LOCAL_INSTALL, TASK_TYPE_MANUAL_ASSISTED, TASK_TYPE_COPY_INTERACTIVE]:
+                         self.scan_results[k] = [f.name for ext in INSTALLER_EXTENSIONS for f in (self.programas_dir/k).glob(f"*{ext}")] if (self.programas_dir/k).is_dir() else [STATUS_FOLDER_NOT_FOUND]
+            save_cached_scan(self.installed_software, self.scan_results, get_programas_dir_hash(self.programas_dir), "reescaneo")
+            self._warm_installer_meta(); self._write_metrics()
             self.root.after(0, self._update_ui_after_rescan, silent)
         threading.Thread(target=do_rescan, daemon=True).start()
 
     def _light_refresh_ui(self):
         # Esta es la nueva función de refresco RÁPIDA. Solo actualiza la UI, no escanea.
-        self._check_installed_status() # Revisa el estado de instalado
+        self._refresh_app_tree() # Revisa el estado de instalado (solo cambian las filas afectadas)
         self.refresh_dashboard() # Actualiza los contadores del panel
     
     def _update_ui_after_rescan(self, silent=False):
-        self._populate_app_tree(); self._check_installed_status(); self._populate_uninstall_tab()
+        self._refresh_app_tree(reset_status=True); self._populate_uninstall_tab()
         self.scan_and_populate_drivers(); self._populate_config_treeview(); self.refresh_dashboard()
         if not silent: messagebox.showinfo("Actualizado", "Listas actualizadas.")
 
-    def _populate_app_tree(self):
-        [self.app_tree.delete(i) for i in self.app_tree.get_children()]; cats = defaultdict(list)
-        [cats[c.get('categoria','Sin Categoría')].append(n) for n,c in self.app_configs.items()]
-        for cat in sorted(cats.keys()):
-            cid = self.app_tree.insert('', 'end', text=f"{self.UNCHECK_CHAR} {cat}", open=True, tags=('category',))
-            for key in sorted(cats[cat]):
-                cfg = self.app_configs[key]
-                aid = self.app_tree.insert(cid,'end', iid=key, text=f"{self.UNCHECK_CHAR} {cfg.get('icon','📦')} {key}")
-                self.app_tree.set(aid, 'status_icon', STATUS_ICONS["pending"])
-                res, msg = self.scan_results.get(key,[]), ""
-                if cfg.get('tipo') in [TASK_TYPE_LOCAL_INSTALL,TASK_TYPE_MANUAL_ASSISTED]:
-                    if not res or res == [STATUS_FOLDER_NOT_FOUND]:
-                        msg = "(Se descargará)" if cfg.get("url") else "(No encontrado)";
-                        if not cfg.get("url"): self.app_tree.item(aid, tags=('disabled',))
-                    elif len(res)>1: self.app_tree.set(aid, 'selector', "[Elegir...]")
-                self.app_tree.set(aid,'status_text', msg)
-
-    def _check_installed_status(self):
-        installed = {n.lower() for n in self.installed_software.keys()}
-        for k, cfg in self.app_configs.items():
-            if self.app_tree.exists(k):
-                ukey = cfg.get("uninstall_key")
-                if ukey and any(ukey.lower() in name for name in installed):
-                    self.app_tree.set(k, 'status_icon', STATUS_ICONS["installed"]); self.app_tree.set(k, 'status_text', "Instalado"); self.app_tree.item(k, tags=('disabled','installed'))
+    def _app_row(self, key):
+        """Lo que debe mostrar la fila de 'key' según el escaneo de 'Programas', el inventario y su configuración."""
+        cfg = self.app_configs[key]; res = self.scan_results.get(key, [])
+        row = {"categoria": cfg.get('categoria', 'Sin Categoría'), "texto": f"{cfg.get('icon','📦')} {key}", "estado": STATUS_ICONS["pending"], "mensaje": "", "selector": "", "tags": ()}
+        if cfg.get('tipo') in [TASK_TYPE_LOCAL_INSTALL,TASK_TYPE_MANUAL_ASSISTED]:
+            if not res or res == [STATUS_FOLDER_NOT_FOUND]:
+                row["mensaje"] = "(Se descargará)" if cfg.get("url") else "(No encontrado)"
+                if not cfg.get("url"): row["tags"] = ('disabled',)
+            elif len(res)>1:
+                # Se propone el instalador más nuevo; el usuario puede cambiarlo en el selector.
+                opts = self.extra_options.setdefault(key, {})
+                # Solo versiones ya leídas: _warm_installer_meta las lee en segundo plano y vuelve a refrescar. Lo elegido a mano no se toca.
+                if opts.get('selected') not in res or opts.get('auto'): opts.update(selected=self.installer_meta.newest(self.programas_dir / key, res, cached_only=True), auto=True)
+                row["selector"] = opts['selected']
+        elif cfg.get('tipo') == TASK_TYPE_COPY_INTERACTIVE and self.extra_options.get(key, {}).get('selected') in res: row["selector"] = self.extra_options[key]['selected']
+        installed = find_installed(self.installed_software, cfg.get("uninstall_key"))
+        available = self._installer_version(key) if installed and cfg.get('tipo') in [TASK_TYPE_LOCAL_INSTALL, TASK_TYPE_MANUAL_ASSISTED] else None
+        status = upgrade_status(available, installed[1] if installed else None) if cfg.get("uninstall_key") else None
+        if status == STATUS_UPGRADEABLE:
+            row.update(estado=STATUS_ICONS["upgradeable"], mensaje=f"Actualizable ({installed[1]} → {available})", tags=('installed', 'upgradeable'))
+        elif installed is not None: row.update(estado=STATUS_ICONS["installed"], mensaje=f"Instalado (v{installed[1]})" if installed[1] else "Instalado", tags=('disabled','installed'))
+        elif status == STATUS_MISSING and not row["mensaje"]: row["mensaje"] = "No instalado"
+        return row
+
+    def _installer_version(self, key):
+        res = [r for r in self.scan_results.get(key, []) if r not in (STATUS_FOLDER_NOT_FOUND, STATUS_NO_FILES_FOUND)]
+        chosen = self.extra_options.get(key, {}).get('selected') if len(res) > 1 else (res[0] if res else None)
+        return self.installer_meta.version(self.programas_dir / key / chosen, cached_only=True) if chosen else None
+
+    def _warm_installer_meta(self):
+        """Lee fuera del hilo de Tk las versiones de los instaladores que falten en la caché y refresca el árbol si hubo novedades."""
+        paths = [self.programas_dir / key / name for key, cfg in self.app_configs.items() if cfg.get('tipo') in [TASK_TYPE_LOCAL_INSTALL, TASK_TYPE_MANUAL_ASSISTED]
+                 for name in self.scan_results.get(key, []) if name not in (STATUS_FOLDER_NOT_FOUND, STATUS_NO_FILES_FOUND)]
+        with self.tracer.span("metadatos_instaladores", "escaneo", archivos=len(paths)): read = self.installer_meta.warm(paths)
+        return read
+
+    def _tree_index(self, parent, iid):
+        """Posición de 'iid' entre los hijos visibles de 'parent' (ordenados por iid)."""
+        return bisect.bisect_left(self.app_tree.get_children(parent), iid)
+
+    def _category_iid(self, cat):
+        if cat not in self._app_categories:
+            iid = f"cat::{cat}"
+            self.app_tree.insert('', self._tree_index('', iid), iid=iid, text=f"{self.UNCHECK_CHAR} {cat}", open=True, tags=('category',)); self._app_categories[cat] = iid
+        return self._app_categories[cat]
+
+    def _refresh_app_tree(self, reset_status=False):
+        """
+        Actualiza el árbol de aplicaciones tocando solo las filas cuyo escaneo, estado de instalación o
+        configuración cambió; las marcas y los instaladores elegidos se conservan. Con 'reset_status'
+        también se limpian las filas con el estado de una tarea ejecutada (tras un reescaneo completo).
+        """
+        rows = {key: self._app_row(key) for key in self.app_configs}
+        for key in [k for k in self._app_rows if k not in rows]:
+            self.app_tree.delete(key); del self._app_rows[key]; self._app_search.pop(key, None); self._app_hidden.discard(key)
+        touched = self._app_touched if reset_status else set()
+        for key, row in rows.items():
+            old = self._app_rows.get(key)
+            if old == row and key not in touched: continue
+            cid = self._category_iid(row["categoria"])
+            if old is None: self.app_tree.insert(cid, self._tree_index(cid, key), iid=key)
+            elif old["categoria"] != row["categoria"]: self.app_tree.move(key, cid, self._tree_index(cid, key)); self._app_hidden.discard(key)
+            checked = old is not None and self._is_checked(key) and 'disabled' not in row["tags"]
+            self.app_tree.item(key, text=f"{self.CHECK_CHAR if checked else self.UNCHECK_CHAR} {row['texto']}", tags=row["tags"], values=(row["estado"], row["mensaje"], "", row["selector"]))
+            self._app_rows[key], self._app_search[key] = row, fold_text(f"{key} {row['categoria']} {row['texto']}")
+        if reset_status: self._app_touched = set()
+        self._app_order = defaultdict(list)
+        for key in sorted(rows): self._app_order[rows[key]["categoria"]].append(key)
+        for cat in [c for c in self._app_categories if c not in self._app_order]:
+            self.app_tree.delete(self._app_categories[cat]); self._app_hidden.discard(self._app_categories.pop(cat))
+        for cid in self._app_categories.values(): self._update_parent_check_state(cid)
+        self._apply_app_filter()
+        self.search_index.sync(SOURCE_APP, {key: (self._app_global_text(key), f"{row['texto']} · {row['categoria']}") for key, row in rows.items()})
+
+    def _app_global_text(self, key):
+        cfg = self.app_configs[key]
+        return " ".join(str(v) for v in (key, cfg.get('categoria', ''), cfg.get('icon', ''), cfg.get('tipo', ''), cfg.get('uninstall_key') or '', Path(cfg.get('url') or '').name) if v)
+
+    def _filter_app_tree(self):
+        """Filtra al dejar de escribir en 'Buscar' (SEARCH_DEBOUNCE_MS) en lugar de en cada pulsación."""
+        if self._app_filter_job: self.root.after_cancel(self._app_filter_job)
+        self._app_filter_job = self.root.after(SEARCH_DEBOUNCE_MS, self._apply_app_filter)
+
+    def _apply_app_filter(self):
+        """Oculta (detach) las filas que no contienen todos los términos buscados y recoloca las que vuelven a coincidir."""
+        self._app_filter_job = None
+        terms = fold_text(self.search_var.get()).split() if self.search_var else []
+        cat_index = 0
+        for cat in sorted(self._app_order):
+            cid, index = self._app_categories[cat], 0
+            for key in self._app_order[cat]:
+                match = all(t in self._app_search[key] for t in terms)
+                if match and key in self._app_hidden: self.app_tree.move(key, cid, index); self._app_hidden.discard(key)
+                elif not match and key not in self._app_hidden: self.app_tree.detach(key); self._app_hidden.add(key)
+                index += match
+            if index and cid in self._app_hidden: self.app_tree.move(cid, '', cat_index); self._app_hidden.discard(cid)
+            elif not index and cid not in self._app_hidden: self.app_tree.detach(cid); self._app_hidden.add(cid)
+            cat_index += bool(index)
 
     def _populate_uninstall_tab(self):
         [w.destroy() for w in self.uninstall_frame.winfo_children()]; self.uninstall_vars.clear()
         for n,d in sorted(self.installed_software.items(), key=lambda i:i[0].lower()):
             var=tk.BooleanVar(); v=f" (v{d.get('version')})" if d.get('version') else ""; dt=f" [{d.get('install_date')}]" if d.get('install_date') else ""
             chk=ttk.Checkbutton(self.uninstall_frame, text=f"{n}{v}{dt}", variable=var); chk.pack(anchor='w',padx=5, pady=2); self.uninstall_vars[n]={'var':var,'data':d,'chk':chk}
+        self.search_index.sync(SOURCE_INSTALLED, {n: (f"{n} {d.get('version') or ''}", f"{n} {d.get('version') or ''}".strip()) for n, d in self.installed_software.items()})
 
     def _populate_config_treeview(self):
         [self.config_treeview.delete(i) for i in self.config_treeview.get_children()]
@@ -337,8 +527,11 @@ class PlayerToolkitApp:
     def _filter_uninstall_list(self, var):
         q = var.get().lower(); [d['chk'].pack(anchor='w',padx=5,pady=2) if q in n.lower() else d['chk'].pack_forget() for n,d in self.uninstall_vars.items()]
 
+    def _is_checked(self, iid): return self.app_tree.item(iid, 'text').startswith(self.CHECK_CHAR)
+
     def _set_item_checked(self, iid, chk):
-        txt = self.app_tree.item(iid, 'text'); base = txt.lstrip(f"{self.CHECK_CHAR}{self.UNCHECK_CHAR} "); self.app_tree.item(iid, text=f"{self.CHECK_CHAR if chk else self.UNCHECK_CHAR} {base}")
+        txt = self.app_tree.item(iid, 'text'); new = f"{self.CHECK_CHAR if chk else self.UNCHECK_CHAR} {txt.lstrip(f'{self.CHECK_CHAR}{self.UNCHECK_CHAR} ')}"
+        if new != txt: self.app_tree.item(iid, text=new)
 
     def _update_parent_check_state(self, pid):
         children = self.app_tree.get_children(pid)
@@ -360,8 +553,8 @@ class PlayerToolkitApp:
                 dlg = ComboboxDialog(self.root, f"Seleccionar para {iid}", "Elige un archivo:", res, 
                                      initialvalue=self.extra_options.get(iid, {}).get('selected'))
                 if dlg.result:
-                    self.extra_options.setdefault(iid, {})['selected'] = dlg.result
-                    self.app_tree.set(iid, 'selector', dlg.result)
+                    self.extra_options.setdefault(iid, {}).update(selected=dlg.result, auto=False)
+                    self.app_tree.set(iid, 'selector', dlg.result); self._app_rows[iid]["selector"] = dlg.result
             return
 
         if self.app_tree.identify_region(event.x, event.y) == 'tree':
@@ -379,14 +572,17 @@ class PlayerToolkitApp:
         try:
             while not self.log_queue.empty():
                 level, msg = self.log_queue.get_nowait()
-                timestamp = datetime.now().strftime("%H:%M:%S")
-                self.log_tree.insert("",0, values=(timestamp,level,msg), tags=(level,))
+                timestamp = datetime.now().strftime("%H:%M:%S"); self._log_seq += 1; iid = f"log{self._log_seq}"
+                self.log_tree.insert("",0, iid=iid, values=(timestamp,level,msg), tags=(level,))
                 if hasattr(self, 'original_log_data'):
-                    self.original_log_data.insert(0, (timestamp, level, msg))
+                    self.original_log_data.insert(0, (timestamp, level, msg, iid))
+                self.search_index.add(SOURCE_LOG, iid, f"{level} {msg}", f"[{timestamp}] {msg}")
+                if self._log_seq > LOG_INDEX_LIMIT: self.search_index.remove(SOURCE_LOG, f"log{self._log_seq - LOG_INDEX_LIMIT}")
         finally: self.root.after(200, self._process_log_queue)
 
     def _update_task_ui(self, key, status=None, text=None, progress=None, phase='install'):
         if self.app_tree.exists(key):
+            self._app_touched.add(key)
             if status: self.app_tree.set(key, 'status_icon', STATUS_ICONS.get(status, "❓"))
             if text: self.app_tree.set(key, 'status_text', text)
             if progress is not None:
@@ -394,13 +590,61 @@ class PlayerToolkitApp:
                 bar = "█"*int(prog_val/10); empty="─"*(10-len(bar)); self.app_tree.set(key, 'progress', f"[{bar}{empty}] {int(prog_val)}%")
     
     def scan_and_populate_drivers(self):
-        self.found_drivers = scan_drivers(self.drivers_dir)
+        with self.tracer.span("scan_drivers", "escaneo"): self.found_drivers = scan_drivers(self.drivers_dir)
         [self.drivers_tree.delete(i) for i in self.drivers_tree.get_children()]
         if not self.found_drivers:
             self.drivers_tree.insert('','end',text="No se encontraron paquetes de drivers en 'Programas/Drivers'.")
         else:
             for name in sorted(self.found_drivers.keys()):
-                self.drivers_tree.insert('','end', text=f"🔩 {name}", tags=(name,))
+                self.drivers_tree.insert('','end', iid=f"drv::{name}", text=f"🔩 {name}", tags=(name,))
+        # Si ya hay una indexación en curso, se deja la lista nueva pendiente y el mismo hilo la indexa al terminar.
+        with self._driver_index_lock:
+            self._pending_drivers = dict(self.found_drivers)
+            if self._driver_indexer is None:
+                self._driver_indexer = threading.Thread(target=self._index_pending_drivers, name="indice_drivers", daemon=True); self._driver_indexer.start()
+
+    def _index_pending_drivers(self):
+        while True:
+            with self._driver_index_lock:
+                drivers, self._pending_drivers = self._pending_drivers, None
+                if drivers is None: self._driver_indexer = None; return
+            try: self._index_drivers(drivers)
+            except Exception as e: logging.error(f"No se pudieron indexar los drivers: {e}")
+
+    def _index_drivers(self, drivers):
+        """Indexa los paquetes de drivers con el proveedor, la clase y los hardware IDs de sus .inf (se releen solo los .inf modificados)."""
+        entries = {}
+        for name, info in drivers.items():
+            words, providers = [name], []
+            for inf in sorted(Path(info["path"]).rglob("*.inf")):
+                try:
+                    stat = inf.stat(); cached = self._inf_cache.get(inf)
+                    if not cached or cached[0] != (stat.st_mtime_ns, stat.st_size): self._inf_cache[inf] = cached = ((stat.st_mtime_ns, stat.st_size), read_inf_metadata(inf))
+                except OSError as e: logging.warning(f"No se pudo leer '{inf}': {e}"); continue
+                meta = cached[1]; providers.append(meta["proveedor"])
+                words += [inf.name, meta["proveedor"], meta["clase"], *meta["fabricantes"], *meta["hardware_ids"]]
+            providers = ", ".join(dict.fromkeys(p for p in providers if p))
+            entries[name] = (" ".join(w for w in words if w), f"{name} ({providers})" if providers else name)
+        self.search_index.sync(SOURCE_DRIVER, entries)
+
+    def _reveal(self, tree, iid):
+        tree.see(iid); tree.selection_set(iid); tree.focus(iid)
+
+    def _jump_to_search_result(self, source, key):
+        """Abre la pestaña de un resultado de la búsqueda global y selecciona su fila."""
+        if source == SOURCE_APP and self.app_tree.exists(key):
+            if key in self._app_hidden: self.search_var.set(""); self._apply_app_filter()
+            self.notebook.select(self.app_tab_frame); self._reveal(self.app_tree, key)
+        elif source == SOURCE_DRIVER and self.drivers_tree.exists(f"drv::{key}"):
+            self.notebook.select(self.drivers_tab_frame); self._reveal(self.drivers_tree, f"drv::{key}")
+        elif source == SOURCE_INSTALLED and key in self.uninstall_vars:
+            self.uninstall_search_var.set(""); self.notebook.select(self.uninstall_tab_frame); self.root.update_idletasks()
+            chk = self.uninstall_vars[key]['chk']
+            self.uninstall_scroll.canvas.yview_moveto(chk.winfo_y() / max(1, self.uninstall_frame.winfo_height())); chk.focus_set()
+        elif source == SOURCE_LOG:
+            if not self.log_tree.exists(key): self.log_level_filter.set("TODOS"); self.log_text_filter_var.set("")  # la traza del filtro repuebla el log
+            if self.log_tree.exists(key): self.notebook.select(self.log_tab_frame); self._reveal(self.log_tree, key)
+        else: messagebox.showinfo("Búsqueda", "El elemento ya no está disponible.", parent=self.root)
 
     def _on_drop(self, event):
         fpath=event.data.strip('{}')
@@ -412,11 +656,8 @@ class PlayerToolkitApp:
             messagebox.showinfo("Éxito", "Configuración importada. Reinicia para aplicar.")
 
     def _load_custom_variables(self):
-        v_file=self.conf_dir/"variables.json"
-        if not v_file.exists(): return {}
-        try:
-            with open(v_file, 'r', encoding='utf-8') as f: return json.load(f)
-        except(IOError,json.JSONDecodeError): return {}
+        # Solo se vuelve a leer del disco si 'variables.json' ha cambiado.
+        return load_custom_variables(self.conf_dir)
     
     def _save_custom_variables(self,variables):
         v_file = self.conf_dir/"variables.json"
@@ -425,9 +666,5 @@ class PlayerToolkitApp:
         except IOError as e: messagebox.showerror("Error", f"No se pudo guardar:\n{e}")
 
     def _load_groups(self):
-        g_dir = self.programas_dir/"Grupos"; g_dir.mkdir(exist_ok=True); groups={}
-        try:
-            for f in g_dir.glob("*.txt"):
-                with open(f, 'r', encoding='utf-8') as fi: groups[f.stem] = [l.strip() for l in fi if l.strip()]
-        except IOError as e: messagebox.showerror("Error",f"No se pudieron cargar los grupos:\n{e}")
-        return groups
\ No newline at end of file
+        try: return self.group_repo.load()
+        except OSError as e: messagebox.showerror("Error",f"No se pudieron cargar los grupos:\n{e}"); return {}
\ No newline at end of file
@@ -0,0 +1,104 @@
+# --- START OF FILE toolkit_lib/ui/reporter.py ---
+
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+import time
+import threading
+
+from ..reporting import Reporter, result_state, OK_STATES
+
+class ProgressManager:
+    def __init__(self, root_gui):
+        self.root, self.window, self.bar, self.label_status, self.label_percentage = root_gui, None, None, None, None
+
+    def create(self):
+        if self.window and self.window.winfo_exists(): return
+        self.window = tk.Toplevel(self.root)
+        self.window.title("Procesando Tareas..."); self.window.geometry("450x150"); self.window.resizable(False, False)
+        self.window.transient(self.root); self.window.protocol("WM_DELETE_WINDOW", lambda: None); self.window.grab_set()
+        frame = ttk.Frame(self.window, padding="15"); frame.pack(expand=True, fill=tk.BOTH)
+        self.label_status = ttk.Label(frame, text="Iniciando...", font=("Segoe UI", 10), wraplength=400)
+        self.label_status.pack(pady=(0, 10), fill="x")
+        self.bar = ttk.Progressbar(frame, mode="determinate"); self.bar.pack(pady=10, fill="x", ipady=4)
+        self.label_percentage = ttk.Label(frame, text="", font=("Segoe UI", 9, "bold"), anchor="e")
+        self.label_percentage.pack(pady=5, fill="x")
+
+    def update(self, barra=None, status=None, porcentaje=None):
+        if not (self.window and self.window.winfo_exists()): return
+        if barra is not None: self.bar['value'] = barra
+        if status: self.label_status.config(text=status)
+        if porcentaje is not None: self.label_percentage.config(text=porcentaje)
+        self.window.update_idletasks()
+
+    def destroy(self):
+        if self.window and self.window.winfo_exists(): self.window.destroy()
+
+    def release_focus(self):
+        if self.window and self.window.winfo_exists(): self.window.grab_release()
+
+    def regain_focus(self):
+        if self.window and self.window.winfo_exists(): self.window.grab_set()
+
+class TkReporter(Reporter):
+    """Presenta un lote en Tk. Los diálogos pedidos desde hilos de trabajo se ejecutan en el hilo principal."""
+    interactive = True
+
+    def __init__(self, root):
+        self.root, self.pm = root, ProgressManager(root)
+
+    def _on_main(self, fn):
+        if threading.current_thread() is threading.main_thread(): return fn()
+        done, box = threading.Event(), {}
+        def run():
+            try: box["value"] = fn()
+            finally: done.set()
+        self.root.after(0, run); done.wait()
+        return box.get("value")
+
+    def _modal(self, fn):
+        """Diálogo con la ventana de progreso sin foco exclusivo mientras está abierto."""
+        def run():
+            self.pm.release_focus()
+            try: return fn()
+            finally: self.pm.regain_focus()
+        return self._on_main(run)
+
+    def call(self, fn): self.root.after(0, fn)
+
+    def progress_start(self): self.root.after(0, self.pm.create)
+    def progress_update(self, barra=None, status=None, porcentaje=None): self.root.after(0, lambda: self.pm.update(barra=barra, status=status, porcentaje=porcentaje))
+    def progress_end(self): self.root.after(0, self.pm.destroy)
+
+    def error(self, title, message): self._on_main(lambda: messagebox.showerror(title, message))
+    def warning(self, title, message): self._on_main(lambda: messagebox.showwarning(title, message))
+
+    def confirm_user_action(self, title, message): return self._modal(lambda: messagebox.askokcancel(title, message))
+    def ask_destination(self, title, filename): return self._modal(lambda: filedialog.asksaveasfilename(title=title, initialfile=filename)) or None
+
+    def confirm_restart(self, message):
+        return self._on_main(lambda: messagebox.askyesno("Reinicio necesario", message + "\n\n¿Reiniciar ahora (en 60 segundos)?"))
+
+    def show_results(self, processor): self.root.after(10, lambda: self._show_results_log(processor))
+
+    def _show_results_log(self, processor):
+        log_win = tk.Toplevel(self.root); log_win.title("Resultados"); log_win.geometry("600x400"); log_win.transient(self.root); log_win.grab_set()
+        text = tk.Text(log_win, wrap="word", font=("Segoe UI", 10), padx=10, pady=10)
+        text.pack(expand=True, fill="both"); text.tag_configure("success", foreground="green"); text.tag_configure("fail", foreground="red"); text.tag_configure("skipped", foreground="gray")
+        for res in sorted(processor.results.values()):
+            state = result_state(res)
+            text.insert(tk.END, res + "\n", "skipped" if state in ("sin_cambios", "pospuesta") else "success" if state in OK_STATES else "fail")
+        text.tag_configure("timing", foreground="gray", font=("Consolas", 9))
+        timings = processor.timing_summary_lines()
+        if timings: text.insert(tk.END, "\nTiempos por fase:\n" + "\n".join(timings) + "\n", "timing")
+        text.config(state="disabled")
+        buttons = ttk.Frame(log_win); buttons.pack(pady=10)
+        ttk.Button(buttons, text="Exportar traza...", command=lambda: self._export_trace(processor, log_win)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons, text="Cerrar", command=log_win.destroy).pack(side=tk.LEFT, padx=5)
+
+    def _export_trace(self, processor, parent):
+        logs_dir = processor.programas_dir.parent / "logs"
+        path = filedialog.asksaveasfilename(parent=parent, title="Exportar traza (Chrome)", defaultextension=".json", initialdir=logs_dir if logs_dir.is_dir() else None,
+                                            initialfile=f"traza_{time.strftime('%Y-%m-%d_%H-%M')}.json", filetypes=[("Chrome Trace", "*.json")])
+        if not path: return
+        try: processor.tracer.export_chrome(path); messagebox.showinfo("Traza", "Traza exportada. Ábrela en chrome://tracing o ui.perfetto.dev.", parent=parent)
+        except IOError as e: messagebox.showerror("Error", f"No se pudo exportar la traza:\n{e}", parent=parent)
@@ -17,7 +17,7 @@ def create_apps_tab(notebook, app):
     app.app_tree = ttk.Treeview(tree_frame, columns=('status_icon', 'status_text', 'progress', 'selector'), show='tree headings')
     app.app_tree.heading('#0', text='Aplicación'); app.app_tree.heading('status_icon', text='Estado'); app.app_tree.heading('status_text', text=''); app.app_tree.heading('progress', text='Progreso'); app.app_tree.heading('selector', text='Versión/Archivo')
     app.app_tree.column('#0', width=250, stretch=tk.YES); app.app_tree.column('status_icon', width=40, anchor='center'); app.app_tree.column('status_text', width=120); app.app_tree.column('progress', width=120); app.app_tree.column('selector', width=180, stretch=tk.YES)
-    app.app_tree.tag_configure('disabled', foreground='gray'); app.app_tree.tag_configure('category', font=("Segoe UI", 10, "bold")); app.app_tree.bind('<Button-1>', app._on_tree_click)
+    app.app_tree.tag_configure('disabled', foreground='gray'); app.app_tree.tag_configure('upgradeable', foreground='orange'); app.app_tree.tag_configure('category', font=("Segoe UI", 10, "bold")); app.app_tree.bind('<Button-1>', app._on_tree_click)
     
     scroll = ttk.Scrollbar(tree_frame, orient="vertical", command=app.app_tree.yview); app.app_tree.configure(yscrollcommand=scroll.set)
     app.app_tree.pack(side=tk.LEFT, fill='both', expand=True); scroll.pack(side=tk.RIGHT, fill='y')
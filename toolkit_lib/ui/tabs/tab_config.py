@@ -4,7 +4,9 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from ..dialogs import ConfigWizardDialog, VariablesManagerDialog
 from ..helpers import ToolTip
+from ...config import TASK_TYPE_LOCAL_INSTALL, TASK_TYPE_MANUAL_ASSISTED
 import shutil
+import threading
 
 def create_config_tab(notebook, app):
     tab = ttk.Frame(notebook, padding="10"); notebook.add(tab, text='Configuración ⚙️')
@@ -25,6 +27,8 @@ def create_config_tab(notebook, app):
     # --- BOTÓN "ACERCA DE..." AÑADIDO DE VUELTA ---
     ttk.Button(buttons, text="Acerca de...", command=app._show_about_dialog).pack(side='left')
     ttk.Button(buttons, text="Gestionar Variables...", command=lambda: VariablesManagerDialog(app.root, "Variables", app)).pack(side='left', padx=5)
+    app.lan_server_button = ttk.Button(buttons, text="Iniciar Servidor LAN", command=app.toggle_lan_server); app.lan_server_button.pack(side='left')
+    ttk.Button(buttons, text="Equipo Par...", command=app.configure_lan_peer).pack(side='left', padx=5)
     
     ttk.Button(buttons, text="Guardar Cambios", command=lambda: save_config(app)).pack(side='right')
     ttk.Button(buttons, text="Importar", command=lambda: import_config(app)).pack(side='right', padx=5)
@@ -35,7 +39,16 @@ def create_config_tab(notebook, app):
 def on_config_edit(app):
     iid = app.config_treeview.focus()
     if not iid: return
-    d = ConfigWizardDialog(app.root, f"Editando: {iid}", iid, app.app_configs[iid], list(app.app_configs.keys()))
+    if app.app_configs[iid].get('tipo') not in [TASK_TYPE_LOCAL_INSTALL, TASK_TYPE_MANUAL_ASSISTED]: _open_config_wizard(app, iid, None); return
+    # La detección lee los instaladores: se hace fuera del hilo de Tk y el asistente se abre al terminar.
+    app.root.config(cursor="watch")
+    def detect():
+        detection = app.installer_detector.detect_app(app.programas_dir / iid)
+        app.root.after(0, lambda: (app.root.config(cursor=""), _open_config_wizard(app, iid, detection)))
+    threading.Thread(target=detect, name="deteccion_instalador", daemon=True).start()
+
+def _open_config_wizard(app, iid, detection):
+    d = ConfigWizardDialog(app.root, f"Editando: {iid}", iid, app.app_configs[iid], list(app.app_configs.keys()), detection=detection)
     if d.result: app.app_configs[iid] = d.result; app.modified_configs.add(iid); app._populate_config_treeview()
 
 def save_config(app):
@@ -18,7 +18,7 @@ def create_dashboard_tab(notebook, app):
     status_lf = ttk.LabelFrame(left, text="Estado Actual", padding=10); status_lf.grid(row=0, column=0, sticky='ew')
     
     app.dashboard_labels = {
-        'total': ttk.Label(status_lf, text="..."), 'installed': ttk.Label(status_lf, text="..."), 'drivers': ttk.Label(status_lf, text="...")
+        'total': ttk.Label(status_lf, text="..."), 'installed': ttk.Label(status_lf, text="..."), 'upgradeable': ttk.Label(status_lf, text="..."), 'drivers': ttk.Label(status_lf, text="...")
     }
     [v.pack(anchor='w') for v in app.dashboard_labels.values()]
 
@@ -36,9 +36,11 @@ def create_dashboard_tab(notebook, app):
 
 def refresh_dashboard(app):
     labels = app.dashboard_labels
-    total, installed = len(app.app_configs), len([t for i in app.app_tree.get_children('') for c in app.app_tree.get_children(i) for t in app.app_tree.item(c,'tags') if 'installed' in t])
+    total, installed = len(app.app_configs), len([r for r in app._app_rows.values() if 'installed' in r["tags"]])
     labels['total'].config(text=f"Apps conocidas: {total}")
     labels['installed'].config(text=f"Instaladas (detectadas): {installed}")
+    upgradeable = len([r for r in app._app_rows.values() if 'upgradeable' in r["tags"]])
+    labels['upgradeable'].config(text=f"Con actualización disponible: {upgradeable}")
     
     # --- LÍNEA CORREGIDA ---
     # Convertimos el generador de app.drivers_dir.glob('*') a una lista para poder usar len()
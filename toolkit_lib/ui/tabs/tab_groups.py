@@ -3,6 +3,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from ..dialogs import open_group_manager
+from ...groups import DependencyCycleError
 
 def create_groups_tab(notebook, app):
     tab = ttk.Frame(notebook, padding="10"); notebook.add(tab, text='Grupos 🗂️')
@@ -14,7 +15,14 @@ def create_groups_tab(notebook, app):
     contents = tk.Listbox(tab); contents.grid(row=1, column=0, sticky='nsew')
     
     def refresh_combo(): groups=app._load_groups(); combo['values']=sorted(groups.keys()); combo.set(''); contents.delete(0,tk.END)
-    def on_select(e): contents.delete(0,tk.END); [contents.insert(tk.END, n) for n in sorted(app._load_groups().get(combo.get(),[]))]
+    def on_select(e):
+        contents.delete(0,tk.END); declared = set(app.group_repo.get(combo.get()))
+        try: _, levels = app.group_repo.plan(combo.get())
+        except DependencyCycleError as e:
+            contents.insert(tk.END, "⚠️ Dependencia circular, no se puede ordenar el grupo:"); contents.insert(tk.END, f"   {e}"); contents.itemconfig(0, foreground="orange"); return
+        for i, level in enumerate(levels, 1):
+            contents.insert(tk.END, f"— Paso {i} —")
+            [contents.insert(tk.END, f"   {n}" + ("" if n in declared else "  (dependencia)")) for n in sorted(level)]
     def apply():
         if not combo.get(): return
         app.apply_group_from_dashboard(combo.get())
@@ -22,7 +30,7 @@ def create_groups_tab(notebook, app):
     combo.bind('<<ComboboxSelected>>', on_select)
     buttons = ttk.Frame(tab); buttons.grid(row=2, column=0, sticky='ew', pady=(10, 0))
     ttk.Button(buttons, text="Aplicar Grupo", command=apply).pack(side=tk.LEFT, expand=True, fill='x', padx=(0,5))
-    ttk.Button(buttons, text="Gestionar Grupos...", command=lambda: open_group_manager(app.root, refresh_combo, app.app_configs)).pack(side=tk.LEFT, expand=True, fill='x')
+    ttk.Button(buttons, text="Gestionar Grupos...", command=lambda: open_group_manager(app.root, refresh_combo, app.app_configs, app.group_repo)).pack(side=tk.LEFT, expand=True, fill='x')
     
     refresh_combo()
     return tab
\ No newline at end of file
@@ -3,9 +3,20 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from datetime import datetime
+from ...jobs import JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_FAILED, JOB_CANCELLED
+
+JOB_ICONS = {JOB_QUEUED: "⏳", JOB_RUNNING: "⚙️", JOB_DONE: "✅", JOB_FAILED: "❌", JOB_CANCELLED: "🚫"}
 
 def create_log_tab(notebook, app):
     tab = ttk.Frame(notebook, padding="10"); notebook.add(tab, text='Log 📜')
+
+    # Cola de trabajos (lotes, tareas rápidas, drivers, desinstalaciones)
+    jobs_lf = ttk.LabelFrame(tab, text="Trabajos", padding=5); jobs_lf.pack(fill='x', pady=(0, 10))
+    app.jobs_tree = ttk.Treeview(jobs_lf, columns=('id', 'job', 'state', 'elapsed'), show='headings', height=4)
+    for col, text, width in [('id', '#', 40), ('job', 'Trabajo', 300), ('state', 'Estado', 140), ('elapsed', 'Duración', 90)]:
+        app.jobs_tree.heading(col, text=text); app.jobs_tree.column(col, width=width, stretch=(col == 'job'))
+    app.jobs_tree.pack(side=tk.LEFT, fill='x', expand=True)
+    ttk.Button(jobs_lf, text="Cancelar", command=lambda: cancel_selected_job(app)).pack(side=tk.RIGHT, padx=(5, 0), anchor='n')
     
     # Controles de Filtro y Exportación
     controls = ttk.Frame(tab); controls.pack(fill='x', pady=(0, 10))
@@ -42,6 +53,17 @@ def create_log_tab(notebook, app):
 
     return tab
 
+def refresh_jobs(app):
+    if not app.jobs_tree.winfo_exists(): return
+    [app.jobs_tree.delete(i) for i in app.jobs_tree.get_children()]
+    for job in reversed(app.jobs.jobs()):
+        elapsed = f"{job.elapsed():.0f}s" if job.started else ""
+        app.jobs_tree.insert("", "end", iid=str(job.id), values=(job.id, job.label, f"{JOB_ICONS.get(job.state, '')} {job.state.replace('_', ' ')}", elapsed))
+
+def cancel_selected_job(app):
+    for iid in app.jobs_tree.selection():
+        if not app.jobs.cancel(int(iid)): messagebox.showinfo("Trabajos", "Solo se pueden cancelar los trabajos que siguen en cola.", parent=app.root)
+
 def filter_log(app):
     level_filter = app.log_level_filter.get()
     text_filter = app.log_text_filter_var.get().lower()
@@ -50,19 +72,19 @@ def filter_log(app):
     [app.log_tree.delete(i) for i in app.log_tree.get_children()]
 
     # Repoblar con datos filtrados
-    for time, level, msg in app.original_log_data:
+    for time, level, msg, iid in app.original_log_data:
         level_match = (level_filter == "TODOS" or level == level_filter)
         text_match = (text_filter in msg.lower())
         
         if level_match and text_match:
-            app.log_tree.insert("", 0, values=(time, level, msg), tags=(level,))
+            app.log_tree.insert("", 0, iid=iid, values=(time, level, msg), tags=(level,))
 
 def export_log(app):
     filepath = filedialog.asksaveasfilename(defaultextension=".log", filetypes=[("Log Files", "*.log")], title="Exportar Log", initialfile=f"PlayerToolkit_Log_{datetime.now():%Y-%m-%d_%H-%M}.log")
     if not filepath: return
     try:
         with open(filepath, 'w', encoding='utf-8') as f:
-            for time, level, msg in reversed(app.original_log_data):
+            for time, level, msg, _ in reversed(app.original_log_data):
                 f.write(f"[{time}] [{level}] {msg}\n")
         messagebox.showinfo("Éxito", "Log exportado correctamente.")
     except IOError as e:
@@ -0,0 +1,227 @@
+# --- START OF FILE toolkit_lib/updater.py ---
+
+import json
+import hashlib
+import logging
+import shutil
+import struct
+import zipfile
+import zlib
+from pathlib import Path, PurePosixPath, PureWindowsPath
+import requests # type: ignore
+
+MANIFEST_SUFFIX = ".manifest.json"
+STAGING_MARKER = ".update_manifest.json"
+CHUNK_SIZE = 1 << 16
+
+_EOCD = struct.Struct('<4s4H2LH')
+_CENTRAL = struct.Struct('<4s6H3L5H2L')
+_LOCAL = struct.Struct('<4s5H3L2H')
+
+class UpdateError(Exception):
+    """Error al descargar o verificar una actualización."""
+
+class RangeNotSupported(UpdateError):
+    """El servidor no admite peticiones parciales (Range)."""
+
+def safe_member_path(base: Path, name):
+    """Ruta de 'name' (del manifiesto o del zip) dentro de 'base'. Rechaza rutas absolutas, unidades y '..' (zip-slip)."""
+    win = PureWindowsPath(str(name))
+    if not name or win.is_absolute() or win.drive or win.root or PurePosixPath(str(name)).is_absolute() or ".." in win.parts:
+        raise UpdateError(f"Ruta no permitida en el paquete: '{name}'.")
+    base = Path(base).resolve(); target = (base / Path(*win.parts)).resolve()
+    if not target.is_relative_to(base): raise UpdateError(f"Ruta no permitida en el paquete: '{name}'.")
+    return target
+
+def sha256_file(path: Path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""): h.update(chunk)
+    return h.hexdigest()
+
+def build_manifest(zip_path: Path, version=None):
+    """Genera el manifiesto de hashes por archivo de un zip de release (se publica junto al zip)."""
+    files = {}
+    with zipfile.ZipFile(zip_path) as zf:
+        for info in zf.infolist():
+            if info.is_dir(): continue
+            h = hashlib.sha256()
+            with zf.open(info) as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""): h.update(chunk)
+            files[info.filename] = {"sha256": h.hexdigest(), "size": info.file_size}
+    return {"version": version, "archive": Path(zip_path).name, "files": files}
+
+def changed_files(manifest, install_dir: Path):
+    """Devuelve las rutas del manifiesto cuyo contenido local no coincide (o no existe)."""
+    changed = []
+    for rel, meta in manifest.get("files", {}).items():
+        local = safe_member_path(install_dir, rel)
+        try:
+            if local.stat().st_size != meta.get("size") or sha256_file(local) != meta.get("sha256"): changed.append(rel)
+        except OSError: changed.append(rel)
+    return changed
+
+class ReleaseClient:
+    """Consulta la última release con peticiones condicionales (ETag / If-None-Match) cacheadas en disco."""
+    def __init__(self, cache_file: Path, session=None):
+        self.cache_file, self.session = Path(cache_file), session or requests.Session()
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f: return json.load(f)
+        except (IOError, json.JSONDecodeError): return {}
+
+    def _save_cache(self, data):
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.cache_file, 'w', encoding='utf-8') as f: json.dump(data, f, indent=2)
+        except IOError as e: logging.warning(f"No se pudo guardar la caché de actualizaciones: {e}")
+
+    def get_json(self, url, timeout=10):
+        cache = self._load_cache(); entry = cache.get(url, {})
+        headers = {"Accept": "application/vnd.github+json"}
+        if entry.get("etag"): headers["If-None-Match"] = entry["etag"]
+        r = self.session.get(url, headers=headers, timeout=timeout)
+        if r.status_code == 304 and "body" in entry:
+            logging.info(f"Sin cambios en {url} (304, usando caché)."); return entry["body"]
+        r.raise_for_status(); body = r.json()
+        if r.headers.get("ETag"): cache[url] = {"etag": r.headers["ETag"], "body": body}; self._save_cache(cache)
+        return body
+
+    def latest_release(self, api_url): return self.get_json(api_url)
+
+class RemoteZip:
+    """Lee el directorio central de un zip remoto y extrae miembros sueltos con peticiones Range."""
+    def __init__(self, url, session=None, timeout=60):
+        self.url, self.session, self.timeout = url, session or requests.Session(), timeout
+        self.size, self.entries = None, {}
+
+    def _range(self, start, end=None, stream=False):
+        spec = f"bytes={start}-{'' if end is None else end}" if start >= 0 else f"bytes={start}"
+        r = self.session.get(self.url, headers={"Range": spec, "Accept-Encoding": "identity"}, stream=stream, timeout=self.timeout)
+        if r.status_code != 206: r.close(); raise RangeNotSupported(f"Respuesta {r.status_code} a una petición Range.")
+        total = r.headers.get("Content-Range", "").rpartition("/")[2]
+        if total.isdigit(): self.size = int(total)
+        return r
+
+    def read_directory(self):
+        with self._range(-(_EOCD.size + 0xFFFF)) as r: tail = r.content
+        pos = tail.rfind(b'PK\x05\x06')
+        if pos < 0: raise UpdateError("Fin de directorio central no encontrado.")
+        _, _, _, _, count, cd_size, cd_offset, _ = _EOCD.unpack_from(tail, pos)
+        if cd_offset == 0xFFFFFFFF or count == 0xFFFF: raise RangeNotSupported("Zip64 no soportado en modo parcial.")
+        tail_start = self.size - len(tail)
+        if cd_offset >= tail_start: directory = tail[cd_offset - tail_start: cd_offset - tail_start + cd_size]
+        else:
+            with self._range(cd_offset, cd_offset + cd_size - 1) as r: directory = r.content
+        off = 0
+        for _ in range(count):
+            (sig, _, _, flags, method, _, _, crc, csize, usize, n_len, e_len, c_len, _, _, _, local) = _CENTRAL.unpack_from(directory, off)
+            if sig != b'PK\x01\x02': raise UpdateError("Directorio central corrupto.")
+            raw_name = directory[off + _CENTRAL.size: off + _CENTRAL.size + n_len]
+            name = raw_name.decode('utf-8' if flags & 0x800 else 'cp437')
+            self.entries[name] = {"method": method, "crc": crc, "compress_size": csize, "file_size": usize, "offset": local}
+            off += _CENTRAL.size + n_len + e_len + c_len
+        return self.entries
+
+    def extract_to(self, name, dest: Path, expected_sha256=None):
+        """Descarga y descomprime en streaming un único miembro, verificando CRC y SHA-256."""
+        e = self.entries[name]
+        if e["method"] not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED): raise UpdateError(f"Compresión no soportada en '{name}'.")
+        end = min(e["offset"] + _LOCAL.size + 0xFFFF * 2 + e["compress_size"], self.size) - 1
+        with self._range(e["offset"], end, stream=True) as r:
+            raw = r.raw
+            header = raw.read(_LOCAL.size)
+            if len(header) < _LOCAL.size or header[:4] != b'PK\x03\x04': raise UpdateError(f"Cabecera local inválida en '{name}'.")
+            n_len, e_len = _LOCAL.unpack(header)[-2:]; raw.read(n_len + e_len)
+            return _inflate_stream(lambda n: raw.read(n), e, dest, expected_sha256, name)
+
+def _inflate_stream(read, entry, dest: Path, expected_sha256, name):
+    inflater = zlib.decompressobj(-15) if entry["method"] == zipfile.ZIP_DEFLATED else None
+    h, crc, remaining = hashlib.sha256(), 0, entry["compress_size"]
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    with open(dest, 'wb') as out:
+        while remaining > 0:
+            chunk = read(min(CHUNK_SIZE, remaining))
+            if not chunk: raise UpdateError(f"Datos incompletos para '{name}'.")
+            remaining -= len(chunk)
+            data = inflater.decompress(chunk) if inflater else chunk
+            out.write(data); h.update(data); crc = zlib.crc32(data, crc)
+        if inflater:
+            data = inflater.flush(); out.write(data); h.update(data); crc = zlib.crc32(data, crc)
+    if crc != entry["crc"] or (expected_sha256 and h.hexdigest() != expected_sha256):
+        dest.unlink(missing_ok=True); raise UpdateError(f"Verificación fallida para '{name}'.")
+    return h.hexdigest()
+
+class DeltaUpdater:
+    """
+    Prepara una actualización en 'staging_dir' escribiendo solo los archivos que cambian
+    respecto a 'install_dir'. El reemplazo real lo hace el script de actualización al cerrar.
+    """
+    def __init__(self, install_dir: Path, staging_dir: Path, session=None, progress_callback=None):
+        self.install_dir, self.staging_dir = Path(install_dir), Path(staging_dir)
+        self.session, self.progress = session or requests.Session(), progress_callback or (lambda done, total: None)
+
+    def is_ready(self): return (self.staging_dir / STAGING_MARKER).exists()
+
+    def discard(self): shutil.rmtree(self.staging_dir, ignore_errors=True)
+
+    def prepare(self, zip_url, manifest=None):
+        self.discard(); self.staging_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            if manifest: staged = self._prepare_delta(zip_url, manifest)
+            else: staged = self._prepare_full(zip_url, None)
+        except RangeNotSupported as e:
+            logging.info(f"Descarga parcial no disponible ({e}). Descargando el paquete completo.")
+            self.discard(); self.staging_dir.mkdir(parents=True, exist_ok=True); staged = self._prepare_full(zip_url, manifest)
+        except Exception: self.discard(); raise
+        with open(self.staging_dir / STAGING_MARKER, 'w', encoding='utf-8') as f: json.dump({"files": staged}, f, indent=2)
+        return staged
+
+    def _prepare_delta(self, zip_url, manifest):
+        todo = changed_files(manifest, self.install_dir)
+        logging.info(f"Actualización: {len(todo)} de {len(manifest.get('files', {}))} archivos han cambiado.")
+        remote = RemoteZip(zip_url, self.session); entries = remote.read_directory()
+        total = sum(entries[n]["compress_size"] for n in todo if n in entries) or 1; done = 0
+        for name in todo:
+            if name not in entries: raise UpdateError(f"'{name}' no está en el paquete.")
+            remote.extract_to(name, safe_member_path(self.staging_dir, name), manifest["files"][name].get("sha256"))
+            done += entries[name]["compress_size"]; self.progress(done, total)
+        return todo
+
+    def _prepare_full(self, zip_url, manifest):
+        archive = self.staging_dir.parent / (self.staging_dir.name + ".zip")
+        try:
+            with self.session.get(zip_url, stream=True, timeout=60) as r:
+                r.raise_for_status(); total = int(r.headers.get('content-length', 0)); done = 0
+                with open(archive, 'wb') as f:
+                    for chunk in r.iter_content(CHUNK_SIZE):
+                        f.write(chunk); done += len(chunk)
+                        if total: self.progress(done, total)
+            staged = []
+            with zipfile.ZipFile(archive) as zf:
+                for info in zf.infolist():
+                    if info.is_dir(): continue
+                    expected = (manifest or {}).get("files", {}).get(info.filename, {}).get("sha256")
+                    local, dest = safe_member_path(self.install_dir, info.filename), safe_member_path(self.staging_dir, info.filename)
+                    with zf.open(info) as src:
+                        digest = _copy_hashed(src, dest)
+                    if expected and digest != expected: raise UpdateError(f"Verificación fallida para '{info.filename}'.")
+                    if local.exists() and local.stat().st_size == info.file_size and sha256_file(local) == digest: dest.unlink(); continue
+                    staged.append(info.filename)
+            return staged
+        finally: archive.unlink(missing_ok=True)
+
+def _copy_hashed(src, dest: Path):
+    h = hashlib.sha256(); dest.parent.mkdir(parents=True, exist_ok=True)
+    with open(dest, 'wb') as out:
+        for chunk in iter(lambda: src.read(CHUNK_SIZE), b""): out.write(chunk); h.update(chunk)
+    return h.hexdigest()
+
+if __name__ == "__main__":
+    import sys
+    # Uso (al publicar una release): python -m toolkit_lib.updater PlayerToolkit_vX.Y.Z.zip
+    for zip_arg in sys.argv[1:]:
+        zip_path = Path(zip_arg); out = zip_path.with_name(zip_path.stem + MANIFEST_SUFFIX)
+        with open(out, 'w', encoding='utf-8') as f: json.dump(build_manifest(zip_path), f, indent=2)
+        print(f"Manifiesto generado: {out}")
@@ -1,52 +1,122 @@
 # --- START OF FILE toolkit_lib/utils.py ---
 
-import winreg
-import ctypes
 import logging
 from datetime import datetime
 import json
 from pathlib import Path
 import hashlib
 import os
-from .config import DRIVER_EXTENSIONS
+import re
+from .config import DRIVER_EXTENSIONS, INSTALLER_EXTENSIONS, STATUS_FOLDER_NOT_FOUND, STATUS_NO_FILES_FOUND, TASK_TYPE_LOCAL_INSTALL, TASK_TYPE_MANUAL_ASSISTED, TASK_TYPE_COPY_INTERACTIVE
+from .system import get_system, UNINSTALL_ROOTS
+from .inventory_history import InventoryHistory, INVENTORY_HISTORY_FILE_NAME
 
-CACHE_FILE = Path(os.getenv("APPDATA")) / "PlayerToolkit" / "scan_cache.json"
+CACHE_FILE = Path(os.getenv("APPDATA") or Path.home()) / "PlayerToolkit" / "scan_cache.json"
+_inventory_history = None
 
-def is_admin():
+def get_inventory_history():
+    """Historial de inventarios junto al caché (se carga una sola vez por proceso)."""
+    global _inventory_history
+    if _inventory_history is None: _inventory_history = InventoryHistory(CACHE_FILE.parent / INVENTORY_HISTORY_FILE_NAME)
+    return _inventory_history
+
+def load_json_dict(path: Path):
+    """Contenido de un JSON de estado o caché; {} si no existe, está dañado o no es un objeto."""
+    if not path or not Path(path).exists(): return {}
     try:
-        return ctypes.windll.shell32.IsUserAnAdmin()
-    except Exception:
-        return False
-
-def scan_installed_software():
-    installed_software = {}
-    uninstall_paths = [r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall", r"SOFTWARE\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall"]
-    for path in uninstall_paths:
-        try:
-            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, path) as key:
-                for i in range(winreg.QueryInfoKey(key)[0]):
-                    try:
-                        sub_key_name = winreg.EnumKey(key, i)
-                        with winreg.OpenKey(key, sub_key_name) as sub_key:
-                            display_name = str(winreg.QueryValueEx(sub_key, "DisplayName")[0])
-                            if not display_name or display_name.startswith("KB") or "Microsoft Visual C++" in display_name: continue
-                            uninstall_string = str(winreg.QueryValueEx(sub_key, "UninstallString")[0])
-                            version = str(winreg.QueryValueEx(sub_key, "DisplayVersion")[0]) if "DisplayVersion" in [winreg.EnumValue(sub_key,i)[0] for i in range(winreg.QueryInfoKey(sub_key)[1])] else ""
-                            date_str = datetime.strptime(str(winreg.QueryValueEx(sub_key, "InstallDate")[0]), "%Y%m%d").strftime("%d-%m-%Y") if "InstallDate" in [winreg.EnumValue(sub_key,i)[0] for i in range(winreg.QueryInfoKey(sub_key)[1])] else ""
-                            installed_software[display_name] = {"uninstall_string": uninstall_string, "version": version, "install_date": date_str}
-                    except (OSError, FileNotFoundError, IndexError): continue
+        with open(path, 'r', encoding='utf-8') as f: data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (IOError, json.JSONDecodeError): return {}
+
+def write_json_atomic(path: Path, data, indent=None, durable=False):
+    """Escribe 'data' en un temporal y lo renombra sobre 'path' (nunca queda a medias). 'durable' fuerza fsync. Lanza OSError."""
+    path = Path(path); path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+        if durable: f.flush(); os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def is_admin(system=None):
+    return (system or get_system()).is_admin()
+
+def _format_install_date(value):
+    try: return datetime.strptime(str(value), "%Y%m%d").strftime("%d-%m-%Y")
+    except ValueError: return ""
+
+def scan_installed_software(system=None):
+    system, installed_software = system or get_system(), {}
+    for path in UNINSTALL_ROOTS:
+        try: sub_keys = system.registry_subkeys(path)
         except FileNotFoundError: continue
+        for sub_key_name in sub_keys:
+            try:
+                values = system.registry_values(f"{path}\\{sub_key_name}")
+                display_name = str(values["DisplayName"])
+                if not display_name or display_name.startswith("KB") or "Microsoft Visual C++" in display_name: continue
+                uninstall_string = str(values["UninstallString"])
+                version = str(values.get("DisplayVersion", ""))
+                date_str = _format_install_date(values["InstallDate"]) if "InstallDate" in values else ""
+                installed_software[display_name] = {"uninstall_string": uninstall_string, "version": version, "install_date": date_str, "registry_key": f"{path}\\{sub_key_name}"}
+            except (OSError, KeyError): continue
     return installed_software
 
+def uninstall_entry_exists(registry_key, system=None):
+    """Comprueba solo la subclave de desinstalación indicada (sin recorrer todo el inventario)."""
+    try: return bool((system or get_system()).registry_values(registry_key).get("DisplayName"))
+    except OSError: return False
+
+def scan_app_files(programas_dir: Path, app_configs, progress=None):
+    """Archivos disponibles de cada app (instaladores o archivos a copiar). Llama a progress(i, total, app) antes de cada una."""
+    scan_results, total = {}, len(app_configs)
+    for i, (app_key, config) in enumerate(app_configs.items()):
+        if progress: progress(i, total, app_key)
+        task_type, app_dir = config.get('tipo'), programas_dir / app_key
+        if task_type in [TASK_TYPE_LOCAL_INSTALL, TASK_TYPE_MANUAL_ASSISTED]:
+            if not app_dir.is_dir(): scan_results[app_key] = [STATUS_FOLDER_NOT_FOUND]
+            else: scan_results[app_key] = [f.name for ext in INSTALLER_EXTENSIONS for f in app_dir.glob(f"*{ext}")]
+        elif task_type == TASK_TYPE_COPY_INTERACTIVE:
+            if not app_dir.is_dir(): scan_results[app_key] = [STATUS_FOLDER_NOT_FOUND]
+            else: scan_results[app_key] = [f.name for f in app_dir.iterdir() if f.is_file()] or [STATUS_NO_FILES_FOUND]
+        else: scan_results[app_key] = []
+    return scan_results
+
 def scan_drivers(drivers_base_dir: Path):
     """Escanea la carpeta de drivers y devuelve un diccionario de paquetes de drivers encontrados."""
     found_drivers = {}
     if not drivers_base_dir.is_dir(): return found_drivers
     for item in drivers_base_dir.iterdir():
         if item.is_dir():
-            if any(item.glob(f"*{ext}")): found_drivers[item.name] = {"path": str(item)}
+            if any(f for ext in DRIVER_EXTENSIONS for f in item.glob(f"*{ext}")): found_drivers[item.name] = {"path": str(item)}
     return found_drivers
 
+INF_MAX_BYTES = 4 * 1024 * 1024
+
+def read_inf_metadata(inf_path: Path):
+    """Proveedor, clase, fabricantes y hardware IDs declarados en un .inf (UTF-16 o ANSI), con %cadenas% resueltas."""
+    with open(inf_path, 'rb') as f: raw = f.read(INF_MAX_BYTES)
+    if raw[:2] in (b'\xff\xfe', b'\xfe\xff'): text = raw.decode('utf-16', errors='replace')
+    else:
+        try: text = raw.decode('utf-8-sig')
+        except UnicodeDecodeError: text = raw.decode('cp1252', errors='replace')
+    sections, current = {}, None
+    for line in text.splitlines():
+        line = line.split(';', 1)[0].strip()
+        if line.startswith('[') and line.endswith(']'): current = sections.setdefault(line[1:-1].strip().lower(), [])
+        elif line and current is not None: current.append(line)
+    entries = lambda name: [(k.strip(), v.strip()) for k, _, v in (l.partition('=') for l in sections.get(name, []))]
+    strings = {k.lower(): v.strip('"') for k, v in entries('strings')}
+    resolve = lambda v: re.sub(r'%([^%]+)%', lambda m: strings.get(m.group(1).lower(), m.group(0)), v).strip().strip('"')
+    version = {k.lower(): resolve(v) for k, v in entries('version')}
+    manufacturers, hardware_ids = [], set()
+    for name, models in entries('manufacturer'):
+        manufacturers.append(resolve(name))
+        base, *decorations = [p.strip() for p in models.split(',')]
+        for section in [base] + [f"{base}.{d}" for d in decorations]:
+            for _, device in entries(section.lower()): hardware_ids.update(p.strip() for p in device.split(',')[1:] if p.strip())
+    return {"proveedor": version.get("provider", ""), "clase": version.get("class", ""), "version": version.get("driverver", ""),
+            "fabricantes": manufacturers, "hardware_ids": sorted(hardware_ids)}
+
 def get_programas_dir_hash(programas_dir: Path):
     if not programas_dir.is_dir(): return ""
     hasher = hashlib.md5()
@@ -58,12 +128,21 @@ def get_programas_dir_hash(programas_dir: Path):
 def load_cached_scan():
     if not CACHE_FILE.exists(): return None
     try:
-        with open(CACHE_FILE, 'r', encoding='utf-8') as f: return json.load(f)
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f: cache_data = json.load(f)
     except (IOError, json.JSONDecodeError): return None
+    # El inventario vive en el historial; los cachés antiguos aún lo traen completo.
+    if "installed_software" not in cache_data:
+        history = get_inventory_history()
+        if not history.entries or history.entries[-1]["n"] != cache_data.get("inventario_n"): return None
+        cache_data["installed_software"] = history.latest()
+    return cache_data
 
-def save_cached_scan(installed_software, scan_results, dir_hash):
+def save_cached_scan(installed_software, scan_results, dir_hash, label=""):
+    """Guarda el escaneo: el inventario como diferencia en el historial y el resto en el caché."""
     CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
-    cache_data = {"timestamp": datetime.now().isoformat(), "hash": dir_hash, "installed_software": installed_software, "scan_results": scan_results}
+    history = get_inventory_history(); history.record(installed_software, label)
+    cache_data = {"timestamp": datetime.now().isoformat(), "hash": dir_hash, "inventario_n": history.entries[-1]["n"] if history.entries else None, "scan_results": scan_results}
+    if history.latest() != installed_software: cache_data["installed_software"] = installed_software  # el historial no se pudo escribir
     try:
         with open(CACHE_FILE, 'w', encoding='utf-8') as f: json.dump(cache_data, f, indent=2)
     except IOError as e: logging.error(f"No se pudo guardar caché: {e}")
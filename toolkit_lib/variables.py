@@ -0,0 +1,118 @@
+# --- START OF FILE toolkit_lib/variables.py ---
+
+import os
+import json
+import re
+import logging
+import threading
+from pathlib import Path
+
+# Un único patrón para todas las expansiones: %NOMBRE% (estilo Windows).
+VAR_PATTERN = re.compile(r"%([A-Za-z_][A-Za-z0-9_.()\-]*)%")
+# $NOMBRE y ${NOMBRE} de entorno, como os.path.expandvars (las desconocidas se dejan tal cual).
+ENV_DOLLAR_PATTERN = re.compile(r"\$(\w+|\{[^}]*\})")
+# '%C3%' en 'caf%C3%A9' es un escape de URL, no una variable, salvo que esté definida.
+_HEX_PAIR = re.compile(r"[0-9A-Fa-f]{2}")
+VARIABLES_FILE_NAME = "variables.json"
+
+class VariableCycleError(ValueError):
+    """Se lanza cuando una variable personalizada se referencia a sí misma (directa o indirectamente)."""
+
+class VariableExpander:
+    """
+    Tabla de variables compilada. Las variables personalizadas se resuelven una sola vez
+    (incluyendo definiciones anidadas) y cada expansión es una única pasada de regex:
+    primero se buscan en las personalizadas y después en las de entorno.
+    """
+    def __init__(self, custom_vars=None, environ=None):
+        self.environ = os.environ if environ is None else environ
+        self.raw = dict(custom_vars or {})
+        self._raw_ci = {k.upper(): k for k in self.raw}
+        self.cycles = {}
+        self.table = self._compile()
+
+    def _compile(self):
+        resolved = {}
+        def resolve(name, stack):
+            if name in resolved: return resolved[name]
+            if name in stack:
+                chain = stack[stack.index(name):] + [name]
+                raise VariableCycleError(" -> ".join(f"%{n}%" for n in chain))
+            stack.append(name)
+            def sub(m):
+                ref = self._custom_key(m.group(1))
+                if ref is not None: return resolve(ref, stack)
+                env_val = self.environ.get(m.group(1))
+                return env_val if env_val is not None else m.group(0)
+            value = VAR_PATTERN.sub(sub, str(self.raw[name]))
+            stack.pop(); resolved[name] = value
+            return value
+        for name in self.raw:
+            try: resolve(name, [])
+            except VariableCycleError as e:
+                self.cycles[name] = str(e); logging.error(f"Dependencia circular en variables: {e}")
+        return resolved
+
+    def _custom_key(self, name):
+        if name in self.raw: return name
+        return self._raw_ci.get(name.upper())
+
+    def _lookup(self, name):
+        key = self._custom_key(name)
+        if key is not None and key in self.table: return self.table[key]
+        if key is not None: return None # Variable en ciclo: se deja sin expandir
+        return self.environ.get(name)
+
+    def expand(self, value):
+        if not isinstance(value, str): return value
+        if "$" in value: value = ENV_DOLLAR_PATTERN.sub(lambda m: self.environ.get(m.group(1).strip("{}"), m.group(0)), value)
+        if "%" not in value: return value
+        def sub(m):
+            found = self._lookup(m.group(1))
+            return found if found is not None else m.group(0)
+        return VAR_PATTERN.sub(sub, value)
+
+    def unresolved(self, value):
+        """Devuelve los nombres de variables que quedarían sin expandir en 'value' (str o lista)."""
+        if isinstance(value, (list, tuple)): return {n for v in value for n in self.unresolved(v)}
+        if not isinstance(value, str) or "%" not in value: return set()
+        return {m.group(1) for m in VAR_PATTERN.finditer(value) if self._lookup(m.group(1)) is None and not _HEX_PAIR.fullmatch(m.group(1))}
+
+_compiled_cache = {}
+_file_cache = {}
+_cache_lock = threading.Lock()
+
+def compile_variables(custom_vars=None):
+    """Devuelve un VariableExpander compilado, reutilizando el existente si las variables no cambiaron."""
+    if isinstance(custom_vars, VariableExpander): return custom_vars
+    key = tuple(sorted((str(k), str(v)) for k, v in (custom_vars or {}).items()))
+    with _cache_lock:
+        expander = _compiled_cache.get(key)
+        if expander is None:
+            if len(_compiled_cache) > 32: _compiled_cache.clear()
+            expander = _compiled_cache[key] = VariableExpander(dict(key))
+    return expander
+
+def _file_stamp(v_file: Path):
+    try:
+        st = v_file.stat(); return (st.st_mtime_ns, st.st_size)
+    except OSError: return None
+
+def load_custom_variables(conf_dir: Path):
+    """Lee 'variables.json' solo si cambió desde la última lectura. Devuelve una copia editable."""
+    v_file = Path(conf_dir) / VARIABLES_FILE_NAME
+    stamp = _file_stamp(v_file)
+    if stamp is None: return {}
+    with _cache_lock:
+        cached = _file_cache.get(v_file)
+        if cached and cached[0] == stamp: return dict(cached[1])
+    try:
+        with open(v_file, 'r', encoding='utf-8') as f: variables = json.load(f)
+        if not isinstance(variables, dict): variables = {}
+    except (IOError, json.JSONDecodeError): return {}
+    with _cache_lock: _file_cache[v_file] = (stamp, variables)
+    return dict(variables)
+
+def get_expander(conf_dir: Path):
+    """Expansor compilado para el 'variables.json' actual de 'conf_dir'."""
+    return compile_variables(load_custom_variables(conf_dir))